@@ -0,0 +1,47 @@
+"""
+Benchmark of :meth:`scikits.timeseries.DateArray.asfreq`.
+
+Reports the throughput (in dates per second) of the conversion of a
+DateArray from one frequency to another, for several frequency pairs.
+
+Usage: python bench_asfreq.py [nb of dates]
+"""
+import sys
+import time
+
+import numpy as np
+
+import scikits.timeseries as ts
+
+
+def best_of(func, repeat=3):
+    "Returns the best time of `repeat` calls to `func`."
+    best = np.inf
+    for i in range(repeat):
+        start = time.time()
+        func()
+        best = min(best, time.time() - start)
+    return best
+
+
+pairs = [('M', 'Q'), ('M', 'A'), ('Q', 'A-JUN'), ('A', 'M'), ('Q-NOV', 'M'),
+         ('D', 'B'), ('B', 'D'), ('H', 'D'), ('T', 'D'), ('S', 'D'),
+         ('D', 'H'), ('D', 'M'), ('D', 'A'), ('M', 'D'), ('W', 'D')]
+
+
+def main(size=1000000):
+    print "%-10s %12s %10s %14s" % ('pair', 'size', 'time (s)', 'dates/sec')
+    for (ifreq, ofreq) in pairs:
+        dates = ts.date_array(start_date=ts.Date(ifreq, '2000-01-01'),
+                              length=size)
+        func = lambda: dates.asfreq(ofreq)
+        elapsed = best_of(func)
+        print "%-10s %12i %10.4f %14.0f" % ("%s->%s" % (ifreq, ofreq), size,
+                                            elapsed, size / elapsed)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
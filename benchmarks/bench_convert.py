@@ -0,0 +1,85 @@
+"""
+Benchmark of :func:`scikits.timeseries.convert`.
+
+Reports the throughput (in source elements per second) of the conversion of
+a series from one frequency to another, for several frequency pairs and
+dtypes, and compares the aggregation functions given by name (computed in C)
+with their Python equivalents.
+
+Usage: python bench_convert.py [nb of years]
+"""
+import sys
+import time
+
+import numpy as np
+import numpy.ma as ma
+
+import scikits.timeseries as ts
+
+
+def best_of(func, repeat=3):
+    "Returns the best time of `repeat` calls to `func`."
+    best = np.inf
+    for i in range(repeat):
+        start = time.time()
+        func()
+        best = min(best, time.time() - start)
+    return best
+
+
+pairs = [('T', 'H'), ('T', 'D'), ('T', 'M'),
+         ('H', 'D'), ('H', 'A'),
+         ('D', 'B'), ('D', 'M'), ('D', 'A'),
+         ('B', 'M'), ('M', 'Q'), ('M', 'A'),
+         ('M', 'D'), ('A', 'M')]
+
+periods_per_year = {'A': 1, 'Q': 4, 'M': 12, 'B': 261, 'D': 365,
+                    'H': 365 * 24, 'T': 365 * 24 * 60}
+
+
+def main(nyears=10):
+    print "%-8s %-10s %12s %10s %16s" % ('pair', 'dtype', 'size', 'time (s)',
+                                         'elements/sec')
+    for (ifreq, ofreq) in pairs:
+        size = nyears * periods_per_year[ifreq]
+        start = ts.Date(ifreq, '2000-01-01')
+        for dtype in (np.float64, np.float32, np.int64, np.int32, np.bool_):
+            data = ma.array(np.arange(size).astype(dtype),
+                            mask=(np.arange(size) % 7 == 0))
+            series = ts.time_series(data, start_date=start)
+            func = lambda: series.convert(ofreq)
+            elapsed = best_of(func)
+            print "%-8s %-10s %12i %10.4f %16.0f" % \
+                  ("%s->%s" % (ifreq, ofreq), np.dtype(dtype).name, size,
+                   elapsed, size / elapsed)
+
+
+aggregations = ['sum', 'mean', 'min', 'max', 'first', 'last', 'count', 'std',
+                'median']
+
+
+def main_aggregation(nyears=10):
+    print
+    print "%-8s %-8s %12s %12s %8s" % ('pair', 'func', 'by name (s)',
+                                       'python (s)', 'speedup')
+    for (ifreq, ofreq) in [('T', 'D'), ('H', 'A'), ('D', 'M')]:
+        size = nyears * periods_per_year[ifreq]
+        data = ma.array(np.random.rand(size),
+                        mask=(np.arange(size) % 7 == 0))
+        series = ts.time_series(data, start_date=ts.Date(ifreq, '2000-01-01'))
+        for name in aggregations:
+            pyfunc = ts.tseries._convert_funcs[name]
+            named = best_of(lambda: series.convert(ofreq, func=name))
+            python = best_of(lambda: series.convert(ofreq, func=pyfunc))
+            print "%-8s %-8s %12.4f %12.4f %8.1f" % \
+                  ("%s->%s" % (ifreq, ofreq), name, named, python,
+                   python / named)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        nyears = int(sys.argv[1])
+    else:
+        nyears = 10
+    main(nyears)
+    main_aggregation(nyears)
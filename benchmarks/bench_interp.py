@@ -0,0 +1,64 @@
+"""
+Benchmark of :func:`~scikits.timeseries.lib.interpolate.interp_masked1d`.
+
+Reports the time taken to interpolate a float64 series of 10M points where
+1% of the values are masked, in short gaps of 1 to 9 values:
+
+* with the 'linear' interpolation, on the 1D series and on the same values
+  laid out as a 2D block of 100 columns;
+* with the 'cubic' interpolation, fitting local splines around each gap and
+  a single spline on the whole series.
+
+Usage: python bench_interp.py [size]
+"""
+import sys
+import time
+
+import numpy as np
+import numpy.ma as ma
+
+from scikits.timeseries.lib.interpolate import interp_masked1d
+
+
+def best_of(func, repeat=3):
+    "Returns the best time of `repeat` calls to `func`."
+    best = np.inf
+    for i in range(repeat):
+        start = time.time()
+        func()
+        best = min(best, time.time() - start)
+    return best
+
+
+def gapped_series(size, fraction=0.01, maxlength=9):
+    "Returns a random walk of `size` points with gaps of 1 to `maxlength`."
+    mask = np.zeros(size, bool)
+    lengths = np.random.randint(1, maxlength + 1,
+                                int(size * fraction * 2 / (maxlength + 1)))
+    starts = np.random.randint(1, size - maxlength - 1, lengths.size)
+    for length in range(1, maxlength + 1):
+        selected = starts[lengths == length]
+        for i in range(length):
+            mask[selected + i] = True
+    return ma.array(np.random.randn(size).cumsum(), mask=mask)
+
+
+def main(size=10000000):
+    series = gapped_series(size)
+    print "%i points, %.2f%% masked" % (size, series.mask.mean() * 100)
+    print "%-28s %10s" % ('interpolation', 'seconds')
+    cases = [('linear', lambda: interp_masked1d(series, 'linear')),
+             ('linear (2D, 100 columns)',
+              lambda: interp_masked1d(series.reshape(-1, 100), 'linear')),
+             ('cubic (neighbors=4)',
+              lambda: interp_masked1d(series, 'cubic', neighbors=4)),
+             ('cubic (global)', lambda: interp_masked1d(series, 'cubic'))]
+    for (name, func) in cases:
+        print "%-28s %10.4f" % (name, best_of(func, repeat=1))
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,59 @@
+"""
+Benchmark of the moving sum functions of :mod:`scikits.timeseries.lib`.
+
+Reports the time taken by :func:`~scikits.timeseries.lib.mov_sum` (plain and
+compensated), :func:`~scikits.timeseries.lib.mov_average` and
+:func:`~scikits.timeseries.lib.mov_std` on float64 series of increasing
+sizes, with and without masked values, along with the time spent in the
+C kernel alone.
+
+Usage: python bench_mov_sum.py [span]
+"""
+import sys
+import time
+
+import numpy as np
+import numpy.ma as ma
+
+from scikits.timeseries.cseries import MA_mov_sum
+import scikits.timeseries.lib.moving_funcs as mf
+
+
+def best_of(func, repeat=3):
+    "Returns the best time of `repeat` calls to `func`."
+    best = np.inf
+    for i in range(repeat):
+        start = time.time()
+        func()
+        best = min(best, time.time() - start)
+    return best
+
+
+sizes = [10000, 100000, 1000000, 10000000]
+
+
+def main(span=20):
+    print "%-22s %8s %12s %10s %12s" % ('function', 'masked', 'size',
+                                        'seconds', 'ns/point')
+    for size in sizes:
+        data = np.random.randn(size).cumsum()
+        masked = ma.array(data, mask=(np.random.rand(size) < 0.01))
+        for (label, series) in (('no', ma.array(data)), ('1%', masked)):
+            cases = [('kernel', lambda: MA_mov_sum(series, span, 0)),
+                     ('mov_sum', lambda: mf.mov_sum(series, span)),
+                     ('mov_sum(compensated)',
+                      lambda: mf.mov_sum(series, span, compensated=True)),
+                     ('mov_average', lambda: mf.mov_average(series, span)),
+                     ('mov_std', lambda: mf.mov_std(series, span))]
+            for (name, func) in cases:
+                elapsed = best_of(func)
+                print "%-22s %8s %12i %10.4f %12.2f" % (name, label, size,
+                                                         elapsed,
+                                                         elapsed / size * 1e9)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
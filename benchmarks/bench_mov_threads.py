@@ -0,0 +1,66 @@
+"""
+Scaling benchmark of the moving functions of :mod:`scikits.timeseries.lib`
+over several threads.
+
+Reports the time taken by :func:`~scikits.timeseries.lib.mov_sum`,
+:func:`~scikits.timeseries.lib.mov_median`,
+:func:`~scikits.timeseries.lib.mov_max`,
+:func:`~scikits.timeseries.lib.mov_std` and
+:func:`~scikits.timeseries.lib.mov_average_expw` on a float64 2D series
+processed along its first axis with 1, 2, 4 and 8 threads, along with the
+speedup over the serial computation.
+The results are checked to be identical to the serial ones.
+
+Usage: python bench_mov_threads.py [span]
+"""
+import sys
+import time
+
+import numpy as np
+import numpy.ma as ma
+
+import scikits.timeseries.lib.moving_funcs as mf
+
+
+def best_of(func, repeat=3):
+    "Returns the best time of `repeat` calls to `func`."
+    best = np.inf
+    for i in range(repeat):
+        start = time.time()
+        func()
+        best = min(best, time.time() - start)
+    return best
+
+
+shape = (100000, 64)
+threads = [1, 2, 4, 8]
+
+
+def main(span=50):
+    data = ma.array(np.random.randn(*shape).cumsum(axis=0),
+                    mask=(np.random.rand(*shape) < 0.01))
+    funcs = [('mov_sum', mf.mov_sum),
+             ('mov_median', mf.mov_median),
+             ('mov_max', mf.mov_max),
+             ('mov_std', mf.mov_std),
+             ('mov_average_expw', mf.mov_average_expw)]
+    print "%-18s %8s %10s %8s" % ('function', 'nthreads', 'seconds',
+                                  'speedup')
+    for (name, mfunc) in funcs:
+        serial = mfunc(data, span)
+        for nthreads in threads:
+            result = mfunc(data, span, nthreads=nthreads)
+            assert (result.filled(0) == serial.filled(0)).all()
+            assert (ma.getmaskarray(result) == ma.getmaskarray(serial)).all()
+            elapsed = best_of(lambda: mfunc(data, span, nthreads=nthreads))
+            if nthreads == 1:
+                reference = elapsed
+            print "%-18s %8i %10.4f %8.2f" % (name, nthreads, elapsed,
+                                              reference / elapsed)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
@@ -0,0 +1,56 @@
+"""
+Benchmark of the slicing of a :class:`~scikits.timeseries.TimeSeries` with
+dates, as in ``series['2009-01-01':'2009-02-01']``.
+
+Reports the time per slice for series of increasing sizes, with the bounds
+given as strings or as :class:`~scikits.timeseries.Date` objects, for
+chronological and unsorted series.
+
+Usage: python bench_slice.py [nb of slices]
+"""
+import sys
+import time
+
+import numpy as np
+
+import scikits.timeseries as ts
+
+
+def best_of(func, repeat=3):
+    "Returns the best time of `repeat` calls to `func`."
+    best = np.inf
+    for i in range(repeat):
+        start = time.time()
+        func()
+        best = min(best, time.time() - start)
+    return best
+
+
+sizes = [10000, 100000, 1000000, 10000000]
+
+
+def main(nbslices=1000):
+    print "%-10s %10s %12s %14s" % ('order', 'bounds', 'size', 'us/slice')
+    for size in sizes:
+        dates = ts.date_array(start_date=ts.Date('T', '2009-01-01 00:00'),
+                              length=size)
+        series = ts.time_series(np.arange(size, dtype=float), dates=dates)
+        unsorted = series[::-1]
+        (start, end) = (dates[size // 3], dates[size // 2])
+        cases = [('chrono', 'string', series, '2009-01-01', '2009-02-01'),
+                 ('chrono', 'Date', series, start, end),
+                 ('unsorted', 'Date', unsorted, start, end)]
+        for (order, kind, ser, lower, upper) in cases:
+            def func():
+                for i in xrange(nbslices):
+                    ser[lower:upper]
+            elapsed = best_of(func)
+            print "%-10s %10s %12i %14.2f" % (order, kind, size,
+                                              elapsed / nbslices * 1e6)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1:
+        main(int(sys.argv[1]))
+    else:
+        main()
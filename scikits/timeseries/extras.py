@@ -15,7 +15,7 @@ import numpy.ma as ma
 from numpy.ma import masked
 
 import const as _c
-from tdates import Date, date_array, DateArray
+from tdates import Date, date_array, DateArray, _datetime_parser
 from tseries import TimeSeries, time_series
 from cseries import DateCalc_Error
 
@@ -417,11 +417,13 @@ def tsfromtxt(fname, dtype=None, freq='U', comments='#', delimiter=None,
     # Update the date converter ...........................
     converters = converters or {}
     dateconv = dateconverter or None
-    if dateconv is None:
-        dateconv = lambda s: Date(freq, string=s)
     if 'dates' in converters:
         dateconv = converters['dates']
         del(converters['dates'])
+    default_dateconv = (dateconv is None)
+    if default_dateconv:
+        dateparser = _datetime_parser(freq)
+        dateconv = lambda s: Date(freq, datetime=dateparser(s))
 
     # Make sure `datecols` is a sequence ..................
     if datecols is not None:
@@ -536,8 +538,12 @@ def tsfromtxt(fname, dtype=None, freq='U', comments='#', delimiter=None,
     # Convert the date columns to a date_array
     if len(_dates) == 1:
         _dates = np.array(_dates[0], copy=False, ndmin=1)
-        dates = date_array([dateconv(args) for args in _dates],
-                           freq=freq, autosort=False)
+        if default_dateconv:
+            # Parse the strings all at once
+            dates = date_array(_dates.astype(str), freq=freq, autosort=False)
+        else:
+            dates = date_array([dateconv(args) for args in _dates],
+                               freq=freq, autosort=False)
     else:
         dates = date_array([dateconv(*args) for args in zip(*_dates)],
                            freq=freq, autosort=False)
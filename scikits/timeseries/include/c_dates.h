@@ -108,6 +108,8 @@ long (*get_asfreq_func(int, int, int))(long, char, asfreq_info*);
 
 PyObject *DateArray_asfreq(PyObject *, PyObject *);
 PyObject *DateArray_getDateInfo(PyObject *, PyObject *);
+PyObject *DateArray_getDateFields(PyObject *, PyObject *);
+PyObject *DateArray_fromDatetimes(PyObject *, PyObject *);
 
 
 PyObject *c_dates_now(PyObject *, PyObject *);
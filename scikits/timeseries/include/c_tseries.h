@@ -7,8 +7,12 @@ PyObject *TimeSeries_convert(PyObject *, PyObject *);
 
 PyObject *MaskedArray_mov_sum(PyObject *, PyObject *, PyObject *);
 PyObject *MaskedArray_mov_median(PyObject *, PyObject *, PyObject *);
+PyObject *MaskedArray_mov_quantile(PyObject *, PyObject *, PyObject *);
+PyObject *MaskedArray_mov_rank(PyObject *, PyObject *, PyObject *);
 PyObject *MaskedArray_mov_min(PyObject *, PyObject *, PyObject *);
 PyObject *MaskedArray_mov_max(PyObject *, PyObject *, PyObject *);
+PyObject *MaskedArray_mov_minmax(PyObject *, PyObject *, PyObject *);
+PyObject *MaskedArray_mov_moments(PyObject *, PyObject *, PyObject *);
 PyObject *MaskedArray_mov_average_expw(PyObject *, PyObject *, PyObject *);
 
 void import_c_tseries(PyObject *);
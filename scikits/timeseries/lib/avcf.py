@@ -13,7 +13,7 @@ __date__     = '$Date: 2008-06-19 03:42:59 +0200 (Thu, 19 Jun 2008) $'
 __all__ = ['acf','acf_std','avf',
            'ccf','cvf',
            'lags',
-           'pacf']
+           'levinson_durbin', 'pacf']
 
 import numpy as np
 from numpy import ndarray
@@ -28,8 +28,6 @@ from numpy.ma import masked_array, masked, dot
 import scikits.timeseries as ts
 from scikits.timeseries import TimeSeries, TimeSeriesCompatibilityError
 
-from scipy.linalg import solve, toeplitz
-
 
 #..............................................................................
 """Note about N.correlate:
@@ -40,7 +38,7 @@ Positive lags:
 N.correlate(y,x)[n//2+j] = N.correlate(x,y)[n//2-j] = gamma[j]
 """
 
-def lags(x, y=None):
+def lags(x, y=None, maxlag=None):
     """Returns the lags at which a cross-correlation is computed.
 
 :Parameters:
@@ -51,8 +49,13 @@ def lags(x, y=None):
     `axis` : integer *[None]*
         Axis along which to compute (0 for rows, 1 for cols).
         If None, the array is flattened first.
+    `maxlag` : integer *[None]*
+        Maximum lag, as given to the correlation functions.
     """
     nx = len(np.asarray(x))
+    if maxlag is not None:
+        maxlag = _maxlag(nx, maxlag)
+        return np.concatenate([np.arange(maxlag+1), np.arange(-maxlag,0)])
     if y is None:
         L = np.concatenate([np.arange(nx), np.arange(-nx+1,0)])
     else:
@@ -62,15 +65,104 @@ def lags(x, y=None):
     return L
 
 
+def _maxlag(n, maxlag):
+    """Returns the maximum lag of the correlations of series of size `n`:
+`maxlag` if it is given and smaller than `n`, `n-1` otherwise."""
+    if (maxlag is None) or (maxlag >= n):
+        return n-1
+    if maxlag < 0:
+        raise ValueError("The maximum lag should be positive (got %i)" % maxlag)
+    return maxlag
+
+
+def _correlate(x, y, maxlag, pairs=None):
+    """Returns the correlation $\sum_{i}{x[i+j] y[i]}$ of the arrays `x` and `y`
+along their first axis, at the lags j=[0,1,...,maxlag,-maxlag,...,-1].
+If `pairs` is given as an array of pairs of indices (i,j), the columns i of the
+2D array `x` are correlated with the columns j of the 2D array `y`.
+
+The correlation is computed by FFT, on series padded with at least `maxlag`
+zeros to avoid any circular overlap, or directly lag by lag when only a few
+lags are needed.
+    """
+    n = len(x)
+    nfft = 1 << int(np.ceil(np.log2(max(n + maxlag, 1))))
+    if (2*maxlag + 1) * n <= 6 * nfft * np.log2(nfft):
+        if pairs is not None:
+            (x, y) = (x[:,pairs[:,0]], y[:,pairs[:,1]])
+        if x.ndim == 1:
+            dot = np.dot
+        else:
+            dot = lambda a, b: np.add.reduce(a*b, axis=0)
+        corr = np.empty((2*maxlag + 1,) + x.shape[1:], dtype=float)
+        corr[0] = dot(x, y)
+        for k in range(1, maxlag+1):
+            corr[k] = dot(x[k:], y[:-k])
+            corr[-k] = dot(x[:-k], y[k:])
+        return corr
+    # Each series is transformed only once, even if it appears in several pairs
+    fx = rfft(x, nfft, axis=0)
+    if y is x:
+        fy = fx
+    else:
+        fy = rfft(y, nfft, axis=0)
+    if pairs is not None:
+        corr = irfft(fx[:,pairs[:,0]] * fy[:,pairs[:,1]].conjugate(), nfft,
+                     axis=0)
+    elif y is x:
+        corr = irfft(fx.real**2 + fx.imag**2, nfft, axis=0)
+    else:
+        corr = irfft(fx * fy.conjugate(), nfft, axis=0)
+    return np.concatenate([corr[:maxlag+1], corr[nfft-maxlag:]])
+
+
+def _count_pairs(mx, my, maxlag, pairs=None):
+    """Returns the number of pairs of unmasked values of two series at the lags
+[0,1,...,maxlag,-maxlag,...,-1], given their indicators of unmasked values
+`mx` and `my`."""
+    if mx.all() and my.all():
+        shape = mx.shape[1:]
+        if pairs is not None:
+            shape = (len(pairs),)
+        counts = np.empty((2*maxlag + 1,) + shape, dtype=int)
+        counts[:] = len(mx) - _abs_lags(maxlag, len(shape)+1)
+        return counts
+    if my is mx:
+        mx = my = mx.astype(float)
+    else:
+        (mx, my) = (mx.astype(float), my.astype(float))
+    return _correlate(mx, my, maxlag, pairs).round().astype(int)
+
+
+def _anomalies(x, axis):
+    """Returns the anomalies of the masked array `x` along the axis `axis`,
+with the masked values set to 0, and the indicators of the unmasked values,
+both with `axis` moved to the front, along with the positive index of `axis`.
+    """
+    axis = range(x.ndim)[axis]
+    m = np.logical_not(ma.getmaskarray(x)).astype(int)
+    x = x.anom(axis).filled(0).view(ndarray)
+    return (np.rollaxis(x, axis, 0), np.rollaxis(m, axis, 0), axis)
+
+
+def _abs_lags(maxlag, ndim):
+    """Returns the absolute lags [0,1,...,maxlag,maxlag,...,1], shaped to be
+broadcast along the first axis of an array with `ndim` dimensions."""
+    L = np.concatenate([np.arange(maxlag+1), np.arange(maxlag,0,-1)])
+    return L.reshape((-1,) + (1,) * (ndim-1))
+
 #...............................................................................
 
-def cvf(x,y,periodogram=True):
+def cvf(x,y,periodogram=True,maxlag=None,axis=0,pairs=None):
     """Computes the cross-covariance function of two series x and y.
 The computations are performed on anomalies (deviations from average).
 Gaps in the series are filled first, anomalies are then computed and missing
 values filled with 0.
 If x and y are valid TimeSeries object, they are aligned so that their starting
 and ending point match.
+N-D inputs are processed along the axis `axis`: all the cross-covariances are
+then computed at once, either between the corresponding 1D slices of x and y,
+or between the columns given in `pairs`.
 
     The crosscovariance at lag k, $\hat{R_{x,y}}(k)$, of 2 series {x_1,...,x_n}
 and {y_1,...,y_n} with mean 0 is defined as:
@@ -92,53 +184,70 @@ Parameters
         If y is shorter than x, x is truncated.
     periodogram : {True, False} optional
         Whether to return a periodogram or a standard estimate of the autocovariance.
+    maxlag : {None, int} optional
+        Maximum lag of the cross-covariance.
+        If None, the cross-covariance is computed at all the n-1 lags.
+    axis : {0, int} optional
+        Axis along which the cross-covariance is computed.
+    pairs : {None, sequence} optional
+        Sequence of pairs of indices (i,j) of the columns of the 2D arrays x
+        and y whose cross-covariance is computed.
+        If None, each 1D slice of x is paired with the same slice of y.
 
 Returns
 -------
     cvf : ma.array
-        Cross-covariance at lags [0,1,...,n,n-1,...,-1]
+        Cross-covariance at lags [0,1,...,n,n-1,...,-1], or
+        [0,1,...,maxlag,-maxlag,...,-1] if `maxlag` is given, along `axis`.
+        With `pairs`, the other axis corresponds to the pairs.
 
     """
     #
+    same = (y is x)
     x = ma.array(x, copy=False, subok=True, dtype=float)
     y = ma.array(y, copy=False, subok=True, dtype=float)
-    if (x.ndim > 1) or (y.ndim > 1):
-        raise ValueError("Input arrays should be 1D! (got %iD-%iD)" % \
-                         (x.ndim, y.ndim))
+    if pairs is not None:
+        if (x.ndim != 2) or (y.ndim != 2):
+            raise ValueError("Input arrays should be 2D with pairs! "\
+                             "(got %iD-%iD)" % (x.ndim, y.ndim))
+        pairs = np.array(pairs, dtype=int).reshape(-1,2)
     # Make sure the series have the same size .............
     if isinstance(x, TimeSeries):
         if not isinstance(y, TimeSeries):
             raise TypeError("The second input is NOT a valid TimeSeries")
-        (x,y) = ts.align_series(x,y)
+        if not same:
+            (x,y) = ts.align_series(x,y)
     elif isinstance(y, TimeSeries) and not isinstance(x, TimeSeries):
         raise TypeError("The first input is NOT a valid TimeSeries")
     else:
-        if len(y) > len(x):
-            y = y[:len(x)]
-        else:
-            x = x[:len(y)]
-    # Get the masks .......................................
-    mx = np.logical_not(ma.getmaskarray(x)).astype(int)
-    my = np.logical_not(ma.getmaskarray(y)).astype(int)
-    # Get the anomalies ...................................
-    x = x.anom().filled(0).view(ndarray)
-    y = y.anom().filled(0).view(ndarray)
-    n = len(x)
-    cvf_ = np.correlate(x, y, 'full')
-    dnm_ = np.correlate(mx, my, 'full')
+        n = min(x.shape[axis], y.shape[axis])
+        (x, y) = (x[(slice(None),)*range(x.ndim)[axis] + (slice(0,n),)],
+                  y[(slice(None),)*range(y.ndim)[axis] + (slice(0,n),)])
+    # Get the anomalies and the masks .....................
+    (x, mx, axis) = _anomalies(x, axis)
+    if same:
+        (y, my) = (x, mx)
+    else:
+        (y, my, axis) = _anomalies(y, axis)
+    maxlag = _maxlag(len(x), maxlag)
+    cvf_ = _correlate(x, y, maxlag, pairs)
+    dnm_ = _count_pairs(mx, my, maxlag, pairs)
     if periodogram:
-        dnm_ += np.concatenate([np.arange(n-1,0,-1), np.arange(n)])
+        dnm_ += _abs_lags(maxlag, dnm_.ndim)
     cvf_ /= dnm_
-    return ma.fix_invalid(np.concatenate([cvf_[n-1:],cvf_[:n-1]]))
+    return ma.fix_invalid(np.rollaxis(cvf_, 0, axis+1))
 
 
-def ccf(x, y, periodogram=True):
+def ccf(x, y, periodogram=True, maxlag=None, axis=0, pairs=None):
     """Computes the auto-correlation of the series x and y at different lags.
 The computations are performed on anomalies (deviations from average).
 Gaps in the series are filled first, anomalies are then computed and missing
 values filled with 0.
 If x and y are valid TimeSeries object, they are aligned so that their starting
 and ending point match.
+N-D inputs are processed along the axis `axis`: all the cross-correlations are
+then computed at once, either between the corresponding 1D slices of x and y,
+or between the columns given in `pairs`.
 
 Parameters
 ----------
@@ -150,19 +259,30 @@ Parameters
         If y is shorter than x, x is truncated.
     periodogram : {True, False} optional
         Whether to return a periodogram or a standard estimate of the autocovariance.
+    maxlag : {None, int} optional
+        Maximum lag of the cross-correlation.
+        If None, the cross-correlation is computed at all the n-1 lags.
+    axis : {0, int} optional
+        Axis along which the cross-correlation is computed.
+    pairs : {None, sequence} optional
+        Sequence of pairs of indices (i,j) of the columns of the 2D arrays x
+        and y whose cross-correlation is computed.
+        If None, each 1D slice of x is paired with the same slice of y.
 
 Returns
 -------
     cvf : ma.array
-        Cross-correlation at lags [0,1,...,n,n-1,...,-1]
+        Cross-correlation at lags [0,1,...,n,n-1,...,-1], or
+        [0,1,...,maxlag,-maxlag,...,-1] if `maxlag` is given, along `axis`.
+        With `pairs`, the other axis corresponds to the pairs.
     """
-    ccf_ = cvf(x,y,periodogram)
-    return ma.fix_invalid(ccf_/ccf_[0])
+    ccf_ = cvf(x,y,periodogram,maxlag,axis,pairs)
+    return ma.fix_invalid(ccf_/ccf_.take([0], axis))
 
 
 #..............................................................................
 
-def avf(x, periodogram=True):
+def avf(x, periodogram=True, maxlag=None, axis=0):
     """Computes the auto-covariance function of the series `x`.
 The computations are performed on anomalies (deviations from average).
 Gaps in the series are filled first, anomalies are then computed and missing
@@ -174,6 +294,8 @@ where $y_k = x_k$ if $x_k$ is not masked and $y_k = 0$ if $x_k$ is masked, and
 where $a_k = 1$ if $x_k$ is not masked and $a_k = 0$ of $x_k$ is masked.
 If the optional parameter `periodogram` is True, the denominator of the previous
 expression is $\sum_{t=1}^{n-k}{a_t a_{t+k}} + k$.
+N-D inputs are processed along the axis `axis`, the autocovariances of all the
+1D slices being computed at once.
 
 Parameters
 ----------
@@ -181,38 +303,42 @@ Parameters
         Input data. If x is a TimeSeries object, it is filled first.
     mode : {True, False} optional
         Whether to return a periodogram or a standard estimate of the autocovariance.
+    maxlag : {None, int} optional
+        Maximum lag of the autocovariance.
+        If None, the autocovariance is computed at all the n-1 lags.
+    axis : {0, int} optional
+        Axis along which the autocovariance is computed.
 
 Returns
 -------
     avf : ma.array
-        Autocovariance at lags [0,1,...,n,n-1,...,-1]
+        Autocovariance at lags [0,1,...,n,n-1,...,-1], or
+        [0,1,...,maxlag,-maxlag,...,-1] if `maxlag` is given, along `axis`.
 
     """
     x = ma.array(x, copy=False, subok=True, dtype=float)
-    if x.ndim > 1:
-        raise ValueError("The input array should be 1D only.")
     # make sure there's no gap in the data
     if isinstance(x, TimeSeries) and x.has_missing_dates():
         x = ts.fill_missing_dates(x)
     #
-    m = np.logical_not(ma.getmaskarray(x)).astype(int)
-    x = x.anom().filled(0).view(ndarray)
-    n = len(x)
+    (x, m, axis) = _anomalies(x, axis)
+    maxlag = _maxlag(len(x), maxlag)
     #
-    _avf = np.correlate(x,x,'full')
-    denom = np.correlate(m,m,'full')
+    _avf = _correlate(x, x, maxlag)
+    denom = _count_pairs(m, m, maxlag)
     if periodogram:
-        denom += np.concatenate([np.arange(n-1,0,-1), np.arange(n)])
+        denom += _abs_lags(maxlag, denom.ndim)
     _avf /= denom
-    _avf = np.concatenate([_avf[n-1:],_avf[:n-1]])
-    return ma.fix_invalid(_avf)
+    return ma.fix_invalid(np.rollaxis(_avf, 0, axis+1))
 
 
-def acf(x, periodogram=True):
+def acf(x, periodogram=True, maxlag=None, axis=0):
     """Computes the auto-correlation of the series `x` at different lags.
 The computations are performed on anomalies (deviations from average).
 Gaps in the series are filled first, anomalies are then computed and missing
 values filled with 0.
+N-D inputs are processed along the axis `axis`, the autocorrelations of all the
+1D slices being computed at once.
 
 
 Parameters
@@ -221,18 +347,24 @@ Parameters
         Input data. If x is a TimeSeries object, it is filled first.
     mode : {True, False} optional
         Whether to return a periodogram or a standard estimate of the autocorrelation.
+    maxlag : {None, int} optional
+        Maximum lag of the autocorrelation.
+        If None, the autocorrelation is computed at all the n-1 lags.
+    axis : {0, int} optional
+        Axis along which the autocorrelation is computed.
 
 Returns
 -------
     acf : ma.array
-        Autocorrelation at lags [0,1,...,n,n-1,...,-1]
+        Autocorrelation at lags [0,1,...,n,n-1,...,-1], or
+        [0,1,...,maxlag,-maxlag,...,-1] if `maxlag` is given, along `axis`.
 
     """
-    avf_ = avf(x,periodogram)
-    return avf_/avf_[0]
+    avf_ = avf(x,periodogram,maxlag,axis)
+    return avf_/avf_.take([0], axis)
 
 
-def _acf(x, mode):
+def _acf(x, mode, maxlag=None):
     """Computes the auto-correlation function of the time series x.
 Note that the computations are performed on anomalies (deviations from average).
 Gaps in the series are filled first, the anomalies are then computed and the missing
@@ -241,6 +373,8 @@ values filled with 0.
 :Parameters:
     `x` : TimeSeries
         Time series.
+    `maxlag` : integer *[None]*
+        Maximum lag.
     """
     x = ma.array(x, copy=False, subok=True, dtype=float)
     if x.ndim > 1:
@@ -252,26 +386,28 @@ values filled with 0.
     m = np.logical_not(ma.getmaskarray(x)).astype(int)
     x = x.anom().filled(0).view(ndarray)
     xx = (x*x)
-    n = len(x)
+    maxlag = _maxlag(len(x), maxlag)
     #
-    _avf = np.correlate(x,x,'full')[n-1:]
+    # Sums of x[k:]*x[:-k], m[k:]*xx[:-k] and m[:-k]*xx[k:] at the lags k
+    # (exactly 0 at the lags without any pair of unmasked values)
+    nopairs = (_count_pairs(m, m, maxlag)[1:maxlag+1] == 0)
+    _avf = _correlate(x, x, maxlag)[1:maxlag+1]
+    mxx = _correlate(m, xx, maxlag)[1:maxlag+1]
+    _avf[nopairs] = mxx[nopairs] = 0
     if mode:
-        dnm_ = np.fromiter((np.sum(x[k:]*x[:-k])/np.sum(m[k:]*xx[:-k])
-                            for k in range(1,n)),
-                            dtype=float)
+        dnm_ = _avf / mxx
     else:
-        dnm_ = np.fromiter((np.sum(x[k:]*x[:-k])/\
-                            np.sqrt((m[k:]*xx[:-k]).sum() * (m[:-k]*xx[k:]).sum())
-                            for k in range(1,n)),
-                           dtype=float)
-    poslags = _avf[1:]/dnm_
+        xxm = _correlate(xx, m, maxlag)[1:maxlag+1]
+        xxm[nopairs] = 0
+        dnm_ = _avf / np.sqrt(mxx * xxm)
+    poslags = _avf/dnm_
     return ma.fix_invalid(np.concatenate([np.array([1.]),
                                           poslags,
                                           poslags[::-1]]))
 
 ##..............................................................................
 def acf_std(x, maxlag=None, periodogram=True,
-            confidence=0.6826895, simplified=True, acf_cached=None):
+            confidence=0.6826895, simplified=True, acf_cached=None, axis=0):
     """Computes the approximate standard deviation of the autocorrelation
 coefficients.
 
@@ -289,7 +425,11 @@ Parameters
     simplified : {True, False} optional
         Whether to use a simplified or more complex approximation.
     acf_cached : {ndarray} optional
-        Pre-computed acf coefficients.
+        Pre-computed acf coefficients, as returned by :func:`acf` with the same
+        `axis` (possibly up to a maximum lag).
+        If None, the coefficients of all the 1D slices of x are computed at once.
+    axis : {0, int} optional
+        Axis along which the standard deviations are computed.
 
 Notes
 -----
@@ -315,37 +455,85 @@ References
     Hippel & McLeod 1994: Time series modeling.
     """
     if acf_cached is None:
-        acfx = acf(x,periodogram)
+        acfx = acf(x,periodogram,axis=axis)
     else:
         acfx = acf_cached
-    n = x.size
-    r_i = acfx[:n]
+    axis = range(np.ndim(x))[axis]
+    n = np.shape(x)[axis]
+    # Only keep the positive lags (up to n-1) of the coefficients, along axis 0
+    acfx = np.rollaxis(acfx, axis, 0)
+    nlags = min(n, (len(acfx)+1)//2)
+    r_i = acfx[:nlags]
     rr_i =  (r_i)**2
     # Artifically set the ACF coefficients to 0 beyond lag maxlag
     if maxlag > 0:
         rr_i[maxlag:] = 0
     # Compute the variance of the ACF coeffs
     if simplified:
-        var_i = 1 + 2*rr_i.cumsum()
+        var_i = 1 + 2*rr_i.cumsum(axis=0)
     else:
-        var_i = (1 + 2 * rr_i) * rr_i.sum()
-        cov_ = np.correlate(r_i,r_i,'full')[n-1:]
-        var_i[:n//2] = cov_[::2]
+        var_i = (1 + 2 * rr_i) * rr_i.sum(axis=0)
+        r_data = ma.getdata(r_i)
+        cov_ = _correlate(r_data, r_data, nlags-1)[:nlags]
+        var_i[:(nlags+1)//2] = cov_[::2]
         var_i -= (4*r_i*cov_)
     var_i /= float(n)
     var_i[0] = 0
     #....
     std_i =  np.sqrt(var_i)
-    std_i = np.concatenate([std_i, std_i[n-1:0:-1]])
+    std_i = np.concatenate([std_i, std_i[nlags-1:0:-1]])
     #....
     if confidence < 0.5:
         confidence = 1.-confidence
     thresh = norm.isf((1.-confidence)/2.)
     std_i *= thresh
-    return std_i
+    return np.rollaxis(std_i, 0, axis+1)
 
 ##..............................................................................
-def pacf(x, periodogram=True, lagmax=None):
+def levinson_durbin(r, order=None):
+    """Solves the Yule-Walker equations of the autoregressive models of orders
+1 to `order` by the Levinson-Durbin recursion, in O(order^2) operations.
+
+Parameters
+----------
+    r : sequence
+        Autocovariances (or autocorrelations) at lags [0,1,...,order], as a
+        1D sequence.
+        Only the first `order`+1 values are used.
+    order : {None, int} optional
+        Maximum order of the models.
+        If None, the order is set to len(r)-1.
+
+Returns
+-------
+    pacf : ndarray
+        Partial autocorrelations at lags [0,1,...,order], the first being 0.
+    arcoefs : ndarray
+        Square array of size `order`+1, whose k-th row holds the coefficients
+        of the autoregressive model of order k in its columns 1 to k.
+    sigma2 : ndarray
+        Variances of the innovations of the models of orders 0 to `order`,
+        in the units of `r`.
+    """
+    r = np.array(ma.getdata(r), copy=False, dtype=float)
+    if r.ndim > 1:
+        raise ValueError("The autocovariances should be 1D")
+    r = r.ravel()
+    if order is None:
+        order = len(r) - 1
+    n = order + 1
+    arcoefs = np.zeros((n,n), float)
+    sigma2 = np.zeros(n, float)
+    sigma2[0] = r[0]
+    for k in range(1,n):
+        phi = (r[k] - np.dot(arcoefs[k-1,1:k], r[k-1:0:-1])) / sigma2[k-1]
+        arcoefs[k,1:k] = arcoefs[k-1,1:k] - phi * arcoefs[k-1,k-1:0:-1]
+        arcoefs[k,k] = phi
+        sigma2[k] = sigma2[k-1] * (1. - phi*phi)
+    return (arcoefs.diagonal().copy(), arcoefs, sigma2)
+
+
+def pacf(x, periodogram=True, lagmax=None, full_output=False):
     """Computes the partial autocorrelation function of series `x` along
     the given axis.
 
@@ -357,17 +545,20 @@ def pacf(x, periodogram=True, lagmax=None):
     lagmax : {None, int} optional
         Maximum lag. If None, the maximum lag is set to n/4+1, with n the series
         length.
+    full_output : {False, True} optional
+        Whether to return the coefficients of the autoregressive models and the
+        variances of their innovations along with the partial autocorrelations,
+        as :func:`levinson_durbin`.
     """
-    acfx = acf(x, periodogram)[:,None]
-    #
+    if np.ndim(x) > 1:
+        raise ValueError("pacf accepts only 1D series")
     if lagmax is None:
         n = len(x) // 4 + 1
     else:
         n = min(lagmax, len(x))
-    #
-    arkf = np.zeros((n,n),float)
-    arkf[1,1] = acfx[1,0]
-    for k in range(2,n):
-        res = solve(toeplitz(acfx[:k]), acfx[1:k+1]).squeeze()
-        arkf[k,1:k+1] = res
-    return arkf.diagonal()
+    # Only the autocovariances at lags [0,...,n-1] are needed
+    avfx = avf(x, periodogram, maxlag=n-1)[:n]
+    (pacf_, arcoefs, sigma2) = levinson_durbin(avfx)
+    if full_output:
+        return (pacf_, arcoefs, sigma2)
+    return pacf_
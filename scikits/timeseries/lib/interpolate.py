@@ -10,8 +10,7 @@ __date__     = '$Date: 2009-02-08 23:15:15 +0100 (Sun, 08 Feb 2009) $'
 
 import numpy as np
 import numpy.ma as ma
-from numpy.ma import masked, nomask, getmask, getdata
-from numpy.ma.extras import flatnotmasked_edges
+from numpy.ma import masked, nomask, getmask, getmaskarray, getdata
 
 marray = ma.array
 
@@ -21,9 +20,57 @@ __all__ = ['forward_fill', 'backward_fill', 'interp_masked1d',
 #####---------------------------------------------------------------------------
 #---- --- Functions for filling in masked values in a masked array ---
 #####---------------------------------------------------------------------------
-def forward_fill(marr, maxgap=None):
+def _fill(marr, maxgap, axis, backward):
     """
-    Forward fills masked values in a 1-d array when there are less ``maxgap``
+    Fills the masked values of `marr` along the axis `axis` with the last
+    (or, if `backward` is True, the next) unmasked value.
+
+    The index of the last unmasked value before each position is propagated
+    with ``maximum.accumulate``.
+    When ``maxgap`` is given, the length of each run of masked values is found
+    from the index of the next unmasked value: the runs longer than ``maxgap``
+    stay masked, even if their first ``maxgap`` values are overwritten.
+    """
+    a = ma.array(marr, copy=True)
+    if getmask(a) is nomask or a.size == 0 or a.ndim == 0:
+        return a
+    (adata, amask) = (np.rollaxis(getdata(a), axis, 0),
+                      np.rollaxis(a._mask, axis, 0))
+    if backward:
+        (adata, amask) = (adata[::-1], amask[::-1])
+    n = len(adata)
+    (data, mask) = (adata.reshape(n, -1), amask.reshape(n, -1))
+    idx = np.arange(n)[:, None]
+    # Index of the last unmasked value up to each position (-1 if none)
+    last = np.empty(mask.shape, int)
+    last[:] = idx
+    np.putmask(last, mask, -1)
+    np.maximum.accumulate(last, axis=0, out=last)
+    tofill = mask & (last >= 0)
+    if maxgap is None:
+        unmask = tofill
+    else:
+        # Index of the next unmasked value from each position (n if none)
+        following = np.empty(mask.shape, int)
+        following[:] = idx
+        np.putmask(following, mask, n)
+        following = following[::-1]
+        np.minimum.accumulate(following, axis=0, out=following)
+        gap = following[::-1] - last - 1
+        tofill &= (idx - last <= maxgap)
+        unmask = tofill & (gap <= maxgap)
+    width = data.shape[1]
+    filled = data.take(np.maximum(last, 0) * width + np.arange(width))
+    np.putmask(data, tofill, filled)
+    np.putmask(mask, unmask, False)
+    adata[:] = data.reshape(adata.shape)
+    amask[:] = mask.reshape(amask.shape)
+    return a
+
+
+def forward_fill(marr, maxgap=None, axis=0):
+    """
+    Forward fills masked values in an array when there are less ``maxgap``
     consecutive masked values.
 
     Parameters
@@ -33,6 +80,9 @@ def forward_fill(marr, maxgap=None):
     maxgap : {int}, optional
         Maximum gap between consecutive masked values.
         If ``maxgap`` is not specified, all masked values are forward-filled.
+    axis : {0, int}, optional
+        Axis along which the values are filled.
+        With the default, each column of a 2D array is filled independently.
 
 
     Examples
@@ -45,42 +95,12 @@ def forward_fill(marr, maxgap=None):
     [0 0 0 0 0 5 5 5 5 5 10 10 10 10 10 15 15 15 15 15]
 
     """
-    # !!!: We should probably port that to C.
-    # Initialization ..................
-    if np.ndim(marr) > 1:
-        raise ValueError,"The input array should be 1D only!"
-    a = ma.array(marr, copy=True)
-    amask = getmask(a)
-    if amask is nomask or a.size == 0:
-        return a
-    #
-    adata = getdata(a)
-    # Get the indices of the masked values (except a[0])
-    idxtofill = amask[1:].nonzero()[0] + 1
-    currGap = 0
-    if maxgap is not None:
-        previdx = -1
-        for i in idxtofill:
-            if i != previdx + 1:
-                currGap = 0
-            currGap += 1
-            if currGap <= maxgap and not amask[i-1]:
-                adata[i] = adata[i-1]
-                amask[i] = False
-                previdx = i
-            else:
-                amask[i-maxgap:i] = True
-    else:
-        for i in idxtofill:
-            if not amask[i-1]:
-                adata[i] = adata[i-1]
-                amask[i] = False
-    return a
+    return _fill(marr, maxgap, axis, False)
 
 
-def backward_fill(marr, maxgap=None):
+def backward_fill(marr, maxgap=None, axis=0):
     """
-    Backward fills masked values in a 1-d array when there are less than ``maxgap``
+    Backward fills masked values in an array when there are less than ``maxgap``
     consecutive masked values.
 
 
@@ -91,6 +111,9 @@ def backward_fill(marr, maxgap=None):
     maxgap : {int}, optional
         Maximum gap between consecutive masked values.
         If ``maxgap`` is not specified, all masked values are backward-filled.
+    axis : {0, int}, optional
+        Axis along which the values are filled.
+        With the default, each column of a 2D array is filled independently.
 
     Examples
     --------
@@ -103,52 +126,111 @@ def backward_fill(marr, maxgap=None):
 
 
     """
-    return forward_fill(marr[::-1], maxgap=maxgap)[::-1]
+    return _fill(marr, maxgap, axis, True)
 
 
-def interp_masked1d(marr, kind='linear'):
+def _interp_spline(data, mask, indices, k, neighbors):
+    """
+    Interpolates the values of the 1D array `data` at `indices` from its
+    values where `mask` is False, with splines of degree `k` fitted either on
+    all the unmasked values or on the ``2*neighbors`` unmasked values around
+    each run of consecutive indices.
+    """
+    from scipy.interpolate import fitpack
+    unmasked = (~mask).nonzero()[0]
+    values = data[unmasked]
+    if neighbors is None:
+        tck = fitpack.splrep(unmasked, values, k=k)
+        data[indices] = fitpack.splev(indices, tck).astype(data.dtype)
+        return
+    breaks = (np.diff(indices) > 1).nonzero()[0] + 1
+    for run in np.split(indices, breaks):
+        left = unmasked.searchsorted(run[0])
+        lo = max(min(left - neighbors, unmasked.size - 2 * neighbors), 0)
+        hi = lo + 2 * neighbors
+        tck = fitpack.splrep(unmasked[lo:hi], values[lo:hi], k=k)
+        data[run] = fitpack.splev(run, tck).astype(data.dtype)
+
+
+def interp_masked1d(marr, kind='linear', axis=0, neighbors=None):
     """
 
     Interpolates masked values in an array according to the given method.
 
+    Only the masked values between the first and the last unmasked values
+    are interpolated.
+
     Parameters
     ----------
     marr : MaskedArray
         Array to fill
     kind : {'constant', 'linear', 'cubic', quintic'}, optional
         Type of interpolation
+    axis : {0, int}, optional
+        Axis along which the values are interpolated.
+        With the default, each column of a 2D array is interpolated
+        independently.
+    neighbors : {None, int}, optional
+        Number of unmasked values on each side of a run of masked values
+        used to fit the spline interpolating that run, for the 'cubic' and
+        'quintic' interpolations.
+        If None, a single spline is fitted on all the unmasked values.
+        Fitting local splines is much faster on long series with a few
+        short gaps.
+
+    Notes
+    -----
+    The 'linear' interpolation is computed with :func:`numpy.interp` for all
+    the 1D slices at once.
 
     """
-    if np.ndim(marr) > 1:
-        raise ValueError("array must be 1 dimensional!")
-    #
-    marr = marray(marr, copy=True)
-    if getmask(marr) is nomask:
-        return marr
-    #
-    unmaskedIndices = (~marr._mask).nonzero()[0]
-    if unmaskedIndices.size < 2:
-        return marr
-    #
     kind = kind.lower()
-    if kind == 'constant':
-        return forward_fill(marr)
     try:
-        k = {'linear' : 1,
+        k = {'constant' : 0,
+             'linear' : 1,
              'cubic' : 3,
-             'quintic' : 5}[kind.lower()]
+             'quintic' : 5}[kind]
     except KeyError:
         raise ValueError("Unsupported interpolation type.")
-
-    first_unmasked, last_unmasked = flatnotmasked_edges(marr)
-
-    vals = marr.data[unmaskedIndices]
-
-    from scipy.interpolate import fitpack
-    tck = fitpack.splrep(unmaskedIndices, vals, k=k)
-
-    maskedIndices = marr._mask.nonzero()[0]
-    interpIndices = maskedIndices[(maskedIndices > first_unmasked) & \
-                                  (maskedIndices < last_unmasked)]
-    marr[interpIndices] = fitpack.splev(interpIndices, tck).astype(marr.dtype)
+    if (neighbors is not None) and (2 * neighbors <= k):
+        raise ValueError("At least %i neighbors are required for a %s "
+                         "interpolation." % ((k + 2) // 2, kind))
+    #
+    marr = marray(marr, copy=True)
+    if getmask(marr) is nomask or marr.size == 0 or marr.ndim == 0:
+        return marr
+    #
+    (adata, amask) = (np.rollaxis(getdata(marr), axis, 0),
+                      np.rollaxis(marr._mask, axis, 0))
+    n = len(adata)
+    (data, mask) = (adata.reshape(n, -1), amask.reshape(n, -1))
+    # Masked values after the first and before the last unmasked values
+    count = (~mask).cumsum(axis=0)
+    inside = mask & (count > 0) & (count < count[-1])
+    if kind == 'constant':
+        # Keep the slices with less than 2 unmasked values untouched
+        tofill = (count[-1] > 1)
+        filled = forward_fill(marray(data[:, tofill], mask=mask[:, tofill]))
+        data[:, tofill] = filled._data
+        mask[:, tofill] = getmaskarray(filled)
+    elif kind == 'linear':
+        # Interpolate all the slices at once, laid out one after the other:
+        # the values interpolated between two slices are never used.
+        (lane_data, lane_mask) = (data.T.ravel(), mask.T.ravel())
+        unmasked = (~lane_mask).nonzero()[0]
+        indices = inside.T.ravel().nonzero()[0]
+        if indices.size:
+            values = np.interp(indices, unmasked, lane_data[unmasked])
+            (lanes, positions) = divmod(indices, n)
+            data[positions, lanes] = values.astype(data.dtype)
+            mask[inside] = False
+    else:
+        for j in inside.any(axis=0).nonzero()[0]:
+            column = data[:, j].copy()
+            _interp_spline(column, mask[:, j], inside[:, j].nonzero()[0],
+                           k, neighbors)
+            data[:, j] = column
+        mask[inside] = False
+    adata[:] = data.reshape(adata.shape)
+    amask[:] = mask.reshape(amask.shape)
     return marr
@@ -17,12 +17,17 @@ Moving windows
 
    mov_average
    mov_average_expw
+   mov_beta
    mov_corr
    mov_cov
    mov_max
    mov_mean
    mov_median
    mov_min
+   mov_minmax
+   mov_quantile
+   mov_rank
+   mov_regress
    mov_std
    mov_sum
    mov_var
@@ -39,18 +44,35 @@ Centered moving windows
    cmov_window
 
 
+Streaming moving windows
+------------------------
+
+.. autosummary::
+   :toctree: generated/
+
+   MovingWindow
+
+
 
 """
 __author__ = "Pierre GF Gerard-Marchant & Matt Knox ($Author: pierregm $)"
 __revision__ = "$Revision: 2241 $"
 __date__     = '$Date: 2009-12-19 03:28:37 +0100 (Sat, 19 Dec 2009) $'
 
-__all__ = ['mov_sum', 'mov_median', 'mov_min', 'mov_max',
+__all__ = ['mov_sum', 'mov_median', 'mov_quantile', 'mov_rank',
+           'mov_min', 'mov_max', 'mov_minmax',
            'mov_average', 'mov_mean', 'mov_average_expw',
            'mov_std', 'mov_var', 'mov_cov', 'mov_corr',
-           'cmov_average', 'cmov_mean', 'cmov_window'
+           'mov_beta', 'mov_regress',
+           'cmov_average', 'cmov_mean', 'cmov_window',
+           'MovingWindow'
            ]
 
+from heapq import heapify, heappop, heappush
+from collections import deque
+from datetime import timedelta
+from math import isinf, isnan
+
 import numpy as np
 from numpy import bool_, float_, sqrt
 narray = np.array
@@ -60,19 +82,40 @@ from numpy.ma import MaskedArray, nomask, getmask, getmaskarray, masked
 marray = ma.array
 
 from scikits.timeseries.cseries import \
-    MA_mov_sum, MA_mov_median, MA_mov_min, MA_mov_max, MA_mov_average_expw
+    MA_mov_sum, MA_mov_median, MA_mov_quantile, MA_mov_rank, \
+    MA_mov_min, MA_mov_max, MA_mov_minmax, MA_mov_moments, \
+    MA_mov_average_expw
 
 
 _doc_parameters = dict(
 data="""data : array-like
         Input data, as a sequence or (subclass of) ndarray.
         Masked arrays and TimeSeries objects are also accepted.
-        The input array should be 1D or 2D at most.
-        If the input array is 2D, the function is applied on each column.""",
-span="""span : int
-        Size of the filtering window.""",
+        The input array may have any number of dimensions: the function is
+        applied on each 1D slice along the axis `axis`.""",
+span="""span : {int, tuple, timedelta}
+        Size of the filtering window, as a number of consecutive values.
+        For a TimeSeries, the window may also cover a duration, given either
+        as a tuple ``(freq, n)`` of ``n`` periods at the frequency ``freq``
+        (for example, ``('D', 30)`` for 30 days), or as a
+        :class:`datetime.timedelta`.
+        The windows are then found from the dates of the series, which may
+        be irregular or have missing dates.""",
 dtype="""dtype : dtype, optional
         Data type of the result.""",
+axis="""axis : {0, int}, optional
+        Axis along which the moving window is applied.
+        With the default, each column of a 2D series is processed
+        independently.""",
+nthreads="""nthreads : {1, int}, optional
+        Number of threads sharing the computation, each of them processing
+        its own block of the 1D slices along `axis`.
+        The computations run without the GIL, and their results do not
+        depend on the number of threads.""",
+compensated="""compensated : {False, True}, optional
+        Whether to use a compensated (Kahan) summation for floating point
+        inputs, which reduces the accumulation of rounding errors on long
+        series at the cost of a slightly slower computation.""",
 ddof="""ddof : {0, integer}, optional
         Means Delta Degrees of Freedom.
         The divisor used in calculations of variance or standard deviation is
@@ -94,7 +137,11 @@ movfuncresults="""Returns
         The result at index i uses values from ``[i-span:i+1]``, and will be masked
         for the first ``span`` values.
         The result will also be masked at i if any of the input values in the slice
-        ``[i-span:i+1]`` are masked.""",
+        ``[i-span:i+1]`` are masked.
+        With a window over a duration, the result at index i uses the values
+        whose dates fall in the duration ending at the date of index i, and is
+        masked if that duration starts before the first date or if any of
+        these values are masked.""",
 movfuncexpwresults="""Returns
     -------
     result
@@ -102,65 +149,107 @@ movfuncexpwresults="""Returns
 )
 
 
-def _process_result_dict(orig_data, result_dict):
+def _window_dates(data, span):
+    """
+    Returns the number of periods and the dates defining the windows over the
+    dates of `data`, if `span` is a duration, or `span` and None if `span` is
+    a number of values.
+    The dates are given as a tuple of their values at the frequency of the
+    periods (the last period of each date) and of the first period of the
+    first date, from which the windows are complete.
+    """
+    if isinstance(span, timedelta):
+        seconds = span.days * 86400 + span.seconds
+        if span.microseconds or (seconds <= 0):
+            raise ValueError("The span should be a positive number of seconds")
+        (freq, span) = ('S', seconds)
+    elif isinstance(span, tuple):
+        (freq, span) = span
+    else:
+        return (span, None)
+    dates = getattr(data, '_dates', None)
+    if dates is None:
+        raise TypeError("Windows over a duration require a TimeSeries")
+    values = dates.asfreq(freq).tovalues()
+    if not values.size:
+        return (int(span), values)
+    origin = dates[:1].asfreq(freq, relation='START').tovalues()[0]
+    return (int(span), (values, int(origin)))
+
+
+def _process_result_dict(orig_data, result_dict, key='array'):
     "process the results from the c function"
 
-    rarray = result_dict['array']
+    rarray = result_dict[key]
     rmask = result_dict.get('mask', ma.nomask)
 
-    # makes a copy of the appropriate type
-    data = orig_data.astype(rarray.dtype).copy()
-    data.flat = rarray.ravel()
+    if rarray.shape == orig_data.shape and hasattr(orig_data, '_update_from'):
+        # the result is already a new array: view it as the original type
+        data = rarray.view(type(orig_data))
+        data._update_from(orig_data)
+    else:
+        # makes a copy of the appropriate type
+        data = orig_data.astype(rarray.dtype)
+        data.flat = rarray.ravel()
     if not hasattr(data, '__setmask__'):
         data = data.view(MaskedArray)
     data.__setmask__(rmask)
     return data
 
-def _moving_func(data, cfunc, kwargs):
+def _moving_func(data, cfunc, kwargs, outputs=('array',), other=None, axis=0,
+                 nthreads=1):
+    """
+    Applies the C function `cfunc` along the axis `axis` of `data`, with
+    `nthreads` threads, and returns the result, or a tuple of results if the
+    function has several `outputs`, as given by the keys of the dictionary
+    returned by `cfunc`.
+    If `other` is not None, it is passed to `cfunc` along with `data`, and
+    must have the same shape.
+    """
 
+    if 'span' in kwargs:
+        (kwargs['span'], dates) = _window_dates(data, kwargs['span'])
+        if dates is not None:
+            kwargs['dates'] = dates
     data = ma.fix_invalid(data)
     data = ma.array(data.filled(0), mask=data._mask)
-
-    if data.ndim == 1:
-        kwargs['array'] = data
-        result_dict = cfunc(**kwargs)
-        return _process_result_dict(data, result_dict)
-
-    elif data.ndim == 2:
-        for i in range(data.shape[-1]):
-            kwargs['array'] = data[:,i]
-            result_dict = cfunc(**kwargs)
-
-            if i == 0:
-                rtype = result_dict['array'].dtype
-                result = data.astype(rtype)
-                print data.dtype, result.dtype
-
-            rmask = result_dict.get('mask', ma.nomask)
-
-            curr_col = marray(result_dict['array'], mask=rmask, copy=False)
-            result[:,i] = curr_col
-
-        return result
-
-    else:
-        raise ValueError, "Data should be at most 2D"
+    if data.ndim == 0:
+        raise ValueError("Data should be at least 1D")
+    kwargs['array'] = data
+    kwargs['axis'] = axis
+    kwargs['nthreads'] = nthreads
+    if other is not None:
+        other = ma.fix_invalid(other)
+        other = ma.array(other.filled(0), mask=other._mask)
+        if other.shape != data.shape:
+            raise ValueError("Both series should have the same shape")
+        kwargs['other'] = other
+
+    result_dict = cfunc(**kwargs)
+    results = [_process_result_dict(data, result_dict, key)
+               for key in outputs]
+    if len(outputs) == 1:
+        return results[0]
+    return tuple(results)
 
 #...............................................................................
-def _mov_sum(data, span, dtype=None, type_num_double=False):
+def _mov_sum(data, span, dtype=None, type_num_double=False, compensated=False,
+             axis=0, nthreads=1):
     """
     Helper function for calculating moving sum.
     Resulting dtype can be determined in one of two ways.
     See C-code for more details.
     """
-    kwargs = {'span':span, 'type_num_double':type_num_double}
+    kwargs = {'span':span, 'type_num_double':type_num_double,
+              'compensated':int(compensated)}
     if dtype is not None:
         kwargs['dtype'] = dtype
-    return _moving_func(data, MA_mov_sum, kwargs)
+    return _moving_func(data, MA_mov_sum, kwargs, axis=axis,
+                        nthreads=nthreads)
 
 
 
-def mov_sum(data, span, dtype=None):
+def mov_sum(data, span, dtype=None, compensated=False, axis=0, nthreads=1):
     """
     Calculates the moving sum of a series.
 
@@ -169,15 +258,19 @@ def mov_sum(data, span, dtype=None):
     %(data)s
     %(span)s
     %(dtype)s
+    %(compensated)s
+    %(axis)s
+    %(nthreads)s
 
     %(movfuncresults)s
     """ % _doc_parameters
 
-    return _mov_sum(data, span, dtype=dtype)
+    return _mov_sum(data, span, dtype=dtype, compensated=compensated,
+                    axis=axis, nthreads=nthreads)
 
 
 
-def mov_median(data, span, dtype=None):
+def mov_median(data, span, dtype=None, axis=0, nthreads=1):
     """
     Calculates the moving median of a series.
 
@@ -186,6 +279,8 @@ def mov_median(data, span, dtype=None):
     %(data)s
     %(span)s
     %(dtype)s
+    %(axis)s
+    %(nthreads)s
 
     %(movfuncresults)s
     """ % _doc_parameters
@@ -194,19 +289,56 @@ def mov_median(data, span, dtype=None):
     if dtype is not None:
         kwargs['dtype'] = dtype
 
-    return _moving_func(data, MA_mov_median, kwargs)
+    return _moving_func(data, MA_mov_median, kwargs, axis=axis,
+                        nthreads=nthreads)
 
 
 
-def mov_min(data, span, dtype=None):
+def mov_quantile(data, span, q, dtype=None, axis=0, nthreads=1):
     """
-    Calculates the moving minimum of a series.
+    Calculates the moving quantile of a series.
+
+    The quantile of each window is interpolated linearly between the two
+    closest ranks, as with :func:`scipy.stats.mstats.mquantiles` with
+    ``alphap=betap=1``.
+
+    Parameters
+    ----------
+    %(data)s
+    %(span)s
+    q : float
+        Quantile to compute, between 0 and 1.
+    %(dtype)s
+    %(axis)s
+    %(nthreads)s
+
+    %(movfuncresults)s
+    """ % _doc_parameters
+
+    kwargs = {'span':span, 'quantile':q}
+    if dtype is not None:
+        kwargs['dtype'] = dtype
+
+    return _moving_func(data, MA_mov_quantile, kwargs, axis=axis,
+                        nthreads=nthreads)
+
+
+
+def mov_rank(data, span, dtype=None, axis=0, nthreads=1):
+    """
+    Calculates the moving rank of a series, that is, the rank of each value
+    among the values of the window ending with it.
+
+    Ranks start at 1 for the smallest value of the window, and tied values
+    are given the average of their ranks.
 
     Parameters
     ----------
     %(data)s
     %(span)s
     %(dtype)s
+    %(axis)s
+    %(nthreads)s
 
     %(movfuncresults)s
     """ % _doc_parameters
@@ -215,19 +347,22 @@ def mov_min(data, span, dtype=None):
     if dtype is not None:
         kwargs['dtype'] = dtype
 
-    return _moving_func(data, MA_mov_min, kwargs)
+    return _moving_func(data, MA_mov_rank, kwargs, axis=axis,
+                        nthreads=nthreads)
 
 
 
-def mov_max(data, span, dtype=None):
+def mov_min(data, span, dtype=None, axis=0, nthreads=1):
     """
-    Calculates the moving max of a series.
+    Calculates the moving minimum of a series.
 
     Parameters
     ----------
     %(data)s
     %(span)s
     %(dtype)s
+    %(axis)s
+    %(nthreads)s
 
     %(movfuncresults)s
     """ % _doc_parameters
@@ -236,46 +371,159 @@ def mov_max(data, span, dtype=None):
     if dtype is not None:
         kwargs['dtype'] = dtype
 
-    return _moving_func(data, MA_mov_max, kwargs)
+    return _moving_func(data, MA_mov_min, kwargs, axis=axis,
+                        nthreads=nthreads)
 
 
 
-def mov_average(data, span, dtype=None):
-    """Calculates the moving average of a series.
+def mov_max(data, span, dtype=None, axis=0, nthreads=1):
+    """
+    Calculates the moving max of a series.
 
     Parameters
     ----------
     %(data)s
     %(span)s
     %(dtype)s
+    %(axis)s
+    %(nthreads)s
 
     %(movfuncresults)s
     """ % _doc_parameters
-    return _mov_sum(data, span, dtype=dtype, type_num_double=True)/span
-mov_mean = mov_average
 
+    kwargs = {'span':span}
+    if dtype is not None:
+        kwargs['dtype'] = dtype
+
+    return _moving_func(data, MA_mov_max, kwargs, axis=axis,
+                        nthreads=nthreads)
 
 
-def mov_var(data, span, dtype=None, ddof=0):
+
+def mov_minmax(data, span, dtype=None, axis=0, nthreads=1):
     """
-    Calculates the moving variance of a 1-D array.
+    Calculates the moving minimum and maximum of a series in a single pass.
 
     Parameters
     ----------
     %(data)s
     %(span)s
     %(dtype)s
-    %(ddof)s
+    %(axis)s
+    %(nthreads)s
+
+    Returns
+    -------
+    minimum, maximum
+        The moving minimum and maximum, as masked arrays (preserving subclass
+        attributes), masked as with :func:`mov_min`.
+    """ % _doc_parameters
+
+    kwargs = {'span':span}
+    if dtype is not None:
+        kwargs['dtype'] = dtype
+
+    return _moving_func(data, MA_mov_minmax, kwargs, outputs=('min', 'max'),
+                        axis=axis, nthreads=nthreads)
+
+
+
+def mov_average(data, span, dtype=None, compensated=False, axis=0,
+                nthreads=1):
+    """Calculates the moving average of a series.
+
+    Parameters
+    ----------
+    %(data)s
+    %(span)s
+    %(dtype)s
+    %(compensated)s
+    %(axis)s
+    %(nthreads)s
 
     %(movfuncresults)s
     """ % _doc_parameters
-    return _mov_cov(data, data, span, ddof, dtype=dtype)
+    result = _mov_sum(data, span, dtype=dtype, type_num_double=True,
+                      compensated=compensated, axis=axis, nthreads=nthreads)
+    (periods, dates) = _window_dates(data, span)
+    if dates is None:
+        return result/span
+    # the windows over a duration hold a varying number of values
+    sizes = MA_mov_sum(np.ones(result.shape[axis]), periods, 0,
+                       dates=dates)['array']
+    shape = [1] * result.ndim
+    shape[axis] = -1
+    return result/sizes.reshape(shape)
+mov_mean = mov_average
 
 
 
-def mov_std(data, span, dtype=None, ddof=0):
+def _mov_moments(x, y, span, stats, ddof=0, dtype=None, axis=0, nthreads=1):
+    """
+    Helper function for calculating the moving moments `stats` of `x` (and
+    `y`) in a single pass, as a tuple of results.
+    See C-code for more details.
     """
-    Calculates the moving standard deviation of a 1-D array.
+    x = ma.asanyarray(x)
+    if y is not None:
+        y = ma.asanyarray(y)
+    if (x.dtype.kind == 'c') or (y is not None and y.dtype.kind == 'c'):
+        return _mov_moments_complex(x, y, span, stats, ddof, dtype, axis,
+                                    nthreads)
+    codes = dict(var='v', std='s', cov='c', corr='r', beta='b', alpha='a')
+    kwargs = {'span':span, 'stats':''.join([codes[s] for s in stats]),
+              'ddof':ddof}
+    if dtype is not None:
+        kwargs['dtype'] = dtype
+    result = _moving_func(x, MA_mov_moments, kwargs, outputs=stats, other=y,
+                          axis=axis, nthreads=nthreads)
+    if len(stats) == 1:
+        return (result,)
+    return result
+
+
+def _mov_moments_complex(x, y, span, stats, ddof=0, dtype=None, axis=0,
+                         nthreads=1):
+    # complex series go through the moving sums of the products
+    if y is None:
+        y = x
+    (span, dates) = _window_dates(x, span)
+    if dates is not None:
+        # as the moving sums over dates, which they would go through
+        raise TypeError("windows over dates require real numbers")
+    # the moments are undefined without enough degrees of freedom
+    denom = ma.masked_less_equal(span - ddof, 0)
+    sum_x = _mov_sum(x, span, dtype=dtype, type_num_double=True, axis=axis,
+                     nthreads=nthreads)
+    sum_y = _mov_sum(y, span, dtype=dtype, type_num_double=True, axis=axis,
+                     nthreads=nthreads)
+    sum_xy = _mov_sum(x*y, span, dtype=dtype, type_num_double=True,
+                      axis=axis, nthreads=nthreads)
+    results = []
+    for stat in stats:
+        if stat in ('var', 'std', 'cov'):
+            result = sum_xy/denom - (sum_x * sum_y) / (span*denom)
+            if stat == 'std':
+                result = sqrt(result)
+        elif stat == 'corr':
+            covar = sum_xy/span - (sum_x * sum_y) / (span ** 2)
+            sum_xx = _mov_sum(x**2, span, dtype=dtype, type_num_double=True,
+                              axis=axis, nthreads=nthreads)
+            sum_yy = _mov_sum(y**2, span, dtype=dtype, type_num_double=True,
+                              axis=axis, nthreads=nthreads)
+            variances = ((sum_xx/span - (sum_x ** 2) / (span ** 2)) *
+                         (sum_yy/span - (sum_y ** 2) / (span ** 2)))
+            result = covar / sqrt(ma.masked_equal(variances, 0))
+        else:
+            raise TypeError("%s is not supported for complex series" % stat)
+        results.append(result)
+    return tuple(results)
+
+
+
+def mov_var(data, span, dtype=None, ddof=0, axis=0, nthreads=1):
+    """
+    Calculates the moving variance of a series.
 
     Parameters
     ----------
@@ -283,30 +531,39 @@ def mov_std(data, span, dtype=None, ddof=0):
     %(span)s
     %(dtype)s
     %(ddof)s
+    %(axis)s
+    %(nthreads)s
 
     %(movfuncresults)s
     """ % _doc_parameters
-    return sqrt(mov_var(data, span, dtype=dtype, ddof=ddof))
+    return _mov_moments(data, None, span, ('var',), ddof, dtype=dtype,
+                        axis=axis, nthreads=nthreads)[0]
 
 
 
-def _mov_cov(x, y, span, ddof, dtype=None):
-    # helper function
-    denom = span - ddof
+def mov_std(data, span, dtype=None, ddof=0, axis=0, nthreads=1):
+    """
+    Calculates the moving standard deviation of a series.
 
-    x = ma.asanyarray(x)
-    y = ma.asanyarray(y)
+    Parameters
+    ----------
+    %(data)s
+    %(span)s
+    %(dtype)s
+    %(ddof)s
+    %(axis)s
+    %(nthreads)s
 
-    sum_prod = _mov_sum(x*y, span, dtype=dtype, type_num_double=True)
-    sum_x = _mov_sum(x, span, dtype=dtype, type_num_double=True)
-    sum_y = _mov_sum(y, span, dtype=dtype, type_num_double=True)
+    %(movfuncresults)s
+    """ % _doc_parameters
+    return _mov_moments(data, None, span, ('std',), ddof, dtype=dtype,
+                        axis=axis, nthreads=nthreads)[0]
 
-    return sum_prod/denom - (sum_x * sum_y) / (span*denom)
 
 
-def mov_cov(x, y, span, bias=0, dtype=None):
+def mov_cov(x, y, span, bias=0, dtype=None, axis=0, nthreads=1):
     """
-    Calculates the moving covariance of two 1-D arrays.
+    Calculates the moving covariance of two series.
 
     Parameters
     ----------
@@ -314,6 +571,8 @@ def mov_cov(x, y, span, bias=0, dtype=None):
     %(y)s
     %(span)s
     %(dtype)s
+    %(axis)s
+    %(nthreads)s
 
     %(movfuncresults)s
     """ % _doc_parameters
@@ -323,11 +582,12 @@ def mov_cov(x, y, span, bias=0, dtype=None):
     else:
         ddof = 0
 
-    return _mov_cov(x, y, span, ddof, dtype=dtype)
+    return _mov_moments(x, y, span, ('cov',), ddof, dtype=dtype,
+                        axis=axis, nthreads=nthreads)[0]
 #...............................................................................
-def mov_corr(x, y, span, dtype=None):
+def mov_corr(x, y, span, dtype=None, axis=0, nthreads=1):
     """
-    Calculates the moving correlation of two 1-D arrays.
+    Calculates the moving correlation of two series.
 
     Parameters
     ----------
@@ -335,34 +595,79 @@ def mov_corr(x, y, span, dtype=None):
     %(y)s
     %(span)s
     %(dtype)s
+    %(axis)s
+    %(nthreads)s
 
     %(movfuncresults)s
     """ % _doc_parameters
 
-    sum_x = _mov_sum(x, span, dtype=dtype, type_num_double=True)
-    sum_y = _mov_sum(y, span, dtype=dtype, type_num_double=True)
+    return _mov_moments(x, y, span, ('corr',), dtype=dtype, axis=axis,
+                        nthreads=nthreads)[0]
+
 
-    sum_prod = _mov_sum(x*y, span, dtype=dtype, type_num_double=True)
-    _covar = sum_prod/span - (sum_x * sum_y) / (span ** 2)
 
-    sum_prod = _mov_sum(x**2, span, dtype=dtype, type_num_double=True)
-    _stddev_x = sqrt(sum_prod/span - (sum_x ** 2) / (span ** 2))
+def mov_beta(x, y, span, dtype=None, axis=0, nthreads=1):
+    """
+    Calculates the moving slope of the least-squares regression of `y` on `x`,
+    that is, the moving covariance of `x` and `y` divided by the moving
+    variance of `x`.
+
+    Parameters
+    ----------
+    %(x)s
+    %(y)s
+    %(span)s
+    %(dtype)s
+    %(axis)s
+    %(nthreads)s
 
-    sum_prod = _mov_sum(y**2, span, dtype=dtype, type_num_double=True)
-    _stddev_y = sqrt(sum_prod/span - (sum_y ** 2) / (span ** 2))
+    %(movfuncresults)s
+    """ % _doc_parameters
 
-    return _covar / (_stddev_x * _stddev_y)
+    return _mov_moments(x, y, span, ('beta',), dtype=dtype, axis=axis,
+                        nthreads=nthreads)[0]
 
 
 
-def mov_average_expw(data, span, tol=1e-6, dtype=None):
+def mov_regress(x, y, span, dtype=None, axis=0, nthreads=1):
+    """
+    Calculates the moving least-squares regression of `y` on `x`, as the
+    slope and the intercept of the lines ``y = slope * x + intercept`` fitted
+    on each window.
+
+    Parameters
+    ----------
+    %(x)s
+    %(y)s
+    %(span)s
+    %(dtype)s
+    %(axis)s
+    %(nthreads)s
+
+    Returns
+    -------
+    slope, intercept
+        The moving slope and intercept, as masked arrays (preserving subclass
+        attributes), masked as with :func:`mov_cov`.
+    """ % _doc_parameters
+
+    return _mov_moments(x, y, span, ('beta', 'alpha'), dtype=dtype,
+                        axis=axis, nthreads=nthreads)
+
+
+
+def mov_average_expw(data, span=None, tol=1e-6, dtype=None, axis=0,
+                     nthreads=1, alpha=None, halflife=None, com=None):
     """
     Calculates the exponentially weighted moving average of a series.
 
+    The smoothing factor ``alpha`` of the average is given by exactly one of
+    `span`, `alpha`, `halflife` or `com`.
+
     Parameters
     ----------
     %(data)s
-    span : int
+    span : int, optional
         Time periods. The smoothing factor is 2/(span + 1)
     tol : {1e-6, float}, optional
         Tolerance for the definition of the mask. When data contains masked
@@ -371,24 +676,173 @@ def mov_average_expw(data, span, tol=1e-6, dtype=None):
         impacted (as determined by this parameter) by the masked values are
         left unmasked.
     %(dtype)s
+    %(axis)s
+    %(nthreads)s
+    alpha : float, optional
+        Smoothing factor, between 0 (excluded) and 1.
+    halflife : float, optional
+        Number of periods after which the weight of a value is halved.
+        The smoothing factor is 1 - exp(log(0.5)/halflife).
+    com : float, optional
+        Center of mass of the weights. The smoothing factor is 1/(1 + com).
 
     %(movfuncexpwresults)s
     """ % _doc_parameters
 
-    kwargs = {'span':span}
+    kwargs = {'tol':tol}
     if dtype is not None:
         kwargs['dtype'] = dtype
-    result = _moving_func(data, MA_mov_average_expw, kwargs)
-    mask = getattr(data, '_mask', ma.nomask)
+    if [span, alpha, halflife, com].count(None) != 3:
+        raise ValueError("Exactly one of span, alpha, halflife or com "
+                         "should be given")
+    if span is not None:
+        kwargs['span'] = span
+    elif alpha is not None:
+        kwargs['alpha'] = alpha
+    elif halflife is not None:
+        if halflife <= 0:
+            raise ValueError("halflife must be positive")
+        kwargs['alpha'] = 1. - np.exp(np.log(0.5) / halflife)
+    else:
+        if com < 0:
+            raise ValueError("com must be positive or zero")
+        kwargs['alpha'] = 1. / (1. + com)
+    # the mask of the result is computed along with the average
+    return _moving_func(data, MA_mov_average_expw, kwargs, axis=axis,
+                        nthreads=nthreads)
 
-    if mask is not ma.nomask:
-        _unmasked = np.logical_not(mask).astype(float_)
-        marker = 1.0 - MA_mov_average_expw(array=_unmasked, span=span)['array']
-        result._mask = np.where(marker > tol, True, mask)
 
+
+#..............................................................................
+# Windows of the centered moving functions, memoised per (type, span)
+_window_cache = {}
+_window_cache_keys = []
+_window_cache_size = 32
+
+def _cached(key, func):
+    """
+    Returns the value of ``func()`` stored under ``key`` in the cache of
+    windows, computing it and discarding the least recently used entry if
+    needed.
+    Unhashable keys (windows parameterized by lists) are not cached.
+    """
+    try:
+        value = _window_cache[key]
+    except KeyError:
+        value = func()
+        value.flags.writeable = False
+        _window_cache[key] = value
+        _window_cache_keys.append(key)
+        if len(_window_cache_keys) > _window_cache_size:
+            del _window_cache[_window_cache_keys.pop(0)]
+        return value
+    except TypeError:
+        return func()
+    _window_cache_keys.remove(key)
+    _window_cache_keys.append(key)
+    return value
+
+
+def _get_window(window_type, span):
+    "Returns the coefficients of a window of type `window_type` and size `span`."
+    from scipy.signal import get_window
+    return _cached((window_type, span),
+                   lambda: get_window(window_type, span, fftbins=False))
+
+
+def _fft_size(size):
+    "Returns the smallest power of 2 larger than or equal to `size`."
+    return 1 << int(np.ceil(np.log2(size)))
+
+
+def _convolve_direct(data, window, k):
+    """
+    Convolves each column of the 2D array `data` with `window`, returning the
+    ``len(data)`` values of the full convolution starting at position `k`.
+    """
+    (n, span) = (len(data), len(window))
+    padded = np.zeros((n + 2 * (span - 1),) + data.shape[1:],
+                      dtype=np.find_common_type([data.dtype, window.dtype], []))
+    padded[span - 1:span - 1 + n] = data
+    result = np.zeros((n,) + data.shape[1:], dtype=padded.dtype)
+    for (m, w) in enumerate(window):
+        start = k + span - 1 - m
+        result += w * padded[start:start + n]
     return result
 
 
+def _convolve_fft(data, window, k, nfft, window_type):
+    """
+    Convolves each column of the 2D array `data` with `window` by overlap-add,
+    with FFTs of size `nfft`, returning the ``len(data)`` values of the full
+    convolution starting at position `k`.
+    """
+    (n, span) = (len(data), len(window))
+    block = nfft - span + 1
+    nblocks = -(-n // block)
+    if np.iscomplexobj(data) or np.iscomplexobj(window):
+        (fft, ifft) = (np.fft.fft, np.fft.ifft)
+    else:
+        (fft, ifft) = (np.fft.rfft, np.fft.irfft)
+    spectrum = _cached((window_type, span, nfft, fft.__name__),
+                       lambda: fft(window, nfft))
+    blocks = np.zeros((nblocks * block,) + data.shape[1:], dtype=data.dtype)
+    blocks[:n] = data
+    blocks = fft(blocks.reshape((nblocks, block) + data.shape[1:]),
+                 nfft, axis=1)
+    blocks *= spectrum.reshape((1, -1) + (1,) * (data.ndim - 1))
+    blocks = ifft(blocks, nfft, axis=1)
+    # Adds the tail of each block to the head of the next one
+    full = np.zeros(((nblocks + 1) * block,) + data.shape[1:],
+                    dtype=blocks.dtype)
+    full[:nblocks * block] = blocks[:, :block].reshape(full[:-block].shape)
+    tails = full[block:].reshape((nblocks, block) + data.shape[1:])
+    tails[:, :span - 1] += blocks[:, block:]
+    return full[k:k + n]
+
+
+def _convolve(data, window, k, window_type=None):
+    """
+    Convolves each column of the 2D array `data` with `window`, returning the
+    ``len(data)`` values of the full convolution starting at position `k`.
+    The convolution is computed directly for small windows, and by FFT
+    (overlap-add over blocks of a few times the size of the window) otherwise,
+    depending on which one is expected to be the fastest.
+    """
+    (n, span) = (len(data), len(window))
+    nfft = max(min(_fft_size(n + span - 1), _fft_size(8 * span)),
+               _fft_size(2 * span))
+    nblocks = -(-n // (nfft - span + 1))
+    if n * span <= 4 * nblocks * nfft * np.log2(nfft):
+        return _convolve_direct(data, window, k)
+    return _convolve_fft(data, window, k, nfft, window_type)
+
+
+def _spread_mask(mask, window, k):
+    """
+    Returns the mask of the convolution of each column of the 2D boolean array
+    `mask` with `window`, as the ``len(mask)`` values of the full convolution
+    starting at position `k` that are positive.
+    For a nonnegative window, a value is masked if a masked value falls under
+    one of the nonzero coefficients of the window, which is found from the
+    cumulative count of masked values.
+    """
+    (n, span) = (len(mask), len(window))
+    support = np.flatnonzero(window)
+    if not support.size:
+        return np.zeros(mask.shape, bool_)
+    (lo, hi) = (support[0], support[-1])
+    if (window < 0).any() or (support.size != hi - lo + 1):
+        return _convolve_direct(mask.astype(float_), window, k) > 0
+    counts = np.zeros((n + 1,) + mask.shape[1:], int)
+    np.cumsum(mask, axis=0, out=counts[1:])
+    # The window centered on i covers the positions [i+k-hi, i+k-lo]
+    positions = np.arange(n) + k
+    first = (positions - hi).clip(0, n)
+    last = (positions - lo + 1).clip(0, n)
+    return (counts[last] - counts[first]) > 0
+
+
 
 def cmov_window(data, span, window_type):
     """
@@ -397,8 +851,13 @@ def cmov_window(data, span, window_type):
 
     Parameters
     ----------
-    %(data)s
-    %(span)s
+    data : array-like
+        Input data, as a sequence or (subclass of) ndarray.
+        Masked arrays and TimeSeries objects are also accepted.
+        The input array should be 1D or 2D at most.
+        If the input array is 2D, the function is applied on each column.
+    span : int
+        Size of the filtering window.
     window_type : {string/tuple/float}
         Window type (see Notes)
 
@@ -434,30 +893,28 @@ def cmov_window(data, span, window_type):
     If ``window_type`` is a floating point number, it is interpreted as the beta
     parameter of the ``kaiser`` window.
 
+    The convolution is computed directly for small windows and by FFT
+    (overlap-add) for large ones, all the columns of a 2D input at once.
+    The coefficients of the most recently used windows are kept in memory.
+
     Warnings
     --------
     Only ``boxcar`` has been thoroughly tested so far...
 
     """ % _doc_parameters
 
-    from scipy.signal import convolve, get_window
-
     data = marray(data, copy=True, subok=True)
+    if data.ndim > 2:
+        raise ValueError, "Data should be at most 2D"
     if data._mask is nomask:
         data._mask = np.zeros(data.shape, bool_)
-    window = get_window(window_type, span, fftbins=False)
+    window = _get_window(window_type, span)
     (n, k) = (len(data), span//2)
-    #
-    if data.ndim == 1:
-        data._data.flat = convolve(data._data, window)[k:n+k] / float(span)
-        data._mask[:] = ((convolve(getmaskarray(data), window) > 0)[k:n+k])
-    elif data.ndim == 2:
-        for i in range(data.shape[-1]):
-            _data = data._data[:,i]
-            _data.flat = convolve(_data, window)[k:n+k] / float(span)
-            data._mask[:,i] = (convolve(data._mask[:,i], window) > 0)[k:n+k]
-    else:
-        raise ValueError, "Data should be at most 2D"
+    # All the columns are convolved at once
+    _data = data._data.reshape(n, -1)
+    _mask = data._mask.reshape(n, -1)
+    _data[:] = _convolve(_data, window, k, window_type) / float(span)
+    _mask[:] = _spread_mask(_mask, window, k)
     data._mask[:k] = data._mask[-k:] = True
     return data
 
@@ -469,8 +926,13 @@ def cmov_average(data, span):
 
     Parameters
     ----------
-    %(data)s
-    %(span)s
+    data : array-like
+        Input data, as a sequence or (subclass of) ndarray.
+        Masked arrays and TimeSeries objects are also accepted.
+        The input array should be 1D or 2D at most.
+        If the input array is 2D, the function is applied on each column.
+    span : int
+        Size of the filtering window.
 
     Returns
     -------
@@ -483,3 +945,282 @@ def cmov_average(data, span):
 
 cmov_mean = cmov_average
 
+
+
+#..............................................................................
+class MovingWindow(object):
+    """
+    Incremental accumulator of a moving statistic over a stream of values.
+
+    Each new value is added with :meth:`push` (or :meth:`push_many` for a
+    sequence), which updates the statistic of the window without going
+    through the whole history again.
+    The statistic is masked under the same conditions as with the
+    corresponding ``mov_*`` function: replaying a series through
+    :meth:`push_many` gives the same result as a single call to that function.
+    The state of an accumulator can be pickled, e.g. for checkpointing.
+
+    Parameters
+    ----------
+    kind : {'average', string}, optional
+        Statistic to compute, as one of 'sum', 'average' (or 'mean'), 'var',
+        'std', 'median', 'min', 'max' or 'average_expw'.
+    span : int
+        Size of the filtering window.
+        For 'average_expw', the smoothing factor is 2/(span + 1).
+    ddof : {0, int}, optional
+        Means Delta Degrees of Freedom for 'var' and 'std', as with
+        :func:`mov_var`.
+    tol : {1e-6, float}, optional
+        Tolerance for the definition of the mask with 'average_expw', as with
+        :func:`mov_average_expw`.
+
+    Notes
+    -----
+    Each update takes a constant time, except for 'median' (logarithmic
+    amortized time, with two heaps holding the lower and upper halves of the
+    window) and for 'min' and 'max' (constant amortized time).
+    The values are processed as floats.
+    """
+
+    _kinds = ('sum', 'average', 'mean', 'var', 'std', 'median',
+              'min', 'max', 'average_expw')
+
+    def __init__(self, kind='average', span=None, ddof=0, tol=1e-6):
+        if kind not in self._kinds:
+            raise ValueError("Invalid kind '%s': should be in %s" % \
+                             (kind, self._kinds))
+        if kind == 'mean':
+            kind = 'average'
+        span = int(span)
+        if span < 1:
+            raise ValueError("span must be greater than or equal to 1")
+        self.kind = kind
+        self.span = span
+        self.ddof = ddof
+        self.tol = tol
+        self.reset()
+
+    def __repr__(self):
+        return "MovingWindow(kind='%s', span=%i): %s" % (self.kind, self.span,
+                                                          self.value)
+
+    def reset(self):
+        "Empties the window."
+        self.count = 0
+        # window of the (value, masked) pairs and number of masked values
+        self._window = deque(maxlen=self.span)
+        self._nmasked = 0
+        # running sum with its compensation, moments
+        self._sum = self._comp = 0.
+        self._mean = self._m2 = 0.
+        self._nvalid = 0
+        # heaps of the (value, index) of the lower half of the window (as
+        # opposite values) and of its upper half, with their numbers of
+        # entries still in the window: the indices of the removed entries
+        # are kept until they reach the top of their heap
+        self._lower = []
+        self._upper = []
+        self._nlower = self._nupper = 0
+        self._removed = set()
+        # monotonic deque of the (index, value) candidates for min/max
+        self._extrema = deque()
+        # exponential average and weight of the unmasked values in it
+        self._average = self._weight = 0.
+        self._initialized = False
+        self._masked = True
+
+    def push(self, value, masked=False):
+        """
+        Adds a new value to the window and returns the updated statistic.
+
+        Parameters
+        ----------
+        value : float
+            New value.
+            The constant :const:`numpy.ma.masked` is interpreted as a masked
+            value, as are NaNs and infinities (as with the ``mov_*``
+            functions).
+        masked : {False, bool}, optional
+            Whether the new value is masked.
+        """
+        if value is ma.masked:
+            (value, masked) = (0., True)
+        value = float(value)
+        masked = bool(masked) or isnan(value) or isinf(value)
+        if self.kind == 'average_expw':
+            self._push_expw(value, masked)
+        else:
+            window = self._window
+            if len(window) == self.span:
+                (old, old_masked) = window[0]
+                if old_masked:
+                    self._nmasked -= 1
+                else:
+                    self._remove(old)
+            window.append((value, masked))
+            if masked:
+                self._nmasked += 1
+            else:
+                self._add(value)
+        self.count += 1
+        return self.value
+
+    def push_many(self, data):
+        """
+        Adds the values of a 1D sequence to the window, in order, and returns
+        the statistic after each of them, as a masked array.
+        """
+        data = ma.asanyarray(data)
+        if data.ndim != 1:
+            raise ValueError("push_many accepts only 1D sequences")
+        result = np.empty(data.size, dtype=float_)
+        result_mask = np.empty(data.size, dtype=bool_)
+        push = self.push
+        for (i, (value, flag)) in enumerate(zip(data.filled(0).tolist(),
+                                                getmaskarray(data).tolist())):
+            current = push(value, flag)
+            if current is ma.masked:
+                (result[i], result_mask[i]) = (0, True)
+            else:
+                (result[i], result_mask[i]) = (current, False)
+        return marray(result, mask=result_mask)
+
+    def _accumulate(self, value):
+        # Neumaier summation, to avoid any drift of the running sum
+        total = self._sum + value
+        if abs(self._sum) >= abs(value):
+            self._comp += (self._sum - total) + value
+        else:
+            self._comp += (value - total) + self._sum
+        self._sum = total
+
+    def _add(self, value):
+        kind = self.kind
+        self._nvalid += 1
+        if kind in ('sum', 'average'):
+            self._accumulate(value)
+        elif kind in ('var', 'std'):
+            delta = value - self._mean
+            self._mean += delta / self._nvalid
+            self._m2 += delta * (value - self._mean)
+        elif kind == 'median':
+            if self._nlower and ((value, self.count) >
+                                 (-self._lower[0][0], -self._lower[0][1])):
+                heappush(self._upper, (value, self.count))
+                self._nupper += 1
+            else:
+                heappush(self._lower, (-value, -self.count))
+                self._nlower += 1
+            self._balance()
+        else:
+            extrema = self._extrema
+            if kind == 'min':
+                while extrema and extrema[-1][1] >= value:
+                    extrema.pop()
+            else:
+                while extrema and extrema[-1][1] <= value:
+                    extrema.pop()
+            extrema.append((self.count, value))
+
+    def _remove(self, value):
+        kind = self.kind
+        self._nvalid -= 1
+        if kind in ('sum', 'average'):
+            self._accumulate(-value)
+        elif kind in ('var', 'std'):
+            if not self._nvalid:
+                self._mean = self._m2 = 0.
+            else:
+                delta = value - self._mean
+                self._mean -= delta / self._nvalid
+                self._m2 = max(self._m2 - delta * (value - self._mean), 0.)
+        elif kind == 'median':
+            # the value leaving the window was pushed span values ago
+            index = self.count - self.span
+            self._removed.add(index)
+            top = self._lower[0]
+            if (value, index) <= (-top[0], -top[1]):
+                self._nlower -= 1
+                self._prune(self._lower, -1)
+            else:
+                self._nupper -= 1
+                self._prune(self._upper, 1)
+            self._balance()
+        else:
+            extrema = self._extrema
+            if extrema and extrema[0][0] <= self.count - self.span:
+                extrema.popleft()
+
+    def _prune(self, heap, sign):
+        # discards the removed entries from the top of `heap`
+        removed = self._removed
+        while heap and (sign * heap[0][1] in removed):
+            removed.remove(sign * heappop(heap)[1])
+
+    def _balance(self):
+        # keeps the lower half of the window at most one value larger than
+        # the upper half, so that the median is at the top of the heaps
+        (lower, upper) = (self._lower, self._upper)
+        if self._nlower > self._nupper + 1:
+            (value, index) = heappop(lower)
+            heappush(upper, (-value, -index))
+            self._nlower -= 1
+            self._nupper += 1
+            self._prune(lower, -1)
+        elif self._nlower < self._nupper:
+            (value, index) = heappop(upper)
+            heappush(lower, (-value, -index))
+            self._nlower += 1
+            self._nupper -= 1
+            self._prune(upper, 1)
+        if len(lower) + len(upper) > 2 * self.span:
+            # too many removed entries: rebuild the heaps without them
+            removed = self._removed
+            self._lower = [e for e in lower if -e[1] not in removed]
+            self._upper = [e for e in upper if e[1] not in removed]
+            heapify(self._lower)
+            heapify(self._upper)
+            removed.clear()
+
+    def _push_expw(self, value, masked):
+        decay = 2. / (self.span + 1)
+        if not self._initialized:
+            self._average = value
+            self._initialized = not masked
+        elif not masked:
+            self._average += decay * (value - self._average)
+        # weight of the unmasked values in the average
+        if not self.count:
+            self._weight = float(not masked)
+        else:
+            self._weight += decay * (float(not masked) - self._weight)
+        self._masked = masked or (1. - self._weight > self.tol)
+
+    def _get_value(self):
+        kind = self.kind
+        if kind == 'average_expw':
+            if self._masked:
+                return ma.masked
+            return self._average
+        if (self.count < self.span) or self._nmasked:
+            return ma.masked
+        span = self.span
+        if kind == 'sum':
+            return self._sum + self._comp
+        elif kind == 'average':
+            return (self._sum + self._comp) / span
+        elif (kind in ('var', 'std')) and (span <= self.ddof):
+            # not enough degrees of freedom
+            return ma.masked
+        elif kind == 'var':
+            return self._m2 / (span - self.ddof)
+        elif kind == 'std':
+            return sqrt(self._m2 / (span - self.ddof))
+        elif kind == 'median':
+            if span % 2:
+                return -self._lower[0][0]
+            return (self._upper[0][0] - self._lower[0][0]) / 2.
+        return self._extrema[0][1]
+    value = property(fget=_get_value,
+                     doc="Current statistic, masked if it is undefined.")
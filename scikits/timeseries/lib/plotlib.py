@@ -103,7 +103,7 @@ import numpy as np
 import numpy.ma as ma
 
 from scikits.timeseries import Date, DateArray, TimeSeries, \
-    check_freq_str, convert_to_float, date_array, get_freq_group
+    check_freq_str, convert_to_float, date_array, get_freq_group, period_break
 from scikits.timeseries import const as _c
 
 import warnings
@@ -219,22 +219,6 @@ def _get_default_annual_spacing(nyears):
     return (min_spacing, maj_spacing)
 
 
-def period_break(dates, period):
-    """
-    Returns the indices where the given period changes.
-
-    Parameters
-    ----------
-    dates : DateArray
-        Array of dates to monitor.
-    period : string
-        Name of the period to monitor.
-    """
-    current = getattr(dates, period)
-    previous = getattr(dates-1, period)
-    return (current - previous).nonzero()[0]
-
-
 def has_level_label(label_flags, vmin):
     """
     Returns true if the ``label_flags`` indicate there is at least one label
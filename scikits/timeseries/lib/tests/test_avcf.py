@@ -14,7 +14,8 @@ import numpy as np
 from numpy import nan
 import numpy.ma as ma
 
-from scikits.timeseries.lib.avcf import avf, acf, cvf, ccf, pacf
+from scikits.timeseries.lib.avcf import avf, acf, acf_std, cvf, ccf, pacf, \
+                                        levinson_durbin
 
 from numpy.testing import *
 from numpy.ma.testutils import assert_almost_equal
@@ -141,6 +142,30 @@ class TestCorrel(TestCase):
                              -46765.5598,-52410.7168,-46279.6304,-27242.8170,
                                 498.1511, 29551.1878, 57576.9793])
     #......................................................
+    def test_maxlag(self):
+        "Tests the correlation functions truncated at a maximum lag"
+        presidents = ma.fix_invalid(self.presidents)
+        (mdeaths, fdeaths) = (self.mdeaths, self.fdeaths)
+        n = len(presidents)
+        for periodogram in (True, False):
+            for maxlag in (0, 1, 10, n-1, n+5):
+                k = min(maxlag, n-1)
+                avfp = avf(presidents, periodogram)
+                assert_almost_equal(avf(presidents, periodogram, maxlag),
+                                    ma.concatenate([avfp[:k+1],
+                                                    avfp[2*n-1-k:]]))
+                cvfmf = cvf(mdeaths, fdeaths, periodogram, maxlag=maxlag)
+                assert_almost_equal(cvfmf[:k+1],
+                                    cvf(mdeaths, fdeaths, periodogram)[:k+1])
+                assert_almost_equal(len(cvfmf), 2*min(maxlag, 71)+1)
+            assert_almost_equal(acf(presidents, periodogram, 20)[-20:],
+                                acf(presidents, periodogram)[-20:])
+        # Brute force at the negative lags
+        (mz, fz) = (mdeaths.anom(), fdeaths.anom())
+        assert_almost_equal(cvf(mdeaths, fdeaths, False, 5)[-5:],
+                            [(mz[:-k]*fz[k:]).sum()/(72-k) for k in (5,4,3,2,1)])
+        self.failUnlessRaises(ValueError, avf, presidents, True, -1)
+    #......................................................
     def test_pacf(self):
         mdeaths = self.mdeaths
         pacfm = pacf(mdeaths)
@@ -155,6 +180,58 @@ class TestCorrel(TestCase):
                             [ 0.000, 0.763,-0.445,-0.229,-0.359,-0.183,-0.132,
                              -0.095, 0.017, 0.217, 0.338, 0.043, 0.041, 0.166,
                              -0.099,-0.006, 0.114, 0.084, 0.038])
+    #......................................................
+    def test_batch(self):
+        "Tests the correlation functions on the columns of 2D arrays"
+        presidents = ma.fix_invalid(self.presidents)[:72]
+        data = ma.column_stack([presidents, self.mdeaths, self.fdeaths])
+        for maxlag in (None, 12):
+            acfd = acf(data, maxlag=maxlag)
+            assert_almost_equal(acf(data.T, maxlag=maxlag, axis=1), acfd.T)
+            for j in range(3):
+                assert_almost_equal(acfd[:,j], acf(data[:,j], maxlag=maxlag))
+                assert_almost_equal(acf_std(data, 5)[:,j],
+                                    acf_std(data[:,j], 5))
+            # The cached coefficients may stop at a maximum lag
+            k = maxlag or 71
+            stdd = acf_std(data, 5)
+            assert_almost_equal(acf_std(data, 5, acf_cached=acfd),
+                                np.concatenate([stdd[:k+1], stdd[-k:]]))
+            ccfd = ccf(data, data[:,::-1], maxlag=maxlag)
+            for j in range(3):
+                assert_almost_equal(ccfd[:,j], ccf(data[:,j], data[:,2-j],
+                                                   maxlag=maxlag))
+            pairs = [(1,2), (2,1), (0,0)]
+            cvfd = cvf(data, data, maxlag=maxlag, pairs=pairs)
+            assert_almost_equal(cvfd.shape[1], 3)
+            for (k, (i, j)) in enumerate(pairs):
+                assert_almost_equal(cvfd[:,k], cvf(data[:,i], data[:,j],
+                                                   maxlag=maxlag))
+        self.failUnlessRaises(ValueError, cvf, presidents, presidents,
+                              pairs=[(0,0)])
+    #......................................................
+    def test_levinson_durbin(self):
+        "Tests the Levinson-Durbin recursion against the Yule-Walker equations"
+        from scipy.linalg import solve, toeplitz
+        avfm = np.asarray(avf(self.mdeaths, maxlag=12)[:13])
+        (pacfm, arcoefs, sigma2) = levinson_durbin(avfm)
+        assert_almost_equal(pacfm, pacf(self.mdeaths, lagmax=13))
+        assert_almost_equal(sigma2[0], avfm[0])
+        for k in range(1, 13):
+            coefs = solve(toeplitz(avfm[:k]), avfm[1:k+1])
+            assert_almost_equal(arcoefs[k,1:k+1], coefs)
+            assert_almost_equal(arcoefs[k,k], pacfm[k])
+            assert_almost_equal(sigma2[k], avfm[0] - np.dot(coefs, avfm[1:k+1]))
+        (pacfm_, arcoefs_, sigma2_) = pacf(self.mdeaths, lagmax=13,
+                                           full_output=True)
+        assert_almost_equal(arcoefs_, arcoefs)
+        assert_almost_equal(sigma2_, sigma2)
+        # Lower orders
+        assert_almost_equal(levinson_durbin(avfm, 4)[1], arcoefs[:5,:5])
+        # Only 1D series
+        X = np.random.rand(200, 4)
+        self.failUnlessRaises(ValueError, pacf, X, lagmax=5)
+        self.failUnlessRaises(ValueError, levinson_durbin, X[:6])
 
 if __name__ == '__main__':
     run_module_suite()
\ No newline at end of file
@@ -55,6 +55,38 @@ class TestFuncs(TestCase):
         test = interp_masked1d(self.test_array.astype(float), kind='linear')
         assert_almost_equal(test, result_lin)
 
+    def test_interp_axis(self):
+        "Test interp_masked1d along an axis of a 2D array"
+        x = ma.array(np.random.rand(50, 3), mask=(np.random.rand(50, 3) < .3))
+        x[0] = x[-1] = 0
+        for kind in ('constant', 'linear', 'cubic'):
+            test = interp_masked1d(x, kind)
+            assert_almost_equal(interp_masked1d(x.T, kind, axis=1), test.T)
+            for j in range(3):
+                assert_almost_equal(test[:, j], interp_masked1d(x[:, j], kind))
+        test = interp_masked1d(x, 'linear')
+        for j in range(3):
+            unmasked = (~x.mask[:, j]).nonzero()[0]
+            assert_almost_equal(test[:, j],
+                                np.interp(np.arange(50), unmasked,
+                                          x.data[unmasked, j]))
+        # Slices with too few unmasked values are left untouched
+        x[:, 1] = masked
+        x[5, 1] = 1
+        for kind in ('constant', 'linear', 'cubic'):
+            assert_equal(interp_masked1d(x, kind)[:, 1], x[:, 1])
+
+    def test_interp_neighbors(self):
+        "Test the interpolation by local splines"
+        x = ma.array(np.sin(np.linspace(0, 10, 500)))
+        x[[3, 4, 5, 100, 250, 251, 498]] = masked
+        test = interp_masked1d(x, 'cubic', neighbors=5)
+        assert_almost_equal(test, interp_masked1d(x, 'cubic'), 6)
+        assert_almost_equal(test, np.sin(np.linspace(0, 10, 500)), 6)
+        assert_equal(test.mask, False)
+        self.failUnlessRaises(ValueError, interp_masked1d, x, 'cubic',
+                              neighbors=1)
+
     def test_forward_fill(self):
         x = ma.arange(20)
         x[(x%5 != 0)] = masked
@@ -95,6 +127,24 @@ class TestFuncs(TestCase):
         assert_equal(test._mask, [1,0,0,0,0,0,0,0,0,0,
                                   0,0,0,0,0,0,0,0,0,0,])
 
+    def test_fill_axis(self):
+        "Test forward_fill and backward_fill along an axis of a 2D array"
+        x = ma.array(np.random.rand(30, 4), mask=(np.random.rand(30, 4) < .4))
+        for func in (forward_fill, backward_fill):
+            for maxgap in (None, 2):
+                test = func(x, maxgap)
+                assert_equal(test.shape, x.shape)
+                assert_equal(func(x.T, maxgap, axis=1), test.T)
+                for j in range(4):
+                    assert_equal(test[:, j].data, func(x[:, j], maxgap).data)
+                    assert_equal(test[:, j].mask, func(x[:, j], maxgap).mask)
+        # Columns filled independently
+        x = ma.array([[1, 2], [3, 4], [5, 6]], mask=[[0, 1], [1, 0], [1, 1]])
+        assert_equal(forward_fill(x), [[1, 2], [1, 4], [1, 4]])
+        assert_equal(forward_fill(x).mask, [[0, 1], [0, 0], [0, 0]])
+        assert_equal(backward_fill(x, axis=1), [[1, 2], [4, 4], [5, 6]])
+        assert_equal(backward_fill(x, axis=1).mask, [[0, 1], [0, 0], [1, 1]])
+
 ###############################################################################
 #------------------------------------------------------------------------------
 if __name__ == "__main__":
@@ -10,6 +10,8 @@ __revision__ = "$Revision: 2819 $"
 __date__     = '$Date: 2007-03-03 18:00:20 -0500 (Sat, 03 Mar 2007) $'
 
 
+from datetime import timedelta
+
 import numpy as np
 
 from numpy.testing import *
@@ -87,6 +89,31 @@ class TestCMovAverage(TestCase):
             m[:k] = m[-k:] = m[10-k:10+k+1] = True
             assert_equal(ravg._mask, m)
             assert_equal(ravg._dates, data._dates)
+    #
+    def test_cmov_window(self):
+        "Test cmov_window with small (direct) and large (FFT) windows"
+        from scipy.signal import get_window
+        data = ma.array(np.random.rand(3000, 3))
+        data[[100, 2000], [0, 2]] = masked
+        for (span, window_type) in [(5, 'hamming'), (501, 'blackman'),
+                                    (1001, ('gaussian', 100.))]:
+            window = get_window(window_type, span, fftbins=False)
+            k = span // 2
+            result = mf.cmov_window(data, span, window_type)
+            for j in range(3):
+                assert_almost_equal(result[:, j].filled(0),
+                                    ma.array(np.convolve(data.data[:, j],
+                                                         window)[k:k+3000]
+                                             / span,
+                                             mask=result.mask[:, j]).filled(0))
+                # Masked wherever a nonzero coefficient meets a masked value
+                expected = np.convolve(data.mask[:, j], window)[k:k+3000] > 0
+                expected[:k] = expected[-k:] = True
+                assert_equal(result.mask[:, j], expected)
+            assert_equal(result[:, 1], mf.cmov_window(data[:, 1], span,
+                                                      window_type))
+        self.failUnlessRaises(ValueError, mf.cmov_window,
+                              np.zeros((5, 5, 5)), 3, 'boxcar')
 
 
 
@@ -149,6 +176,100 @@ class TestMovFuncs(TestCase):
                 assert_equal(result._mask, result_mask)
                 assert_equal(result._dates, data._dates)
 
+    #
+    def test_onndarray(self):
+        "Test the moving functions along an axis of N-D arrays"
+        data = ma.array(np.random.rand(4, 25, 3))
+        data[1, 10, 2] = data[3, 5, 0] = masked
+        funcs = [mf.mov_sum, mf.mov_median, mf.mov_min, mf.mov_std,
+                 mf.mov_rank, mf.mov_average_expw,
+                 (lambda x, span, axis=0:
+                        mf.mov_quantile(x, span, 0.3, axis=axis))]
+        for mfunc in funcs:
+            for axis in (1, -2):
+                result = mfunc(data, 4, axis=axis)
+                assert_equal(result.shape, data.shape)
+                for (i, j) in np.ndindex(4, 3):
+                    assert_equal(result[i, :, j], mfunc(data[i, :, j], 4))
+            # Non-contiguous data
+            result = mfunc(data.T, 4, axis=1)
+            for (i, j) in np.ndindex(3, 4):
+                assert_equal(result[i, :, j], mfunc(data[j, :, i], 4))
+        (x, y) = (data[0], data[1] * 2 + data[2])
+        assert_almost_equal(mf.mov_corr(x, y, 5, axis=1),
+                            mf.mov_corr(x.T, y.T, 5).T)
+        # TimeSeries keep their dates
+        series = ts.time_series(data[0], start_date=ts.now('D'))
+        result = mf.mov_average(series, 3)
+        assert_equal(result._dates, series._dates)
+        for j in range(3):
+            assert_equal(result[:, j], mf.mov_average(series[:, j], 3))
+
+    def test_nthreads(self):
+        "Test that the moving functions do not depend on the number of threads"
+        data = ma.array(np.random.rand(300, 7))
+        data[10, 2] = data[100:120, 5] = masked
+        funcs = [mf.mov_sum, mf.mov_median, mf.mov_minmax, mf.mov_var,
+                 mf.mov_average_expw,
+                 (lambda x, span, nthreads=1:
+                        mf.mov_corr(x, x[::-1], span, nthreads=nthreads)),
+                 (lambda x, span, nthreads=1:
+                        mf.mov_corr(x * 1j, x[::-1], span, nthreads=nthreads))]
+        for mfunc in funcs:
+            serial = mfunc(data, 12)
+            for nthreads in (2, 3, 20):
+                result = mfunc(data, 12, nthreads=nthreads)
+                if isinstance(serial, tuple):
+                    for (s, r) in zip(serial, result):
+                        assert_equal(r, s)
+                else:
+                    assert_equal(result, serial)
+        self.failUnlessRaises(ValueError, mf.mov_sum, data, 12, nthreads=0)
+
+    def test_span_over_dates(self):
+        "Test the moving functions over a duration on a series with gaps"
+        dates = ts.date_array(['2001-01-%02i' % i
+                               for i in (1, 2, 3, 7, 8, 12, 13, 14, 20)],
+                              freq='D')
+        series = ts.time_series(np.random.rand(9), dates=dates)
+        series[4] = masked
+        windows = [None, None, None, (2, 4), None, None, (5, 7), (5, 8),
+                   (8, 9)]
+        for (mfunc, nfunc) in [(mf.mov_sum, np.sum), (mf.mov_average, np.mean),
+                               (mf.mov_median, np.median),
+                               (mf.mov_max, np.max), (mf.mov_std, np.std)]:
+            result = mfunc(series, ('D', 5))
+            assert_equal(result._dates, series._dates)
+            for (i, window) in enumerate(windows):
+                if window is None:
+                    self.failUnless(result[i] is masked)
+                else:
+                    assert_almost_equal(result[i],
+                                        nfunc(series._data[slice(*window)]))
+            assert_equal(mfunc(series, timedelta(days=5)), result)
+        # Windows of a single point
+        result = mf.mov_cov(series, series * 2, ('D', 3))
+        assert_equal(result._mask, [1, 1, 0, 1, 1, 1, 0, 0, 1])
+        assert_almost_equal(result[2], np.cov(series._data[:3],
+                                              series._data[:3] * 2)[0, 1])
+        assert_equal(mf.mov_var(series, ('D', 3))[[3, 8]], [0, 0])
+        self.failUnlessRaises(TypeError, mf.mov_var, series.astype(complex),
+                              ('D', 3))
+        # Regular series
+        series = ts.time_series(np.random.rand(20), start_date=dates[0])
+        for mfunc in (mf.mov_sum, mf.mov_average, mf.mov_median, mf.mov_max,
+                      mf.mov_std):
+            for n in (1, 3, 5):
+                result = mfunc(series, ('D', n))
+                assert_equal(result._mask, [1] * (n - 1) + [0] * (21 - n))
+                assert_equal(mfunc(series, timedelta(days=n)), result)
+                assert_equal(mfunc(series, ('H', 24 * n)), result)
+        assert_almost_equal(mf.mov_var(series, ('D', 4)),
+                            mf.mov_var(series, 4))
+        # the current and previous weeks, masked during the first week
+        assert_equal(mf.mov_min(series, ('W', 2)).count(), 13)
+        self.failUnlessRaises(TypeError, mf.mov_sum, series._series, ('D', 4))
+
     def test_cov(self):
         "Test that  the covariance of series with itself is equal to variance"
         data = self.maskeddata
@@ -204,6 +325,168 @@ class TestMovFuncs(TestCase):
         assert_almost_equal(res_a, res_b)
 
 
+    def test_mov_sum_dtypes(self):
+        "Test mov_sum on the different numerical types"
+        data = ma.array([1, 2, 3, 4, 5, 6, 7, 8],
+                        mask=[0, 0, 0, 0, 1, 0, 0, 0])
+        control = ma.array([0, 0, 6, 9, 0, 0, 0, 21],
+                           mask=[1, 1, 0, 0, 1, 1, 1, 0])
+        for dtype in (np.int8, np.uint8, np.int16, np.int32, np.int64,
+                      np.uint64, np.float32, np.float64, np.longdouble):
+            test = mf.mov_sum(data.astype(dtype), 3)
+            assert_equal(test, control)
+            assert_equal(test.dtype, np.dtype(dtype))
+        # Floats summed as integers are only converted at the end
+        test = mf.mov_sum(data * 0.5, 3, dtype=int)
+        assert_equal(test, ma.array([0, 0, 3, 4, 0, 0, 0, 10],
+                                    mask=control.mask))
+
+
+    def test_mov_sum_compensated(self):
+        "Test the compensated summation of mov_sum"
+        np.random.seed(0)
+        (n, span) = (100000, 10)
+        data = np.random.rand(n) * 10.**np.random.randint(-3, 6, n)
+        windows = np.lib.stride_tricks.as_strided(data, shape=(n-span+1, span),
+                                                  strides=(8, 8))
+        control = windows.astype(np.longdouble).sum(1).astype(float)
+        plain = mf.mov_sum(data, span)[span-1:]
+        test = mf.mov_sum(data, span, compensated=True)
+        assert_equal(test.mask, [1] * (span-1) + [0] * (n-span+1))
+        error = np.abs(test[span-1:] - control).max()
+        self.failUnless(error < 1e-9)
+        self.failUnless(error <= np.abs(plain - control).max())
+        assert_almost_equal(mf.mov_average(data, span, compensated=True),
+                            mf.mov_average(data, span))
+
+
+    def test_mov_quantile(self):
+        "Test mov_quantile"
+        data = ma.array(np.random.rand(50))
+        data[[10, 25]] = masked
+        for k in [1, 4, 5]:
+            for q in [0, 0.25, 0.5, 0.8, 1]:
+                result = mf.mov_quantile(data, k, q)
+                result_mask = np.array([1]*(k-1)+[0]*(len(data)-k+1))
+                result_mask[10:10+k] = result_mask[25:25+k] = 1
+                assert_equal(result._mask, result_mask)
+                for x in range(len(data)-k+1):
+                    if result[x+k-1] is not ma.masked:
+                        window = np.sort(data[x:x+k])
+                        (lo, frac) = divmod((k-1)*q, 1)
+                        control = window[int(lo)]
+                        if frac:
+                            control += frac * (window[int(lo)+1] - control)
+                        assert_almost_equal(result[x+k-1], control)
+            assert_equal(mf.mov_quantile(data, k, 0.5), mf.mov_median(data, k))
+        # Masked values are excluded from the windows
+        data = ma.array([1, 9, 2, 3], mask=[0, 1, 0, 0])
+        assert_equal(mf.mov_quantile(data, 3, 1).data[-1], 3)
+        # Non-interpolated quantiles keep the precision of the input
+        data = np.array([2**60+257, 2**60+769, 2**60+513], dtype=np.int64)
+        assert_equal(mf.mov_quantile(data, 3, 0.5, dtype=np.int64)[-1],
+                     2**60+513)
+        self.failUnlessRaises(ValueError, mf.mov_quantile, data, 3, 1.5)
+
+
+    def test_mov_rank(self):
+        "Test mov_rank"
+        data = ma.array([3, 1, 2, 2, 5, 0, 4], mask=[0, 0, 0, 0, 0, 1, 0])
+        result = mf.mov_rank(data, 3)
+        assert_equal(result, ma.array([0, 0, 2, 2.5, 3, 0, 0],
+                                      mask=[1, 1, 0, 0, 0, 1, 1]))
+        assert_equal(result.data[-1], 1)
+        assert_equal(result.dtype, np.float_)
+
+
+    def test_mov_minmax(self):
+        "Test mov_min, mov_max and mov_minmax"
+        data = ma.array(np.random.randint(-50, 50, 100))
+        data[[10, 60, 61]] = masked
+        for k in [1, 3, 10]:
+            (minimum, maximum) = mf.mov_minmax(data, k)
+            assert_equal(minimum, mf.mov_min(data, k))
+            assert_equal(maximum, mf.mov_max(data, k))
+            assert_equal(minimum.dtype, data.dtype)
+            result_mask = np.array([1]*(k-1)+[0]*(len(data)-k+1))
+            result_mask[10:10+k] = result_mask[60:61+k] = 1
+            assert_equal(minimum._mask, result_mask)
+            assert_equal(maximum._mask, result_mask)
+            for x in range(len(data)-k+1):
+                if not result_mask[x+k-1]:
+                    assert_equal(minimum[x+k-1], data[x:x+k].min())
+                    assert_equal(maximum[x+k-1], data[x:x+k].max())
+        # Masked values are excluded from the windows
+        data = ma.array([3., 1e10, -1e10, 4.], mask=[0, 1, 1, 0])
+        (minimum, maximum) = mf.mov_minmax(data, 4)
+        assert_equal((minimum.data[-1], maximum.data[-1]), (3, 4))
+        # The extrema are converted after being found
+        assert_equal(mf.mov_max(np.array([-1, 2]), 2, dtype=np.uint8)[-1], 2)
+
+
+    def test_mov_regress(self):
+        "Test mov_corr, mov_beta and mov_regress"
+        x = ma.array(np.random.rand(50))
+        y = ma.array(3. * x.data - 2 + np.random.rand(50) * 0.1)
+        x[10] = y[30] = masked
+        k = 5
+        corr = mf.mov_corr(x, y, k)
+        beta = mf.mov_beta(x, y, k)
+        (slope, intercept) = mf.mov_regress(x, y, k)
+        assert_equal(slope, beta)
+        result_mask = np.array([1]*(k-1)+[0]*(len(x)-k+1))
+        result_mask[10:10+k] = result_mask[30:30+k] = 1
+        for result in (corr, beta, intercept):
+            assert_equal(result._mask, result_mask)
+        for i in range(len(x)-k+1):
+            if result_mask[i+k-1]:
+                continue
+            (xw, yw) = (x[i:i+k], y[i:i+k])
+            assert_almost_equal(corr[i+k-1], np.corrcoef(xw, yw)[0, 1])
+            control = np.polyfit(xw, yw, 1)
+            assert_almost_equal(beta[i+k-1], control[0])
+            assert_almost_equal(intercept[i+k-1], control[1])
+
+
+    def test_mov_var_large_values(self):
+        "Test the stability of mov_var with values of large magnitude"
+        data = 1e6 + np.random.rand(1000)
+        result = mf.mov_var(data, 10)
+        for i in range(len(data)-9):
+            assert_almost_equal(result[i+9], (data[i:i+10]-1e6).var())
+        assert_almost_equal(mf.mov_std(data, 10), np.sqrt(result))
+
+
+    def test_mov_moments_degenerate(self):
+        "Test that the undefined moving moments are masked"
+        # Too few values for the degrees of freedom
+        x = ma.array([1., 2, 3])
+        assert_equal(mf.mov_var(x, 1, ddof=1)._mask, [1, 1, 1])
+        assert_equal(mf.mov_std(x, 2, ddof=2)._mask, [1, 1, 1])
+        assert_equal(mf.mov_cov(np.arange(5.), np.arange(5.)**2, 1)._mask,
+                     [1, 1, 1, 1, 1])
+        # Constant windows
+        x = ma.array([1., 1, 1, 2, 3, 5, 5, 5, 5, 6])
+        y = np.random.rand(10)
+        corr = mf.mov_corr(x, y, 3)
+        assert_equal(corr._mask, [1, 1, 1, 0, 0, 0, 0, 1, 1, 0])
+        assert_almost_equal(corr[3], np.corrcoef(x[1:4], y[1:4])[0, 1])
+        assert_equal(mf.mov_corr(y, x, 3)._mask, corr._mask)
+        (beta, alpha) = mf.mov_regress(x, y, 3)
+        assert_equal(beta._mask, corr._mask)
+        assert_equal(alpha._mask, corr._mask)
+        assert_equal(mf.mov_beta(y, x, 3)._mask, [1, 1, 0, 0, 0, 0, 0, 0, 0, 0])
+        assert_almost_equal(mf.mov_var(x, 3)[2:], [0, 2./9, 2./3, 14./9,
+                                                   8./9, 0, 0, 2./9])
+        # Windows becoming constant after the updates
+        x = ma.array(np.random.rand(100))
+        x[50:70] = 0.3
+        corr = mf.mov_corr(x, np.random.rand(100), 10)
+        assert_equal(corr._mask[59:70], True)
+        assert_equal(corr._mask[70:], False)
+        assert_equal(mf.mov_var(x, 10)[59:70], 0)
+
+
     def test_mov_average_expw(self):
         "Test mov_average_expw"
         ser_a = ma.array(range(150), dtype=np.float32)
@@ -234,6 +517,125 @@ class TestMovFuncs(TestCase):
         assert_not_equal(test.mask, series.mask)
         assert_equal(series.mask, controlmask)
 
+    def test_mov_average_expw_alpha(self):
+        "Test the parameterisations of the smoothing factor of mov_average_expw"
+        data = ma.array(np.random.rand(50, 2))
+        data[[3, 4, 30], [0, 0, 1]] = masked
+        result = mf.mov_average_expw(data, 9, tol=0.01)
+        assert_equal(mf.mov_average_expw(data, alpha=0.2, tol=0.01), result)
+        assert_almost_equal(mf.mov_average_expw(data, com=4, tol=0.01),
+                            result)
+        halflife = np.log(0.5) / np.log(0.8)
+        assert_almost_equal(mf.mov_average_expw(data, halflife=halflife,
+                                                tol=0.01),
+                            result)
+        # Brute force, along with the weight of the masked values
+        (average, weight) = (data[0].filled(0), 1.)
+        for i in range(1, 50):
+            average = np.where(data.mask[i], average,
+                               average + 0.2 * (data[i].filled(0) - average))
+            weight = weight + 0.2 * (~data.mask[i] - weight)
+            assert_almost_equal(result.data[i], average)
+            assert_equal(result.mask[i], data.mask[i] | (1 - weight > 0.01))
+        self.failUnlessRaises(ValueError, mf.mov_average_expw, data)
+        self.failUnlessRaises(ValueError, mf.mov_average_expw, data, 9,
+                              alpha=0.2)
+        self.failUnlessRaises(ValueError, mf.mov_average_expw, data,
+                              alpha=1.5)
+
+
+
+
+class TestMovingWindow(TestCase):
+
+    def setUp(self):
+        data = ma.array(np.random.rand(60) * 100)
+        data[[7, 30, 31, 52]] = masked
+        self.data = data
+
+    def test_replay(self):
+        "Test that replaying a series gives the results of the batch functions"
+        data = self.data
+        for span in (1, 4, 5):
+            for (kind, mfunc) in [('sum', mf.mov_sum),
+                                  ('average', mf.mov_average),
+                                  ('var', mf.mov_var),
+                                  ('std', mf.mov_std),
+                                  ('median', mf.mov_median),
+                                  ('min', mf.mov_min),
+                                  ('max', mf.mov_max),
+                                  ('average_expw', mf.mov_average_expw)]:
+                result = mf.MovingWindow(kind, span).push_many(data)
+                assert_almost_equal(result, mfunc(data, span))
+        result = mf.MovingWindow('var', 5, ddof=1).push_many(data)
+        assert_almost_equal(result, mf.mov_var(data, 5, ddof=1))
+
+    def test_push(self):
+        "Test pushing values one at a time"
+        window = mf.MovingWindow('median', 3)
+        self.failUnless(window.value is masked)
+        for value in (3, 1):
+            self.failUnless(window.push(value) is masked)
+        assert_equal(window.push(2), 2)
+        assert_equal(window.push(10), 2)
+        self.failUnless(window.push(masked) is masked)
+        self.failUnless(window.push(1, masked=True) is masked)
+        self.failUnless(window.push(4) is masked)
+        assert_equal(window.push(5), masked)
+        assert_equal([window.push(v) for v in (7, 6)], [5, 6])
+        assert_equal(window.count, 10)
+        window.reset()
+        self.failUnless(window.push(1) is masked)
+        self.failUnlessRaises(ValueError, mf.MovingWindow, 'mode', 3)
+
+    def test_median(self):
+        "Test the moving median of a long stream with ties"
+        data = ma.array(np.random.randint(0, 5, 2000).astype(float))
+        data[np.random.rand(2000) < 0.02] = masked
+        for span in (2, 3, 50):
+            window = mf.MovingWindow('median', span)
+            assert_equal(window.push_many(data), mf.mov_median(data, span))
+            # the removed values do not pile up in the heaps
+            self.failUnless(len(window._lower) + len(window._upper)
+                            <= 2 * span + 1)
+        self.failUnless(mf.MovingWindow.__doc__ is not None)
+
+    def test_push_invalid(self):
+        "Test that NaNs and infinities are pushed as masked values"
+        data = np.array([1., np.nan, 2, 3, 4, np.inf, 5, 6, 7])
+        for (kind, mfunc) in [('average', mf.mov_average),
+                              ('median', mf.mov_median),
+                              ('std', mf.mov_std),
+                              ('max', mf.mov_max)]:
+            result = mf.MovingWindow(kind, 3).push_many(data)
+            assert_equal(result._mask, [1, 1, 1, 1, 0, 1, 1, 1, 0])
+            assert_almost_equal(result, mfunc(data, 3))
+        window = mf.MovingWindow('median', 3)
+        for value in (1., np.nan, 2, 3):
+            window.push(value)
+        assert_equal(window.push(10.), 3)
+
+    def test_ddof(self):
+        "Test that the variance is masked without enough degrees of freedom"
+        for kind in ('var', 'std'):
+            window = mf.MovingWindow(kind, 1, ddof=1)
+            self.failUnless(window.push(1.) is masked)
+            result = window.push_many(self.data)
+            assert_equal(result._mask, True)
+        result = mf.MovingWindow('var', 2, ddof=2).push_many(self.data)
+        assert_equal(result._mask, mf.mov_var(self.data, 2, ddof=2)._mask)
+
+    def test_pickle(self):
+        "Test that the state of a window can be pickled"
+        import cPickle
+        data = self.data
+        for kind in ('sum', 'std', 'median', 'max', 'average_expw'):
+            window = mf.MovingWindow(kind, 5)
+            window.push_many(data[:40])
+            restored = cPickle.loads(cPickle.dumps(window))
+            assert_equal(restored.push_many(data[40:]),
+                         window.push_many(data[40:]))
+
 
 
 #------------------------------------------------------------------------------
@@ -10,14 +10,15 @@ Please see license.txt for more details.
 """
 
 __all__ = [
-'DateFromString', 'DateTimeFromString'
+'DateFromString', 'DateTimeFromString', 'DateTimeParser'
            ]
 
 import types
 import re
+import string
 import datetime as dt
 
-class RangeError(Exception): pass
+class RangeError(ValueError): pass
 
 # Enable to produce debugging output
 _debug = 0
@@ -321,7 +322,7 @@ def add_century(year):
         return year - 100
 
 
-def _parse_date(text):
+def _parse_date(text, formats=None):
     """
     Parses the date part given in text and returns a tuple
     (text,day,month,year,style) with the following meanings:
@@ -357,7 +358,8 @@ def _parse_date(text):
     match = None
     style = ''
 
-    formats = _date_formats
+    if formats is None:
+        formats = _date_formats
 
     us_formats=('us', 'altus')
     iso_formats=('iso', 'altiso', 'usiso')
@@ -555,7 +557,7 @@ def _parse_date(text):
     #print '_parse_date:',text,day,month,year,style
     return text,day,month,year,style
 
-def _parse_time(text):
+def _parse_time(text, formats=None):
 
     """ Parses a time part given in text and returns a tuple
         (text,hour,minute,second,offset,style) with the following
@@ -581,7 +583,8 @@ def _parse_time(text):
     match = None
     style = ''
 
-    formats=_time_formats
+    if formats is None:
+        formats = _time_formats
 
     # Apply parsers in the order given in formats
     for format in formats:
@@ -749,6 +752,140 @@ def DateFromString(text):
         raise RangeError,\
               'Failed to parse "%s": %s' % (text, why)
 
+# Translation table giving the shape of a string: digits are replaced by 0
+_shape_table = string.maketrans(string.digits + string.ascii_uppercase,
+                                '0' * 10 + string.ascii_lowercase)
+
+class DateTimeParser(object):
+
+    """ DateTimeParser(dates_only=False, cachesize=1024)
+
+        Stateful version of DateTimeFromString() (or DateFromString()
+        if dates_only is True), for sequences of strings sharing the
+        same format.
+
+        The parser records the styles of the date and time parts that
+        were successful on a string, and tries them first on the next
+        strings with the same shape (same letters and separators, with
+        digits at the same positions). The catch-all 'year' and
+        'unknown' styles are never tried first.
+
+        The results for the last cachesize strings that were parsed
+        are cached.
+
+    """
+
+    # Styles that should never be tried first
+    _fallback_styles = ('year', 'unknown')
+    # Maximum number of shapes to remember
+    _maxshapes = 64
+
+    def __init__(self, dates_only=False, cachesize=1024):
+
+        self.dates_only = dates_only
+        self.cachesize = cachesize
+        self.date_style = None
+        self.time_style = None
+        self._formats = {}
+        self._cache = {}
+        self._tick = 0
+
+    def __call__(self, text):
+
+        """ Returns a datetime instance reflecting the date (and time)
+            given in text.
+        """
+        cache = self._cache
+        self._tick += 1
+        entry = cache.get(text)
+        if entry is not None:
+            entry[1] = self._tick
+            return entry[0]
+        # Get the parsers to try first for strings of this shape
+        if isinstance(text, str):
+            shape = text.translate(_shape_table)
+        else:
+            shape = None
+        formats = self._formats.get(shape)
+        if formats is None:
+            formats = (_date_formats, _time_formats, None, None)
+        if self.dates_only:
+            result = self._date_from_string(text, formats[0])
+        else:
+            result = self._datetime_from_string(text, formats[0], formats[1])
+        if (shape is not None) and \
+           ((self.date_style, self.time_style) != formats[2:]):
+            self._set_formats(shape)
+        # Update the cache
+        if self.cachesize > 0:
+            if len(cache) >= self.cachesize:
+                self._shrink_cache()
+            cache[text] = [result, self._tick]
+        return result
+
+    def _shrink_cache(self):
+
+        """ Removes the least recently used half of the cache.
+        """
+        cache = self._cache
+        ticks = sorted([entry[1] for entry in cache.itervalues()])
+        threshold = ticks[len(ticks) // 2]
+        for (text, entry) in cache.items():
+            if entry[1] < threshold:
+                del cache[text]
+
+    def _set_formats(self, shape):
+
+        """ Puts the last successful styles first in the parsers to use
+            for strings of the given shape.
+        """
+        (date_formats, time_formats) = (_date_formats, _time_formats)
+        if self.date_style not in self._fallback_styles:
+            date_formats = (self.date_style,) + \
+                tuple([f for f in _date_formats if f != self.date_style])
+        if self.time_style not in self._fallback_styles + (None,):
+            time_formats = (self.time_style,) + \
+                tuple([f for f in _time_formats if f != self.time_style])
+        if len(self._formats) >= self._maxshapes:
+            self._formats.clear()
+        self._formats[shape] = (date_formats, time_formats,
+                                self.date_style, self.time_style)
+
+    def _date_from_string(self, text, date_formats):
+
+        _text,day,month,year,datestyle = _parse_date(text, date_formats)
+        self.date_style = datestyle
+        try:
+            return dt.datetime(year,month,day)
+        except ValueError, why:
+            raise RangeError,\
+                  'Failed to parse "%s": %s' % (text, why)
+
+    def _datetime_from_string(self, text, date_formats, time_formats):
+
+        origtext = text
+
+        text,hour,minute,second,offset,timestyle = _parse_time(origtext,
+                                                               time_formats)
+        text,day,month,year,datestyle = _parse_date(text, date_formats)
+
+        # If this fails, try the ISO order (date, then time)
+        if timestyle in ('iso', 'unknown'):
+            text,day,month,year,datestyle = _parse_date(origtext,
+                                                        date_formats)
+            text,hour,minute,second,offset,timestyle = _parse_time(text,
+                                                                   time_formats)
+        (self.date_style, self.time_style) = (datestyle, timestyle)
+
+        try:
+            microsecond = int(1000000 * (second % 1))
+            second = int(second)
+            return dt.datetime(year,month,day,hour,minute,second, microsecond) - \
+                                            dt.timedelta(minutes=offset)
+        except ValueError, why:
+            raise RangeError,\
+                  'Failed to parse "%s": %s' % (origtext, why)
+
 def validateDateTimeString(text):
 
     """ validateDateTimeString(text, [formats, defaultdate])
@@ -1363,6 +1363,59 @@ DateObject_New(void) {
 
 #define INIT_ERR(errortype, errmsg) PyErr_SetString(errortype,errmsg);return -1
 
+/* Computes the value at the frequency freq of the date defined by its
+   fields. Returns -1 (with an exception set) if the date is invalid */
+static int
+date_value_from_fields(int freq, int year, int month, int quarter, int day,
+                       int hour, int minute, int second, long *value)
+{
+    int freq_group = get_freq_group(freq);
+    long absdays, delta;
+
+    if (freq_group == FR_ANN) {
+        *value = year;
+        return 0;
+    } else if (freq_group == FR_QTR) {
+        if ((freq - freq_group) > 12) {
+            // quarterly frequency with year determined by ending period
+            *value = year*4 + quarter;
+        } else {
+            /* quarterly frequency with year determined by ending period
+               or has December year end*/
+            *value = (year-1)*4 + quarter;
+        }
+        return 0;
+    } else if (freq == FR_MTH) {
+        *value = (year-1)*12 + month;
+        return 0;
+    }
+
+    if ((absdays = absdate_from_ymd(year, month, day)) == INT_ERR_CODE) {
+        return -1;
+    }
+    delta = (absdays - HIGHFREQ_ORIG);
+
+    if (freq == FR_SEC) {
+        *value = (int)(delta*86400 + hour*3600 + minute*60 + second + 1);
+    } else if (freq == FR_MIN) {
+        *value = (int)(delta*1440 + hour*60 + minute + 1);
+    } else if (freq == FR_HR) {
+        *value = (int)(delta*24 + hour + 1);
+    } else if (freq == FR_BUS) {
+        *value = (int)(absdays - (absdays/7)*2);
+    } else if (freq_group == FR_WK) {
+        int adj_ordinal, ordinal, day_adj;
+        ordinal = (int)absdays;
+        day_adj = (7 - (freq - FR_WK)) % 7;
+        adj_ordinal = ordinal + ((7 - day_adj) - ordinal % 7) % 7;
+        *value = adj_ordinal/7;
+    } else {
+        // FR_DAY, FR_UND
+        *value = (int)absdays;
+    }
+    return 0;
+}
+
 static int
 DateObject_init(DateObject *self, PyObject *args, PyObject *kwds) {
 
@@ -1514,49 +1567,11 @@ DateObject_init(DateObject *self, PyObject *args, PyObject *kwds) {
 
         }
 
-        if (self->freq == FR_SEC) {
-            long absdays, delta;
-            absdays = absdate_from_ymd(year, month, day);
-            delta = (absdays - HIGHFREQ_ORIG);
-            self->value = (int)(delta*86400 + hour*3600 + minute*60 + second + 1);
-        } else if (self->freq == FR_MIN) {
-            long absdays, delta;
-            absdays = absdate_from_ymd(year, month, day);
-            delta = (absdays - HIGHFREQ_ORIG);
-            self->value = (int)(delta*1440 + hour*60 + minute + 1);
-        } else if (self->freq == FR_HR) {
-            long absdays, delta;
-            if((absdays = absdate_from_ymd(year, month, day)) == INT_ERR_CODE) return -1;
-            delta = (absdays - HIGHFREQ_ORIG);
-            self->value = (int)(delta*24 + hour + 1);
-        } else if (self->freq == FR_DAY) {
-            if((self->value = (int)absdate_from_ymd(year, month, day)) == INT_ERR_CODE) return -1;
-        } else if (self->freq == FR_UND) {
-            if((self->value = (int)absdate_from_ymd(year, month, day)) == INT_ERR_CODE) return -1;
-        } else if (self->freq == FR_BUS) {
-            long weeks, days;
-            if((days = absdate_from_ymd(year, month, day)) == INT_ERR_CODE) return -1;
-            weeks = days/7;
-            self->value = (int)(days - weeks*2);
-        } else if (freq_group == FR_WK) {
-            int adj_ordinal, ordinal, day_adj;
-            if((ordinal = (int)absdate_from_ymd(year, month, day)) == INT_ERR_CODE) return -1;
-            day_adj = (7 - (self->freq - FR_WK)) % 7;
-            adj_ordinal = ordinal + ((7 - day_adj) - ordinal % 7) % 7;
-            self->value = adj_ordinal/7;
-        } else if (self->freq == FR_MTH) {
-            self->value = (year-1)*12 + month;
-        } else if (freq_group == FR_QTR) {
-            if ((self->freq - freq_group) > 12) {
-                // quarterly frequency with year determined by ending period
-                self->value = year*4 + quarter;
-            } else {
-                /* quarterly frequency with year determined by ending period
-                   or has December year end*/
-                self->value = (year-1)*4 + quarter;
-            }
-        } else if (freq_group == FR_ANN) {
-            self->value = year;
+        if (date_value_from_fields(self->freq, year, month, quarter, day,
+                                   hour, minute, second,
+                                   &(self->value)) < 0) {
+            if (free_dt) { Py_DECREF(datetime); }
+            return -1;
         }
 
     }
@@ -2327,13 +2342,6 @@ DateObject_weekday(DateObject *self, void *closure) {
     return PyInt_FromLong(dinfo.day_of_week);
 }
 
-static PyObject *
-DateObject_day_of_week(DateObject *self, void *closure) {
-    struct date_info dinfo;
-    if(DateObject_set_date_info(self, &dinfo) == -1) return NULL;
-    return PyInt_FromLong(dinfo.day_of_week);
-}
-
 static PyObject *
 DateObject_day_of_year(DateObject *self, void *closure) {
     struct date_info dinfo;
@@ -2657,323 +2665,419 @@ c_dates_now(PyObject *self, PyObject *args) {
 }
 
 
-PyObject *
-DateArray_asfreq(PyObject *self, PyObject *args)
-{
-    PyArrayObject *fromDates, *toDates;
-    PyArrayIterObject *iterFrom, *iterTo;
-    PyObject *fromDateObj, *toDateObj;
-    char *relation;
-    int fromFreq, toFreq;
-    long fromDate, toDate;
-    long (*asfreq_main)(long, char, asfreq_info*) = NULL;
-    asfreq_info af_info;
-
-    if (!PyArg_ParseTuple(args,
-                "Oiis:asfreq(fromDates, fromfreq, tofreq, relation)",
-                &fromDates, &fromFreq, &toFreq, &relation)) return NULL;
-
-    get_asfreq_info(fromFreq, toFreq, &af_info);
-
-    asfreq_main = get_asfreq_func(fromFreq, toFreq, 0);
-
-    toDates = (PyArrayObject *)PyArray_Copy(fromDates);
-
-    iterFrom = (PyArrayIterObject *)PyArray_IterNew((PyObject *)fromDates);
-    if (iterFrom == NULL) return NULL;
-
-    iterTo = (PyArrayIterObject *)PyArray_IterNew((PyObject *)toDates);
-    if (iterTo == NULL) return NULL;
-
-    while (iterFrom->index < iterFrom->size) {
-
-        fromDateObj = PyArray_GETITEM(fromDates, iterFrom->dataptr);
-        fromDate = PyInt_AsLong(fromDateObj);
-        CHECK_ASFREQ(toDate = asfreq_main(fromDate, relation[0], &af_info));
-        toDateObj = PyInt_FromLong(toDate);
+/* Kernels used by DateArray_asfreq. Except for ASFREQ_GENERIC, they only
+   involve integer arithmetic on the dates, and run without the GIL */
+enum {
+    ASFREQ_GENERIC,
+    ASFREQ_MONTHLY,         // between annual, quarterly and monthly
+    ASFREQ_DTOB,
+    ASFREQ_BTOD,
+    ASFREQ_HIGHFREQ_TO_D,   // from hourly, minutely or secondly to daily
+    ASFREQ_D_TO_HIGHFREQ
+};
 
-        PyArray_SETITEM(toDates, iterTo->dataptr, toDateObj);
+// minimum number of dates for releasing the GIL
+#define ASFREQ_THREADS_THRESHOLD 1000
 
-        Py_DECREF(fromDateObj);
-        Py_DECREF(toDateObj);
+static long floordiv(long a, long b) {
+    long q = a / b;
+    if ((a % b != 0) && ((a < 0) != (b < 0))) { q--; }
+    return q;
+}
 
-        PyArray_ITER_NEXT(iterFrom);
-        PyArray_ITER_NEXT(iterTo);
+static long periods_per_day(int freq_group) {
+    switch(freq_group)
+    {
+        case FR_HR: return 24;
+        case FR_MIN: return 24*60;
+        case FR_SEC: return 24*60*60;
+        default: return 1;
     }
-
-    Py_DECREF(iterFrom);
-    Py_DECREF(iterTo);
-
-    return (PyObject *)toDates;
-
 }
 
-/**************************************************************
-** The following functions are used by DateArray_getDateInfo **
-** to determine how many consecutive periods will have the   **
-** same result                                               **
-**************************************************************/
-
-// also used for qyear
-static int __skip_periods_year(int freq) {
-
-    int freq_group = get_freq_group(freq);
-
-    switch(freq_group)
+/* Helper function for DateArray_asfreq:
+    returns the 0-based index of the month (since January 0001) of an
+    annual, quarterly or monthly date, the first or last month of the period
+    depending on the relation */
+static long month_index(long fromDate, int fromGroup, char relation,
+                        asfreq_info *af_info) {
+    long offset;
+    switch(fromGroup)
     {
+        case FR_ANN:
+            offset = (af_info->from_a_year_end == 12) ? 0 : af_info->from_a_year_end - 12;
+            fromDate = 12 * (fromDate - 1) + offset;
+            return (relation == 'S') ? fromDate : fromDate + 11;
         case FR_QTR:
-            return 4;
-        case FR_MTH:
-            return 12;
-        case FR_WK:
-            return 51;
-        case FR_BUS:
-            return 260;
-        case FR_DAY:
-            return 365;
-        case FR_HR:
-            return 365*24;
-        case FR_MIN:
-            return 365*24*60;
-        case FR_SEC:
-            return 365*24*60*60;
+            offset = (af_info->from_q_year_end == 12) ? 0 : af_info->from_q_year_end - 12;
+            fromDate = 3 * (fromDate - 1) + offset;
+            return (relation == 'S') ? fromDate : fromDate + 2;
         default:
-            return 1;
+            return fromDate - 1;
     }
 }
 
-static int __skip_periods_quarter(int freq) {
-
-    int freq_group = get_freq_group(freq);
-
-    switch(freq_group)
+/* Helper function for DateArray_asfreq:
+    returns the annual, quarterly or monthly date of a month index */
+static long from_month_index(long index, int toGroup, asfreq_info *af_info) {
+    switch(toGroup)
     {
-        case FR_MTH:
-            return 3;
-        case FR_WK:
-            return 12;
-        case FR_BUS:
-            return 64;
-        case FR_DAY:
-            return 90;
-        case FR_HR:
-            return 90*24;
-        case FR_MIN:
-            return 90*24*60;
-        case FR_SEC:
-            return 90*24*60*60;
+        case FR_ANN:
+            return floordiv(index + 12 - af_info->to_a_year_end, 12) + 1;
+        case FR_QTR:
+            return floordiv(index + 12 - af_info->to_q_year_end, 3) + 1;
         default:
-            return 1;
+            return index + 1;
     }
 }
 
-static int __skip_periods_month(int freq) {
+static int get_asfreq_kernel(int fromGroup, int toGroup) {
 
-    int freq_group = get_freq_group(freq);
+    int fromLow = ((fromGroup == FR_ANN) || (fromGroup == FR_QTR) || (fromGroup == FR_MTH));
+    int toLow = ((toGroup == FR_ANN) || (toGroup == FR_QTR) || (toGroup == FR_MTH));
+    int fromHigh = ((fromGroup == FR_HR) || (fromGroup == FR_MIN) || (fromGroup == FR_SEC));
+    int toHigh = ((toGroup == FR_HR) || (toGroup == FR_MIN) || (toGroup == FR_SEC));
 
-    switch(freq_group)
-    {
-        case FR_WK:
-            return 3;
-        case FR_BUS:
-            return 20;
-        case FR_DAY:
-            return 28;
-        case FR_HR:
-            return 28*24;
-        case FR_MIN:
-            return 28*24*60;
-        case FR_SEC:
-            return 28*24*60*60;
-        default:
-            return 1;
-    }
+    if (fromLow && toLow) { return ASFREQ_MONTHLY; }
+    if ((fromGroup == FR_DAY) && (toGroup == FR_BUS)) { return ASFREQ_DTOB; }
+    if ((fromGroup == FR_BUS) && (toGroup == FR_DAY)) { return ASFREQ_BTOD; }
+    if (fromHigh && (toGroup == FR_DAY)) { return ASFREQ_HIGHFREQ_TO_D; }
+    if ((fromGroup == FR_DAY) && toHigh) { return ASFREQ_D_TO_HIGHFREQ; }
+    return ASFREQ_GENERIC;
 }
 
-// also used for day_of_year, day_of_week
-static int __skip_periods_day(int freq) {
+PyObject *
+DateArray_asfreq(PyObject *self, PyObject *args)
+{
+    PyObject *fromDates_arg, *fromDates=NULL, *toDates=NULL, *result;
+    char *relation;
+    int fromFreq, toFreq, fromGroup, toGroup, kernel, out_type;
+    long *from_data, *to_data, date, ppd;
+    npy_intp i, size;
+    long (*asfreq_main)(long, char, asfreq_info*) = NULL;
+    asfreq_info af_info;
+    NPY_BEGIN_THREADS_DEF;
 
-    int freq_group = get_freq_group(freq);
+    if (!PyArg_ParseTuple(args,
+                "Oiis:asfreq(fromDates, fromfreq, tofreq, relation)",
+                &fromDates_arg, &fromFreq, &toFreq, &relation)) return NULL;
 
-    switch(freq_group)
-    {
-        case FR_HR:
-            return 24;
-        case FR_MIN:
-            return 24*60;
-        case FR_SEC:
-            return 24*60*60;
-        default:
-            return 1;
+    // work on a contiguous array of longs, and cast back at the end
+    if (PyArray_Check(fromDates_arg)) {
+        out_type = ((PyArrayObject *)fromDates_arg)->descr->type_num;
+    } else {
+        out_type = NPY_LONG;
     }
-}
+    fromDates = PyArray_FROMANY(fromDates_arg, NPY_LONG, 0, 0, NPY_IN_ARRAY);
+    if (fromDates == NULL) { return NULL; }
+    toDates = PyArray_SimpleNew(PyArray_NDIM(fromDates),
+                                PyArray_DIMS(fromDates), NPY_LONG);
+    if (toDates == NULL) { goto fail; }
 
-static int __skip_periods_week(int freq) {
+    size = PyArray_SIZE(fromDates);
+    from_data = (long *)PyArray_DATA(fromDates);
+    to_data = (long *)PyArray_DATA(toDates);
 
-    int freq_group = get_freq_group(freq);
+    get_asfreq_info(fromFreq, toFreq, &af_info);
+    fromGroup = get_freq_group(fromFreq);
+    toGroup = get_freq_group(toFreq);
 
-    switch(freq_group)
-    {
-        case FR_BUS:
-            return 5;
-        case FR_DAY:
-            return 7;
-        case FR_HR:
-            return 7*24;
-        case FR_MIN:
-            return 7*24*60;
-        case FR_SEC:
-            return 7*24*60*60;
-        default:
-            return 1;
+    kernel = get_asfreq_kernel(fromGroup, toGroup);
+    // the closed forms are only valid for positive dates
+    for (i = 0; (kernel != ASFREQ_GENERIC) && (i < size); i++) {
+        if (from_data[i] < 1) { kernel = ASFREQ_GENERIC; }
     }
-}
 
-static int __skip_periods_hour(int freq) {
+    if (kernel == ASFREQ_GENERIC) {
+        asfreq_main = get_asfreq_func(fromFreq, toFreq, 0);
+        for (i = 0; i < size; i++) {
+            if ((to_data[i] = asfreq_main(from_data[i], relation[0],
+                                          &af_info)) == INT_ERR_CODE) {
+                goto fail;
+            }
+        }
+    } else {
+        if (size > ASFREQ_THREADS_THRESHOLD) { NPY_BEGIN_THREADS; }
+        switch(kernel)
+        {
+            case ASFREQ_MONTHLY:
+                for (i = 0; i < size; i++) {
+                    to_data[i] = from_month_index(
+                        month_index(from_data[i], fromGroup, relation[0], &af_info),
+                        toGroup, &af_info);
+                }
+                break;
+            case ASFREQ_DTOB:
+                for (i = 0; i < size; i++) {
+                    date = from_data[i];
+                    if (relation[0] == 'S') {
+                        to_data[i] = DtoB_WeekendToFriday(date, dInfoCalc_DayOfWeek(date));
+                    } else {
+                        to_data[i] = DtoB_WeekendToMonday(date, dInfoCalc_DayOfWeek(date));
+                    }
+                }
+                break;
+            case ASFREQ_BTOD:
+                for (i = 0; i < size; i++) {
+                    date = from_data[i] - 1;
+                    to_data[i] = (date / 5) * 7 + date % 5 + 1;
+                }
+                break;
+            case ASFREQ_HIGHFREQ_TO_D:
+                ppd = periods_per_day(fromGroup);
+                for (i = 0; i < size; i++) {
+                    to_data[i] = (from_data[i] - 1) / ppd + HIGHFREQ_ORIG;
+                }
+                break;
+            case ASFREQ_D_TO_HIGHFREQ:
+                ppd = periods_per_day(toGroup);
+                for (i = 0; i < size; i++) {
+                    date = from_data[i];
+                    if (date < HIGHFREQ_ORIG) { to_data[i] = -1; }
+                    else if (relation[0] == 'S') {
+                        to_data[i] = (date - HIGHFREQ_ORIG) * ppd + 1;
+                    } else {
+                        to_data[i] = (date - HIGHFREQ_ORIG + 1) * ppd;
+                    }
+                }
+                break;
+        }
+        NPY_END_THREADS;
+    }
 
-    int freq_group = get_freq_group(freq);
+    Py_DECREF(fromDates);
+    if (out_type == NPY_LONG) { return toDates; }
+    result = PyArray_Cast((PyArrayObject *)toDates, out_type);
+    Py_DECREF(toDates);
+    return result;
 
-    switch(freq_group)
-    {
-        case FR_MIN:
-            return 60;
-        case FR_SEC:
-            return 60*60;
-        default:
-            return 1;
-    }
+fail:
+    Py_XDECREF(fromDates);
+    Py_XDECREF(toDates);
+    return NULL;
 }
 
-static int __skip_periods_minute(int freq) {
+/**************************************************************
+** Calendar fields of arrays of dates                        **
+**************************************************************/
 
-    int freq_group = get_freq_group(freq);
+/* Fills `nfields` int32 fields of the records of `out` (one record of
+   `out_size` bytes per date) with the calendar information given by the
+   characters of `fields`:
+    Y: year, F: "fiscal" year, Q: quarter, M: month, D: day,
+    R: day of year, W: day of week, I: week of year,
+    H: hour, T: minute, S: second.
+   Each date is decomposed only once. As consecutive dates often share the
+   same day, the date part is only recomputed when the day changes. */
+static int
+fill_date_fields(long *dates, npy_intp size, int freq,
+                 char *fields, int nfields, char *out, npy_intp out_size)
+{
+    npy_intp i;
+    int k, need_time=0, need_qtr=0, qyear=0, quarter=0, qtr_freq;
+    long absdate, prev_absdate=0;
+    int has_prev=0;
+    npy_int32 *rec;
+    struct date_info dinfo;
+    long (*toDaily)(long, char, asfreq_info*) = NULL;
+    asfreq_info af_info, qtr_af_info;
+
+    for (k = 0; k < nfields; k++) {
+        switch(fields[k])
+        {
+            case 'Y': case 'M': case 'D': case 'R': case 'W': case 'I':
+                break;
+            case 'F': case 'Q':
+                need_qtr = 1;
+                break;
+            case 'H': case 'T': case 'S':
+                need_time = 1;
+                break;
+            default:
+                PyErr_Format(PyExc_ValueError,
+                             "Invalid date field code: '%c'", fields[k]);
+                return -1;
+        }
+    }
 
-    switch(freq_group)
-    {
-        case FR_SEC:
-            return 60;
-        default:
-            return 1;
+    if (freq != FR_DAY) {
+        toDaily = get_asfreq_func(freq, FR_DAY, 0);
+        get_asfreq_info(freq, FR_DAY, &af_info);
+    }
+    if (get_freq_group(freq) == FR_QTR) { qtr_freq = freq; }
+    else { qtr_freq = FR_QTR; }
+    get_asfreq_info(FR_DAY, qtr_freq, &qtr_af_info);
+
+    for (i = 0; i < size; i++) {
+        if (toDaily == NULL) { absdate = dates[i]; }
+        else { absdate = toDaily(dates[i], 'E', &af_info); }
+
+        if (!has_prev || (absdate != prev_absdate)) {
+            if (dInfoCalc_SetFromAbsDate(&dinfo, absdate,
+                                         GREGORIAN_CALENDAR)) return -1;
+            if (need_qtr) {
+                if (DtoQ_yq(absdate, &qtr_af_info, &qyear, &quarter) == INT_ERR_CODE)
+                { return -1; }
+                if ((qtr_freq % 1000) > 12) { qyear -= 1; }
+            }
+            prev_absdate = absdate;
+            has_prev = 1;
+        }
+        if (need_time) {
+            double abstime = getAbsTime(freq, absdate, dates[i]);
+            if ((abstime < 0.) || (abstime > SECONDS_PER_DAY)) {
+                PyErr_Format(DateCalc_Error,
+                             "abstime out of range (0.0 - 86400.0): %f",
+                             abstime);
+                return -1;
+            }
+            dInfoCalc_SetFromAbsTime(&dinfo, abstime);
+        }
+
+        rec = (npy_int32 *)(out + i * out_size);
+        for (k = 0; k < nfields; k++) {
+            switch(fields[k])
+            {
+                case 'Y': rec[k] = dinfo.year; break;
+                case 'F': rec[k] = qyear; break;
+                case 'Q': rec[k] = quarter; break;
+                case 'M': rec[k] = dinfo.month; break;
+                case 'D': rec[k] = dinfo.day; break;
+                case 'R': rec[k] = dinfo.day_of_year; break;
+                case 'W': rec[k] = dinfo.day_of_week; break;
+                case 'I': rec[k] = dInfoCalc_ISOWeek(&dinfo); break;
+                case 'H': rec[k] = dinfo.hour; break;
+                case 'T': rec[k] = dinfo.minute; break;
+                case 'S': rec[k] = (int)dinfo.second; break;
+            }
+        }
     }
+    return 0;
 }
 
 PyObject *
-DateArray_getDateInfo(PyObject *self, PyObject *args)
+DateArray_getDateFields(PyObject *self, PyObject *args)
 {
-    int freq, is_full, skip_periods, counter=1, val_changed=0;
-    char *info;
-
-    PyObject *prev_val=NULL;
-    PyArrayObject *array, *newArray;
-    PyArrayIterObject *iterSource, *iterResult;
-
-    PyObject* (*getDateInfo)(DateObject*, void*) = NULL;
-
-    if (!PyArg_ParseTuple(args, "Oisi:getDateInfo(array, freq, info, is_full)",
-                                &array, &freq, &info, &is_full)) return NULL;
-    newArray = (PyArrayObject *)PyArray_Copy(array);
+    PyObject *dates_arg, *dates;
+    PyArrayObject *out;
+    int freq, nfields;
+    char *fields;
 
-    iterSource = (PyArrayIterObject *)PyArray_IterNew((PyObject *)array);
-    iterResult = (PyArrayIterObject *)PyArray_IterNew((PyObject *)newArray);
+    if (!PyArg_ParseTuple(args,
+                "OisO!:getDateFields(array, freq, fields, out)",
+                &dates_arg, &freq, &fields, &PyArray_Type, &out)) return NULL;
 
+    nfields = (int)strlen(fields);
+    dates = PyArray_FROMANY(dates_arg, NPY_LONG, 0, 0, NPY_IN_ARRAY);
+    if (dates == NULL) { return NULL; }
 
-    switch(*info)
-    {
-        case 'Y': //year
-            getDateInfo = &DateObject_year;
-            skip_periods = __skip_periods_year(freq);
-            break;
-        case 'F': //"fiscal" year
-            getDateInfo = &DateObject_qyear;
-            skip_periods = __skip_periods_year(freq);
-            break;
-        case 'Q': //quarter
-            getDateInfo = &DateObject_quarter;
-            skip_periods = __skip_periods_quarter(freq);
-            break;
-        case 'M': //month
-            getDateInfo = &DateObject_month;
-            skip_periods = __skip_periods_month(freq);
-            break;
-        case 'D': //day
-            getDateInfo = &DateObject_day;
-            skip_periods = __skip_periods_day(freq);
-            break;
-        case 'R': //day of year
-            getDateInfo = &DateObject_day_of_year;
-            skip_periods = __skip_periods_day(freq);
-            break;
-        case 'W': //day of week
-            getDateInfo = &DateObject_day_of_week;
-            skip_periods = __skip_periods_day(freq);
-            break;
-        case 'I': //week of year
-            getDateInfo = &DateObject_week;
-            skip_periods = __skip_periods_week(freq);
-            break;
-        case 'H': //hour
-            getDateInfo = &DateObject_hour;
-            skip_periods = __skip_periods_hour(freq);
-            break;
-        case 'T': //minute
-            getDateInfo = &DateObject_minute;
-            skip_periods = __skip_periods_minute(freq);
-            break;
-        case 'S': //second
-            getDateInfo = &DateObject_second;
-            skip_periods = 1;
-            break;
-        default:
-            return NULL;
+    if (!PyArray_ISCARRAY(out) ||
+        (PyArray_SIZE(out) != PyArray_SIZE(dates)) ||
+        (out->descr->elsize != (int)(nfields * sizeof(npy_int32)))) {
+        PyErr_SetString(PyExc_ValueError,
+                        "the output should be a contiguous array with one "\
+                        "int32 field per requested field and one record "\
+                        "per date");
+        Py_DECREF(dates);
+        return NULL;
     }
 
-    {
-        DateObject *curr_date;
-        PyObject *val, *dInfo;
-
-        while (iterSource->index < iterSource->size) {
-
-            if ((val_changed == 0) ||
-                (is_full == 0) ||
-                (prev_val == NULL) ||
-                (counter >= skip_periods)) {
-
-                   val = PyArray_GETITEM(array, iterSource->dataptr);
-                   curr_date = DateObject_FromFreqAndValue(freq, PyInt_AsLong(val));
-                   dInfo = getDateInfo(curr_date, NULL);
-
-                   if ((prev_val != NULL) &&
-                       (PyInt_AsLong(prev_val) != PyInt_AsLong(dInfo))) {
-                       val_changed = 1;
-                       counter = 0;
-                   }
+    if (fill_date_fields((long *)PyArray_DATA(dates), PyArray_SIZE(dates),
+                         freq, fields, nfields, out->data,
+                         out->descr->elsize) < 0) {
+        Py_DECREF(dates);
+        return NULL;
+    }
 
-                   Py_DECREF(val);
-                   Py_DECREF(curr_date);
+    Py_DECREF(dates);
+    Py_RETURN_NONE;
+}
 
-                   if (prev_val != NULL) {
-                       Py_DECREF(prev_val);
-                   }
+PyObject *
+DateArray_fromDatetimes(PyObject *self, PyObject *args)
+{
+    PyObject *datetimes_arg, *datetimes, *result, *item;
+    npy_intp i, size;
+    long *values;
+    int freq, year, month, day, hour, minute, second;
+
+    if (!PyArg_ParseTuple(args, "Oi:fromDatetimes(datetimes, freq)",
+                                &datetimes_arg, &freq)) return NULL;
+
+    datetimes = PySequence_Fast(datetimes_arg,
+                                "expected a sequence of datetime objects");
+    if (datetimes == NULL) { return NULL; }
+    size = PySequence_Fast_GET_SIZE(datetimes);
+    result = PyArray_SimpleNew(1, &size, NPY_LONG);
+    if (result == NULL) {
+        Py_DECREF(datetimes);
+        return NULL;
+    }
+    values = (long *)PyArray_DATA(result);
+
+    for (i = 0; i < size; i++) {
+        item = PySequence_Fast_GET_ITEM(datetimes, i);
+        if (PyDateTime_Check(item)) {
+            hour = PyDateTime_DATE_GET_HOUR(item);
+            minute = PyDateTime_DATE_GET_MINUTE(item);
+            second = PyDateTime_DATE_GET_SECOND(item);
+        } else if (PyDate_Check(item)) {
+            hour = minute = second = 0;
+        } else {
+            PyErr_Format(PyExc_TypeError,
+                         "expected datetime objects, received: %s",
+                         item->ob_type->tp_name);
+            goto fail;
+        }
+        year = PyDateTime_GET_YEAR(item);
+        month = PyDateTime_GET_MONTH(item);
+        day = PyDateTime_GET_DAY(item);
+        if (date_value_from_fields(freq, year, month, ((month-1)/3)+1, day,
+                                   hour, minute, second, values + i) < 0) {
+            goto fail;
+        }
+    }
 
-                   prev_val = dInfo;
-            }
+    Py_DECREF(datetimes);
+    return result;
 
-            PyArray_SETITEM(newArray, iterResult->dataptr, dInfo);
+ fail:
+    Py_DECREF(datetimes);
+    Py_DECREF(result);
+    return NULL;
+}
 
-            PyArray_ITER_NEXT(iterSource);
-            PyArray_ITER_NEXT(iterResult);
+PyObject *
+DateArray_getDateInfo(PyObject *self, PyObject *args)
+{
+    int freq, is_full;
+    char *info;
+    PyObject *dates_arg, *dates, *fields, *result;
 
-            counter += 1;
-        }
+    if (!PyArg_ParseTuple(args, "Oisi:getDateInfo(array, freq, info, is_full)",
+                                &dates_arg, &freq, &info, &is_full)) return NULL;
+
+    dates = PyArray_FROMANY(dates_arg, NPY_LONG, 0, 0, NPY_IN_ARRAY);
+    if (dates == NULL) { return NULL; }
+    fields = PyArray_SimpleNew(PyArray_NDIM(dates), PyArray_DIMS(dates),
+                               NPY_INT32);
+    if (fields == NULL) {
+        Py_DECREF(dates);
+        return NULL;
     }
 
-    if (prev_val != NULL) {
-        Py_DECREF(prev_val);
+    if (fill_date_fields((long *)PyArray_DATA(dates), PyArray_SIZE(dates),
+                         freq, info, 1, PyArray_DATA(fields),
+                         sizeof(npy_int32)) < 0) {
+        Py_DECREF(dates);
+        Py_DECREF(fields);
+        return NULL;
     }
-    Py_DECREF(iterSource);
-    Py_DECREF(iterResult);
+    Py_DECREF(dates);
 
-    return (PyObject *) newArray;
+    result = PyArray_Cast((PyArrayObject *)fields, NPY_LONG);
+    Py_DECREF(fields);
+    return result;
 }
 
 
@@ -1,5 +1,6 @@
 #include "c_dates.h"
 #include "c_tseries.h"
+#include "pythread.h"
 
 /* Helper function for TimeSeries_convert:
     determine the size of the second dimension for the resulting
@@ -104,12 +105,478 @@ static long get_height(int fromFreq, int toFreq) {
     }
 }
 
+/* State shared by the copy loops of TimeSeries_convert */
+typedef struct {
+    long (*asfreq_main)(long, char, asfreq_info*);
+    asfreq_info af_info;
+    char relation;
+    long startIndex;
+    long newStart;
+    long newHeight;
+    long prevIndex;
+    long currPerLen;
+} convert_info;
+
+/* Helper function for TimeSeries_convert:
+    returns the period of the converted array the i-th value of the source
+    array falls in, -1 if the value falls before the start of the converted
+    array, or INT_ERR_CODE if the date conversion failed */
+static npy_intp
+convert_period(convert_info *cinfo, long i) {
+
+    long currIndex;
+
+    currIndex = cinfo->asfreq_main(cinfo->startIndex + i,
+                                   cinfo->relation, &cinfo->af_info);
+    if (currIndex == INT_ERR_CODE) { return INT_ERR_CODE; }
+    if (currIndex < cinfo->newStart) { return -1; }
+
+    return (npy_intp)(currIndex - cinfo->newStart);
+}
+
+/* Helper function for TimeSeries_convert:
+    returns the position of the i-th value of the source array in the
+    flattened converted array, -1 if the value falls before the start of
+    the converted array, or INT_ERR_CODE if the date conversion failed */
+static npy_intp
+convert_position(convert_info *cinfo, long i) {
+
+    long currIndex;
+    npy_intp pos;
+
+    pos = convert_period(cinfo, i);
+    if (pos < 0) { return pos; }
+
+    if (cinfo->newHeight > 1) {
+        currIndex = (long)pos + cinfo->newStart;
+        if (currIndex != cinfo->prevIndex) {
+            //reset period length
+            cinfo->currPerLen = 0;
+            cinfo->prevIndex = currIndex;
+        }
+        pos = pos * cinfo->newHeight + cinfo->currPerLen;
+        cinfo->currPerLen++;
+    }
+    return pos;
+}
+
+/* Copies the values (and mask) of the source array in the converted array.
+   The data and mask buffers are walked directly, the `data_type` and
+   `mask_type` arguments select the width of each copy. */
+#define CONVERT_COPY_LOOP(data_type, mask_type)                              \
+    for (i = 0; i < length; i++) {                                           \
+        pos = convert_position(&cinfo, i);                                   \
+        if (pos == INT_ERR_CODE) { goto fail; }                              \
+        if (pos > -1) {                                                      \
+            *(data_type *)(new_data + pos * sizeof(data_type)) =             \
+                *(data_type *)(data + i * data_stride);                      \
+            *(mask_type *)(new_mask + pos * sizeof(mask_type)) =             \
+                *(mask_type *)(mask_data + i * mask_stride);                 \
+        }                                                                    \
+    }
+
+#define CONVERT_TYPED_LOOP(data_type)                                        \
+    if (mask_is_bool) { CONVERT_COPY_LOOP(data_type, npy_bool) }             \
+    else { goto generic; }
+
+/* Aggregation functions that TimeSeries_convert can apply directly to the
+   values of each period when converting to a lower frequency */
+enum {
+    REDUCE_NONE=-1,
+    REDUCE_SUM, REDUCE_MEAN, REDUCE_MIN, REDUCE_MAX, REDUCE_FIRST,
+    REDUCE_LAST, REDUCE_COUNT, REDUCE_STD, REDUCE_MEDIAN
+};
+
+static char *reduce_names[] = {"sum", "mean", "min", "max", "first",
+                               "last", "count", "std", "median", NULL};
+
+static int
+get_reduce_type(char *name) {
+    int i;
+    for (i = 0; reduce_names[i] != NULL; i++) {
+        if (strcmp(name, reduce_names[i]) == 0) { return i; }
+    }
+    return REDUCE_NONE;
+}
+
+/* Returns the k-th smallest value of the n first items of arr.
+   The array is partially reordered in place. */
+static double
+quick_select(double *arr, npy_intp n, npy_intp k) {
+
+    npy_intp lo=0, hi=n-1, i, j;
+    double pivot, tmp;
+
+    while (lo < hi) {
+        pivot = arr[(lo + hi) / 2];
+        i = lo;
+        j = hi;
+        while (i <= j) {
+            while (arr[i] < pivot) { i++; }
+            while (arr[j] > pivot) { j--; }
+            if (i <= j) {
+                tmp = arr[i]; arr[i] = arr[j]; arr[j] = tmp;
+                i++;
+                j--;
+            }
+        }
+        if (k <= j) { hi = j; }
+        else if (k >= i) { lo = i; }
+        else { break; }
+    }
+    return arr[k];
+}
+
+/* Median of the n first items of arr (n > 0), reordering arr in place */
+static double
+median_of(double *arr, npy_intp n) {
+
+    npy_intp i, half = n / 2;
+    double upper, lower;
+
+    upper = quick_select(arr, n, half);
+    if (n % 2) { return upper; }
+    /* after the selection, the lower middle value is the largest of
+       the values on the left of the upper one */
+    lower = arr[0];
+    for (i = 1; i < half; i++) {
+        if (arr[i] > lower) { lower = arr[i]; }
+    }
+    return (lower + upper) / 2.;
+}
+
+/* Loops over the unmasked values of the source array, setting `g` to the
+   index of their period in the converted array */
+#define REDUCE_FOR_EACH_VALUE(body)                                          \
+    for (i = 0; i < length; i++) {                                           \
+        g = convert_period(cinfo, (long)i);                                  \
+        if (g == INT_ERR_CODE) { goto fail; }                                \
+        if ((g < 0) || *(npy_bool *)(mask_data + i * mask_stride)) {         \
+            continue;                                                        \
+        }                                                                    \
+        body                                                                 \
+    }
+
+#define REDUCE_VALUE(ctype) (*(ctype *)(data + i * data_stride))
+
+#define REDUCE_SELECT_LOOP(ctype, op)                                        \
+    REDUCE_FOR_EACH_VALUE(                                                   \
+        ctype val = REDUCE_VALUE(ctype);                                     \
+        ctype cur;                                                           \
+        if (sel[g] < 0) { sel[g] = i; continue; }                            \
+        cur = *(ctype *)(data + sel[g] * data_stride);                       \
+        /* NaNs win, as with numpy */                                        \
+        if ((cur == cur) && ((val op cur) || (val != val))) { sel[g] = i; }  \
+    )
+#define REDUCE_MIN_LOOP(ctype) REDUCE_SELECT_LOOP(ctype, <)
+#define REDUCE_MAX_LOOP(ctype) REDUCE_SELECT_LOOP(ctype, >)
+
+#define REDUCE_FSUM_LOOP(ctype)                                              \
+    REDUCE_FOR_EACH_VALUE(                                                   \
+        acc[g] += (double)REDUCE_VALUE(ctype);                               \
+        cnt[g]++;                                                            \
+    )
+
+#define REDUCE_ISUM_LOOP(ctype)                                              \
+    REDUCE_FOR_EACH_VALUE(                                                   \
+        iacc[g] += (npy_longlong)REDUCE_VALUE(ctype);                        \
+        cnt[g]++;                                                            \
+    )
+
+/* running mean (and sum of squared deviations for std, Welford's method).
+   The periods with NaNs are left to the numpy.ma functions */
+#define REDUCE_MOMENTS_LOOP(ctype)                                           \
+    REDUCE_FOR_EACH_VALUE(                                                   \
+        double x = (double)REDUCE_VALUE(ctype);                              \
+        double delta = x - acc[g];                                           \
+        if (x != x) { goto nans; }                                           \
+        cnt[g]++;                                                            \
+        acc[g] += delta / cnt[g];                                            \
+        if (reduce == REDUCE_STD) { acc2[g] += delta * (x - acc[g]); }       \
+    )
+
+/* the values of a period are contiguous in the source array: collect them
+   in a scratch buffer and take the median when the period changes (the
+   selection is undefined with NaNs, left to numpy.ma) */
+#define REDUCE_MEDIAN_LOOP(ctype)                                            \
+    REDUCE_FOR_EACH_VALUE(                                                   \
+        double x = (double)REDUCE_VALUE(ctype);                              \
+        if (x != x) { goto nans; }                                           \
+        if (g != prev) {                                                     \
+            if (nscratch) { acc[prev] = median_of(scratch, nscratch); }      \
+            nscratch = 0;                                                    \
+            prev = g;                                                        \
+        }                                                                    \
+        if (nscratch == scratch_size) {                                      \
+            double *tmp;                                                     \
+            scratch_size *= 2;                                               \
+            tmp = PyMem_Realloc(scratch, scratch_size * sizeof(double));     \
+            if (tmp == NULL) { PyErr_NoMemory(); goto fail; }                \
+            scratch = tmp;                                                   \
+        }                                                                    \
+        scratch[nscratch++] = x;                                             \
+        cnt[g]++;                                                            \
+    )                                                                        \
+    if (nscratch) { acc[prev] = median_of(scratch, nscratch); }
+
+#define REDUCE_DISPATCH_INT(type_num, LOOP)                                  \
+    switch(type_num) {                                                       \
+        case NPY_BOOL: LOOP(npy_bool) break;                                 \
+        case NPY_BYTE: LOOP(npy_byte) break;                                 \
+        case NPY_UBYTE: LOOP(npy_ubyte) break;                               \
+        case NPY_SHORT: LOOP(npy_short) break;                               \
+        case NPY_USHORT: LOOP(npy_ushort) break;                             \
+        case NPY_INT: LOOP(npy_int) break;                                   \
+        case NPY_UINT: LOOP(npy_uint) break;                                 \
+        case NPY_LONG: LOOP(npy_long) break;                                 \
+        case NPY_LONGLONG: LOOP(npy_longlong) break;                         \
+        default: goto unsupported;                                           \
+    }
+
+#define REDUCE_DISPATCH_FLOAT(type_num, LOOP)                                \
+    switch(type_num) {                                                       \
+        case NPY_FLOAT: LOOP(npy_float) break;                               \
+        case NPY_DOUBLE: LOOP(npy_double) break;                             \
+        default: goto unsupported;                                           \
+    }
+
+#define REDUCE_DISPATCH(type_num, LOOP)                                      \
+    if (PyTypeNum_ISFLOAT(type_num)) {                                       \
+        REDUCE_DISPATCH_FLOAT(type_num, LOOP)                                \
+    } else {                                                                 \
+        REDUCE_DISPATCH_INT(type_num, LOOP)                                  \
+    }
+
+/* Helper function for TimeSeries_convert:
+    aggregates the values of each period of the converted array with the
+    `reduce` function, in a single pass over the source array.
+    The results are stored in two new 1D arrays of length newLen.
+    Raises a NotImplementedError if the dtype of the array (or of the mask)
+    is not supported by the aggregation function, or if the mean, std or
+    median meet an unmasked NaN. */
+static int
+convert_reduce(PyArrayObject *array, PyArrayObject *mask,
+               convert_info *cinfo, long length, long newLen, int reduce,
+               PyArrayObject **newArray, PyArrayObject **newMask)
+{
+    npy_intp i, g, prev=-1, nscratch=0, scratch_size;
+    npy_intp dim[1];
+    npy_intp *cnt=NULL, *sel=NULL;
+    npy_longlong *iacc=NULL;
+    double *acc=NULL, *acc2=NULL, *scratch=NULL;
+    int type_num, out_type=NPY_NOTYPE, is_float;
+    char *data, *mask_data, *out_data;
+    npy_bool *out_mask;
+    npy_intp data_stride, mask_stride, out_size;
+
+    type_num = array->descr->type_num;
+    is_float = PyTypeNum_ISFLOAT(type_num);
+    dim[0] = (npy_intp)newLen;
+
+    if ((mask->descr->type_num != NPY_BOOL) || !PyArray_ISALIGNED(mask)) {
+        goto unsupported;
+    }
+    if ((reduce != REDUCE_FIRST) && (reduce != REDUCE_LAST) &&
+        (reduce != REDUCE_COUNT) && !PyArray_ISALIGNED(array)) {
+        goto unsupported;
+    }
+
+    data = array->data;
+    data_stride = array->strides[0];
+    mask_data = mask->data;
+    mask_stride = mask->strides[0];
+
+    /* per-period accumulators */
+    cnt = PyMem_New(npy_intp, newLen);
+    if (cnt == NULL) { PyErr_NoMemory(); goto fail; }
+    memset(cnt, 0, newLen * sizeof(npy_intp));
+
+    switch(reduce)
+    {
+        case REDUCE_FIRST:
+        case REDUCE_LAST:
+        case REDUCE_MIN:
+        case REDUCE_MAX:
+            sel = PyMem_New(npy_intp, newLen);
+            if (sel == NULL) { PyErr_NoMemory(); goto fail; }
+            for (g = 0; g < newLen; g++) { sel[g] = -1; }
+            break;
+        case REDUCE_SUM:
+            if (!is_float) {
+                iacc = PyMem_New(npy_longlong, newLen);
+                if (iacc == NULL) { PyErr_NoMemory(); goto fail; }
+                memset(iacc, 0, newLen * sizeof(npy_longlong));
+                break;
+            }
+        case REDUCE_STD:
+            if (reduce == REDUCE_STD) {
+                acc2 = PyMem_New(double, newLen);
+                if (acc2 == NULL) { PyErr_NoMemory(); goto fail; }
+                memset(acc2, 0, newLen * sizeof(double));
+            }
+        case REDUCE_MEAN:
+        case REDUCE_MEDIAN:
+            acc = PyMem_New(double, newLen);
+            if (acc == NULL) { PyErr_NoMemory(); goto fail; }
+            memset(acc, 0, newLen * sizeof(double));
+            break;
+    }
+
+    switch(reduce)
+    {
+        case REDUCE_FIRST:
+            REDUCE_FOR_EACH_VALUE(
+                if (sel[g] < 0) { sel[g] = i; }
+            )
+            break;
+        case REDUCE_LAST:
+            REDUCE_FOR_EACH_VALUE(
+                sel[g] = i;
+            )
+            break;
+        case REDUCE_COUNT:
+            REDUCE_FOR_EACH_VALUE(
+                cnt[g]++;
+            )
+            break;
+        case REDUCE_MIN:
+            REDUCE_DISPATCH(type_num, REDUCE_MIN_LOOP)
+            break;
+        case REDUCE_MAX:
+            REDUCE_DISPATCH(type_num, REDUCE_MAX_LOOP)
+            break;
+        case REDUCE_SUM:
+            if (is_float) {
+                REDUCE_DISPATCH_FLOAT(type_num, REDUCE_FSUM_LOOP)
+            } else {
+                REDUCE_DISPATCH_INT(type_num, REDUCE_ISUM_LOOP)
+            }
+            break;
+        case REDUCE_MEAN:
+        case REDUCE_STD:
+            REDUCE_DISPATCH(type_num, REDUCE_MOMENTS_LOOP)
+            break;
+        case REDUCE_MEDIAN:
+            scratch_size = cinfo->newHeight;
+            scratch = PyMem_New(double, scratch_size);
+            if (scratch == NULL) { PyErr_NoMemory(); goto fail; }
+            REDUCE_DISPATCH(type_num, REDUCE_MEDIAN_LOOP)
+            break;
+    }
+
+    /* output arrays */
+    switch(reduce)
+    {
+        case REDUCE_FIRST:
+        case REDUCE_LAST:
+        case REDUCE_MIN:
+        case REDUCE_MAX:
+            Py_INCREF(array->descr);
+            *newArray = (PyArrayObject *)PyArray_NewFromDescr(&PyArray_Type,
+                                  array->descr, 1, dim, NULL, NULL, 0, NULL);
+            break;
+        case REDUCE_COUNT:
+            out_type = NPY_INTP;
+            *newArray = (PyArrayObject *)PyArray_SimpleNew(1, dim, out_type);
+            break;
+        case REDUCE_SUM:
+            if (is_float) { out_type = type_num; }
+            else if (PyTypeNum_ISUNSIGNED(type_num)) { out_type = NPY_ULONG; }
+            else { out_type = NPY_LONG; }
+            *newArray = (PyArrayObject *)PyArray_SimpleNew(1, dim, out_type);
+            break;
+        default:
+            out_type = is_float ? type_num : NPY_DOUBLE;
+            *newArray = (PyArrayObject *)PyArray_SimpleNew(1, dim, out_type);
+    }
+    if (*newArray == NULL) { goto fail; }
+    if (PyDataType_REFCHK((*newArray)->descr)) {
+        PyArray_FillObjectArray(*newArray, Py_None);
+    } else {
+        PyArray_FILLWBYTE(*newArray, 0);
+    }
+    *newMask = (PyArrayObject *)PyArray_SimpleNew(1, dim, NPY_BOOL);
+    if (*newMask == NULL) { goto fail; }
+
+    out_data = (*newArray)->data;
+    out_mask = (npy_bool *)(*newMask)->data;
+    out_size = (*newArray)->descr->elsize;
+
+    for (g = 0; g < newLen; g++) {
+        if (sel != NULL) {
+            /* the result is one of the values of the source array */
+            out_mask[g] = (sel[g] < 0);
+            if (sel[g] < 0) { continue; }
+            if (PyDataType_REFCHK(array->descr)) {
+                PyObject *val = PyArray_GETITEM(array,
+                                                data + sel[g] * data_stride);
+                if (val == NULL) { goto fail; }
+                PyArray_SETITEM(*newArray, out_data + g * out_size, val);
+                Py_DECREF(val);
+            } else {
+                memcpy(out_data + g * out_size,
+                       data + sel[g] * data_stride, out_size);
+            }
+            continue;
+        }
+        if (reduce == REDUCE_COUNT) {
+            out_mask[g] = 0;
+            ((npy_intp *)out_data)[g] = cnt[g];
+            continue;
+        }
+        out_mask[g] = (cnt[g] == 0);
+        if (cnt[g] == 0) { continue; }
+        if (iacc != NULL) {
+            if (out_type == NPY_ULONG) {
+                ((npy_ulong *)out_data)[g] = (npy_ulong)iacc[g];
+            } else {
+                ((npy_long *)out_data)[g] = (npy_long)iacc[g];
+            }
+        } else {
+            double res = acc[g];
+            if (reduce == REDUCE_STD) { res = sqrt(acc2[g] / cnt[g]); }
+            if (out_type == NPY_FLOAT) { ((npy_float *)out_data)[g] = (npy_float)res; }
+            else { ((npy_double *)out_data)[g] = res; }
+        }
+    }
+
+    PyMem_Free(cnt);
+    PyMem_Free(sel);
+    PyMem_Free(iacc);
+    PyMem_Free(acc);
+    PyMem_Free(acc2);
+    PyMem_Free(scratch);
+    return 0;
+
+unsupported:
+    PyErr_Format(PyExc_NotImplementedError,
+                 "convert: '%s' is not supported for arrays of type %s",
+                 reduce_names[reduce], array->descr->typeobj->tp_name);
+    goto fail;
+nans:
+    PyErr_Format(PyExc_NotImplementedError,
+                 "convert: '%s' is not supported for arrays with NaNs",
+                 reduce_names[reduce]);
+fail:
+    PyMem_Free(cnt);
+    PyMem_Free(sel);
+    PyMem_Free(iacc);
+    PyMem_Free(acc);
+    PyMem_Free(acc2);
+    PyMem_Free(scratch);
+    Py_XDECREF(*newArray);
+    Py_XDECREF(*newMask);
+    *newArray = NULL;
+    *newMask = NULL;
+    return -1;
+}
+
 PyObject *
 TimeSeries_convert(PyObject *self, PyObject *args)
 {
     PyObject *arrayTest;
-    PyArrayObject *array, *newArray;
-    PyArrayObject *mask, *newMask;
+    PyArrayObject *array, *newArray=NULL;
+    PyArrayObject *mask, *newMask=NULL;
 
     PyObject *returnVal = NULL;
     PyObject *start_index_retval;
@@ -118,29 +585,36 @@ TimeSeries_convert(PyObject *self, PyObject *args)
     long newStart, newStartTemp;
     long newEnd, newEndTemp;
     long newLen, newHeight;
-    long currIndex, prevIndex;
-    long nd;
-    npy_intp *dim, *newIdx;
-    long currPerLen;
+    long length, nd;
+    npy_intp *dim;
+    npy_intp i, pos;
     char *position;
+    char *func=NULL;
+    int reduce=REDUCE_NONE;
     PyObject *fromFreq_arg, *toFreq_arg;
     int fromFreq, toFreq;
     char relation;
-    asfreq_info af_info;
-    int i;
+    int mask_is_bool;
+    convert_info cinfo;
 
-    PyObject *val, *valMask;
+    char *data, *mask_data, *new_data, *new_mask;
+    npy_intp data_stride, mask_stride, data_size, mask_size;
 
-    long (*asfreq_main)(long, char, asfreq_info*) = NULL;
     long (*asfreq_endpoints)(long, char, asfreq_info*) = NULL;
     long (*asfreq_reverse)(long, char, asfreq_info*) = NULL;
 
-    returnVal = PyDict_New();
-
     if (!PyArg_ParseTuple(args,
-        "OOOslO:convert(array, fromfreq, tofreq, position, startIndex, mask)",
+        "OOOslO|z:convert(array, fromfreq, tofreq, position, startIndex, mask, func)",
         &array, &fromFreq_arg, &toFreq_arg,
-        &position, &startIndex, &mask)) return NULL;
+        &position, &startIndex, &mask, &func)) return NULL;
+
+    if (func != NULL) {
+        if ((reduce = get_reduce_type(func)) == REDUCE_NONE) {
+            PyErr_Format(PyExc_ValueError,
+                         "Invalid aggregation function: '%s'", func);
+            return NULL;
+        }
+    }
 
     if((fromFreq = check_freq(fromFreq_arg)) == INT_ERR_CODE) return NULL;
     if((toFreq = check_freq(toFreq_arg)) == INT_ERR_CODE) return NULL;
@@ -148,6 +622,8 @@ TimeSeries_convert(PyObject *self, PyObject *args)
     if (toFreq == fromFreq)
     {
         PyObject *sidx;
+        returnVal = PyDict_New();
+        MEM_CHECK(returnVal)
         newArray = (PyArrayObject *)PyArray_Copy(array);
         newMask = (PyArrayObject *)PyArray_Copy(mask);
         sidx = PyInt_FromLong(startIndex);
@@ -178,22 +654,24 @@ TimeSeries_convert(PyObject *self, PyObject *args)
             break;
     }
 
-    get_asfreq_info(fromFreq, toFreq, &af_info);
+    length = (long)(array->dimensions[0]);
+
+    get_asfreq_info(fromFreq, toFreq, &cinfo.af_info);
 
-    asfreq_main = get_asfreq_func(fromFreq, toFreq, 1);
+    cinfo.asfreq_main = get_asfreq_func(fromFreq, toFreq, 1);
     asfreq_endpoints = get_asfreq_func(fromFreq, toFreq, 0);
 
     //convert start index to new frequency
-    CHECK_ASFREQ(newStartTemp = asfreq_main(startIndex, 'S', &af_info));
+    CHECK_ASFREQ(newStartTemp = cinfo.asfreq_main(startIndex, 'S', &cinfo.af_info));
     if (newStartTemp < 1) {
-        CHECK_ASFREQ(newStart = asfreq_endpoints(startIndex, 'E', &af_info));
+        CHECK_ASFREQ(newStart = asfreq_endpoints(startIndex, 'E', &cinfo.af_info));
     }
     else { newStart = newStartTemp; }
 
     //convert end index to new frequency
-    CHECK_ASFREQ(newEndTemp = asfreq_main(startIndex+array->dimensions[0]-1, 'E', &af_info));
+    CHECK_ASFREQ(newEndTemp = cinfo.asfreq_main(startIndex+length-1, 'E', &cinfo.af_info));
     if (newEndTemp < 1) {
-        CHECK_ASFREQ(newEnd = asfreq_endpoints(startIndex+array->dimensions[0]-1, 'S', &af_info));
+        CHECK_ASFREQ(newEnd = asfreq_endpoints(startIndex+length-1, 'S', &cinfo.af_info));
     }
     else { newEnd = newEndTemp; }
 
@@ -205,6 +683,13 @@ TimeSeries_convert(PyObject *self, PyObject *args)
     newLen = newEnd - newStart + 1;
     newHeight = get_height(fromFreq, toFreq);
 
+    cinfo.relation = relation;
+    cinfo.startIndex = startIndex;
+    cinfo.newStart = newStart;
+    cinfo.newHeight = newHeight;
+    cinfo.prevIndex = newStart;
+    cinfo.currPerLen = 0;
+
     if (newHeight > 1) {
         long tempval;
         asfreq_info af_info_rev;
@@ -213,7 +698,14 @@ TimeSeries_convert(PyObject *self, PyObject *args)
         asfreq_reverse = get_asfreq_func(toFreq, fromFreq, 0);
 
         CHECK_ASFREQ(tempval = asfreq_reverse(newStart, 'S', &af_info_rev));
-        currPerLen = startIndex - tempval;
+        cinfo.currPerLen = startIndex - tempval;
+
+        if (reduce != REDUCE_NONE) {
+            //aggregate the periods directly, without the 2D intermediate
+            if (convert_reduce(array, mask, &cinfo, length, newLen, reduce,
+                               &newArray, &newMask) < 0) { return NULL; }
+            goto finish;
+        }
 
         nd = 2;
         dim = PyDimMem_NEW(nd);
@@ -225,56 +717,100 @@ TimeSeries_convert(PyObject *self, PyObject *args)
         dim[0] = (npy_intp)newLen;
     }
 
-    newIdx = PyDimMem_NEW(nd);
-    arrayTest = PyArray_SimpleNew(nd, dim, array->descr->type_num);
-    if (arrayTest == NULL) { return NULL; }
+    /* use the descriptors (and not only the type numbers) of the inputs,
+       so that flexible types keep their itemsize */
+    Py_INCREF(array->descr);
+    arrayTest = PyArray_NewFromDescr(&PyArray_Type, array->descr,
+                                     nd, dim, NULL, NULL, 0, NULL);
+    if (arrayTest == NULL) {
+        PyDimMem_FREE(dim);
+        goto fail;
+    }
     newArray = (PyArrayObject*)arrayTest;
-    newMask  = (PyArrayObject*)PyArray_SimpleNew(nd, dim, mask->descr->type_num);
+    Py_INCREF(mask->descr);
+    newMask  = (PyArrayObject*)PyArray_NewFromDescr(&PyArray_Type, mask->descr,
+                                                    nd, dim, NULL, NULL, 0, NULL);
 
     PyDimMem_FREE(dim);
+    if (newMask == NULL) { goto fail; }
 
-    PyArray_FILLWBYTE(newArray,0);
+    if (PyDataType_REFCHK(array->descr)) {
+        PyArray_FillObjectArray(newArray, Py_None);
+    } else {
+        PyArray_FILLWBYTE(newArray,0);
+    }
     PyArray_FILLWBYTE(newMask,1);
 
-    prevIndex = newStart;
-
-    //set values in the new array
-    for (i = 0; i < array->dimensions[0]; i++) {
-
-        npy_intp idx = (npy_intp)i;
-
-        val = PyArray_GETITEM(array, PyArray_GetPtr(array, &idx));
-        valMask = PyArray_GETITEM(mask, PyArray_GetPtr(mask, &idx));
-
-        CHECK_ASFREQ(currIndex = asfreq_main(startIndex + i, relation, &af_info));
+    data = array->data;
+    data_stride = array->strides[0];
+    data_size = array->descr->elsize;
+    mask_data = mask->data;
+    mask_stride = mask->strides[0];
+    mask_size = mask->descr->elsize;
+    new_data = newArray->data;
+    new_mask = newMask->data;
 
-        newIdx[0] = (npy_intp)(currIndex-newStart);
+    mask_is_bool = ((mask->descr->type_num == NPY_BOOL) &&
+                    PyArray_ISALIGNED(mask));
 
-        if (newHeight > 1) {
-
-                if (currIndex != prevIndex)
-                {
-                    //reset period length
-                    currPerLen = 0;
-                    prevIndex = currIndex;
-                }
-
-                newIdx[1] = (npy_intp)currPerLen;
-                currPerLen++;
+    //set values in the new array
+    if (PyDataType_REFCHK(array->descr)) {
+        /* object arrays (or records with object fields) need the values
+           to be reference counted: go through the boxed accessors */
+        for (i = 0; i < length; i++) {
+            PyObject *val;
+            pos = convert_position(&cinfo, i);
+            if (pos == INT_ERR_CODE) { goto fail; }
+            if (pos > -1) {
+                val = PyArray_GETITEM(array, data + i * data_stride);
+                PyArray_SETITEM(newArray, new_data + pos * data_size, val);
+                Py_DECREF(val);
+                memcpy(new_mask + pos * mask_size,
+                       mask_data + i * mask_stride, mask_size);
+            }
         }
-
-        if (newIdx[0] > -1) {
-            PyArray_SETITEM(newArray, PyArray_GetPtr(newArray, newIdx), val);
-            PyArray_SETITEM(newMask, PyArray_GetPtr(newMask, newIdx), valMask);
+    } else if (!PyArray_ISALIGNED(array)) {
+        goto generic;
+    } else {
+        switch(array->descr->type_num)
+        {
+            case NPY_FLOAT64:
+                CONVERT_TYPED_LOOP(npy_float64)
+                break;
+            case NPY_FLOAT32:
+                CONVERT_TYPED_LOOP(npy_float32)
+                break;
+            case NPY_INT64:
+                CONVERT_TYPED_LOOP(npy_int64)
+                break;
+            case NPY_INT32:
+                CONVERT_TYPED_LOOP(npy_int32)
+                break;
+            case NPY_BOOL:
+                CONVERT_TYPED_LOOP(npy_bool)
+                break;
+            default:
+                goto generic;
+        }
+    }
+    goto finish;
+
+generic:
+    /* any other plain-old-data type: copy the raw bytes of each item */
+    for (i = 0; i < length; i++) {
+        pos = convert_position(&cinfo, i);
+        if (pos == INT_ERR_CODE) { goto fail; }
+        if (pos > -1) {
+            memcpy(new_data + pos * data_size,
+                   data + i * data_stride, data_size);
+            memcpy(new_mask + pos * mask_size,
+                   mask_data + i * mask_stride, mask_size);
         }
-
-        Py_DECREF(val);
-        Py_DECREF(valMask);
-
     }
 
-    PyDimMem_FREE(newIdx);
-
+finish:
+    returnVal = PyDict_New();
+    if (returnVal == NULL) { goto fail; }
     start_index_retval = (PyObject*)PyInt_FromLong(newStart);
 
     PyDict_SetItemString(returnVal, "values", (PyObject*)newArray);
@@ -286,6 +822,11 @@ TimeSeries_convert(PyObject *self, PyObject *args)
     Py_DECREF(start_index_retval);
 
     return returnVal;
+
+fail:
+    Py_XDECREF(newArray);
+    Py_XDECREF(newMask);
+    return NULL;
 }
 
 
@@ -321,92 +862,399 @@ _get_type_num(PyArray_Descr *dtype1, PyArray_Descr *dtype2)
 }
 
 
+/* Iteration over the 1-D lanes along `axis` of arrays of the same shape: the
+   lanes are walked in place, through the pointers to their first items and
+   their strides. The arrays may be NULL, in which case so are their
+   pointers. The pointers to the first items of all the lanes are computed
+   beforehand, so that the lanes `first` to `last` (excluded) can be
+   processed without the GIL, by several threads. */
+#define MOV_MAX_ARRAYS 12
+typedef struct {
+    int narrays;
+    char *ptrs[MOV_MAX_ARRAYS];
+    npy_intp strides[MOV_MAX_ARRAYS];
+    npy_intp size, nlanes, first, last;
+    char **starts;
+} lane_iter;
+
+/* item `i` of the lane starting at `ptr` */
+#define LANE_ITEM(type, ptr, stride, i) (*(type *)((ptr) + (i) * (stride)))
+/* item `i` of the current lane of the `k`-th array of the lane_iter `li`,
+   and whether it is masked if that array is a (possibly NULL) mask */
+#define LANE_VALUE(li, type, k, i) \
+    LANE_ITEM(type, (li).ptrs[k], (li).strides[k], i)
+#define LANE_MASKED(li, k, i) \
+    (((li).ptrs[k] != NULL) && LANE_VALUE(li, npy_bool, k, i))
+
+static void
+lane_iter_free(lane_iter *li)
+{
+    if (li->starts != NULL) { PyArray_free(li->starts); }
+    li->starts = NULL;
+}
+
+static int
+lane_iter_init(lane_iter *li, PyArrayObject **arrays, int narrays, int axis)
+{
+    PyArrayIterObject *iter;
+    npy_intp lane;
+    int k, ax;
+
+    li->narrays = narrays;
+    li->size = li->nlanes = li->first = li->last = 0;
+    li->starts = NULL;
+    for (k = 0; k < narrays; k++) {
+        li->ptrs[k] = NULL;
+        li->strides[k] = 0;
+        if (arrays[k] != NULL) {
+            li->size = PyArray_DIM(arrays[k], axis);
+            li->nlanes = (li->size > 0) ?
+                         PyArray_SIZE(arrays[k]) / li->size : 0;
+        }
+    }
+    li->last = li->nlanes;
+    li->starts = PyArray_malloc((li->nlanes * narrays + 1) * sizeof(char*));
+    if (li->starts == NULL) {
+        PyErr_NoMemory();
+        return -1;
+    }
+    for (k = 0; k < narrays; k++) {
+        if (arrays[k] == NULL) {
+            for (lane = 0; lane < li->nlanes; lane++) {
+                li->starts[lane * narrays + k] = NULL;
+            }
+            continue;
+        }
+        ax = axis;
+        iter = (PyArrayIterObject*)PyArray_IterAllButAxis(
+                                        (PyObject*)arrays[k], &ax);
+        if (iter == NULL) {
+            lane_iter_free(li);
+            return -1;
+        }
+        for (lane = 0; lane < li->nlanes; lane++) {
+            li->starts[lane * narrays + k] = iter->dataptr;
+            PyArray_ITER_NEXT(iter);
+        }
+        Py_DECREF(iter);
+        li->strides[k] = PyArray_STRIDE(arrays[k], axis);
+    }
+    return 0;
+}
+
+/* points `li` to the lane `lane` */
+static int
+lane_iter_goto(lane_iter *li, npy_intp lane)
+{
+    int k;
+    for (k = 0; k < li->narrays; k++) {
+        li->ptrs[k] = li->starts[lane * li->narrays + k];
+    }
+    return 1;
+}
+
+/* loops over the lanes of `li` */
+#define LANE_LOOP(li, lane) \
+    for ((lane) = (li).first; \
+         ((lane) < (li).last) && lane_iter_goto(&(li), lane); (lane)++)
+
+/* Parameters of the kernels of the moving functions, which process the lanes
+   of a lane_iter and return -1 if they ran out of memory. `flag` is set by
+   the kernels (to report the interpolated quantiles). Unless `starts` is
+   NULL, the window at position i starts at `starts[i]` (see
+   get_window_starts) and `span` is the largest size of a window. */
+typedef struct {
+    int type_num, span, option;
+    char stat;
+    double quantile, decay, tol;
+    int flag;
+    npy_intp *starts;
+} mov_params;
+typedef int (*lane_kernel)(lane_iter, mov_params*);
+
+/* first position of the window ending at position i, negative if the window
+   begins before the start of the lane. Requires the `starts` and `span`
+   of the kernel parameters */
+#define WINDOW_START(i) ((starts != NULL) ? starts[i] : (i) - span + 1)
+/* raw data of the window starts returned by check_mov_args, or NULL */
+#define WINDOW_STARTS_DATA(starts) \
+    (((starts) != NULL) ? (npy_intp*)PyArray_DATA((PyArrayObject*)(starts)) \
+                        : NULL)
+
+typedef struct {
+    lane_iter li;
+    lane_kernel kernel;
+    mov_params params;
+    int status;
+    PyThread_type_lock done;
+} lane_chunk;
+
+// minimum number of items for releasing the GIL
+#define MOV_THREADS_THRESHOLD 1000
+
+static void
+lane_chunk_run(void *arg)
+{
+    lane_chunk *chunk = (lane_chunk*)arg;
+    chunk->status = chunk->kernel(chunk->li, &(chunk->params));
+    if (chunk->done != NULL) { PyThread_release_lock(chunk->done); }
+}
+
+/* Runs `kernel` on the lanes of `li`, without the GIL for large enough
+   arrays. The lanes are split in `nthreads` contiguous blocks, each processed
+   by its own thread. Each lane is processed the same way whatever the number
+   of threads, so that the results do not depend on it.
+   Returns -1 if an error occurred */
+static int
+run_lanes(lane_iter *li, lane_kernel kernel, mov_params *params, int nthreads)
+{
+    lane_chunk *chunks;
+    int k, status = 0;
+    NPY_BEGIN_THREADS_DEF;
+
+    if (nthreads < 1) {
+        PyErr_SetString(PyExc_ValueError, "nthreads must be positive");
+        return -1;
+    }
+    if (nthreads > li->nlanes) { nthreads = (int)li->nlanes; }
+    if (nthreads <= 1) {
+        if (li->nlanes * li->size > MOV_THREADS_THRESHOLD) {
+            NPY_BEGIN_THREADS;
+        }
+        status = kernel(*li, params);
+        NPY_END_THREADS;
+    } else {
+        chunks = PyArray_malloc(nthreads * sizeof(lane_chunk));
+        if (chunks == NULL) {
+            PyErr_NoMemory();
+            return -1;
+        }
+        for (k = 0; k < nthreads; k++) {
+            chunks[k].li = *li;
+            chunks[k].li.first = li->nlanes * k / nthreads;
+            chunks[k].li.last = li->nlanes * (k + 1) / nthreads;
+            chunks[k].kernel = kernel;
+            chunks[k].params = *params;
+            chunks[k].status = 0;
+            chunks[k].done = NULL;
+        }
+        /* the first block is processed by the current thread, along with
+           the blocks whose thread could not be started */
+        for (k = 1; k < nthreads; k++) {
+            chunks[k].done = PyThread_allocate_lock();
+            if (chunks[k].done == NULL) { continue; }
+            PyThread_acquire_lock(chunks[k].done, 1);
+            if (PyThread_start_new_thread(lane_chunk_run,
+                                          &chunks[k]) == -1) {
+                PyThread_release_lock(chunks[k].done);
+                PyThread_free_lock(chunks[k].done);
+                chunks[k].done = NULL;
+            }
+        }
+        NPY_BEGIN_THREADS;
+        for (k = 0; k < nthreads; k++) {
+            if (chunks[k].done == NULL) { lane_chunk_run(&chunks[k]); }
+        }
+        for (k = 1; k < nthreads; k++) {
+            if (chunks[k].done != NULL) {
+                PyThread_acquire_lock(chunks[k].done, 1);
+                PyThread_release_lock(chunks[k].done);
+            }
+        }
+        NPY_END_THREADS;
+        for (k = 0; k < nthreads; k++) {
+            if (chunks[k].done != NULL) { PyThread_free_lock(chunks[k].done); }
+            if (chunks[k].status < 0) { status = -1; }
+            params->flag |= chunks[k].params.flag;
+        }
+        PyArray_free(chunks);
+    }
+    if (status < 0) { PyErr_NoMemory(); }
+    return status;
+}
+
+/* Starts of the windows of `span` periods over the `size` sorted integer
+   `dates`, found with a two-pointer sweep: the window at position i covers
+   the positions j <= i such that dates[i] - span < dates[j]. The start is
+   -1 when the window begins before the origin, so that it is incomplete.
+   `dates` is either the array of the dates, whose origin is the first
+   date, or a tuple (dates, origin), e.g. when each date covers several
+   periods and the origin is the first period of the first date.
+   `capacity` is set to the largest number of positions in a window. */
+static PyObject*
+get_window_starts(PyObject *dates, npy_intp size, int span, int *capacity)
+{
+    PyArrayObject *values;
+    PyObject *starts, *dates_values = dates;
+    npy_longlong *raw_dates, origin = 0;
+    npy_intp i, lo = 0, *raw_starts;
+    int has_origin = PyTuple_Check(dates);
+
+    if (has_origin &&
+        !PyArg_ParseTuple(dates, "OL:dates", &dates_values, &origin)) {
+        return NULL;
+    }
+    values = (PyArrayObject*)PyArray_FROMANY(dates_values, NPY_LONGLONG, 1, 1,
+                                             NPY_CARRAY | NPY_FORCECAST);
+    ERR_CHECK(values)
+    if (PyArray_SIZE(values) != size) {
+        Py_DECREF(values);
+        PyErr_SetString(PyExc_ValueError,
+                        "dates and array must have the same length along axis");
+        return NULL;
+    }
+    starts = PyArray_SimpleNew(1, &size, NPY_INTP);
+    if (starts == NULL) {
+        Py_DECREF(values);
+        return NULL;
+    }
+    raw_dates = (npy_longlong*)PyArray_DATA(values);
+    raw_starts = (npy_intp*)PyArray_DATA((PyArrayObject*)starts);
+    if (!has_origin && (size > 0)) { origin = raw_dates[0]; }
+    *capacity = 1;
+    for (i = 0; i < size; i++) {
+        if ((i > 0) && (raw_dates[i] < raw_dates[i - 1])) {
+            Py_DECREF(values);
+            Py_DECREF(starts);
+            PyErr_SetString(PyExc_ValueError,
+                            "dates must be in chronological order");
+            return NULL;
+        }
+        while (raw_dates[lo] <= raw_dates[i] - span) { lo++; }
+        if (raw_dates[i] - span < origin - 1) {
+            raw_starts[i] = -1;
+        } else {
+            raw_starts[i] = lo;
+        }
+        if (i - lo + 1 > *capacity) { *capacity = (int)(i - lo + 1); }
+    }
+    Py_DECREF(values);
+    return starts;
+}
+
 /* validates the standard arguments to moving functions and set the original
-   mask, original ndarray, and mask for the result */
-static PyObject *
+   mask (as an aligned boolean array, or NULL if there is no mask), original
+   ndarray, and mask for the result. `axis` is made positive.
+   Unless `dates` is NULL or None, the windows span `span` periods of the
+   `dates` along `axis` instead of `span` positions: `starts` is then set to
+   the starts of the windows (see get_window_starts), and NULL otherwise.
+   `capacity` is set to the largest number of positions in a window.
+   Returns -1 if an error occurred */
+static int
 check_mov_args(
-    PyObject *orig_arrayobj, int span, int min_win_size,
-    PyObject **orig_ndarray, PyObject **orig_mask, PyObject **result_mask
+    PyObject *orig_arrayobj, int span, int min_win_size, int *axis,
+    PyObject *dates, PyObject **orig_ndarray, PyObject **orig_mask,
+    PyObject **result_mask, PyObject **starts, int *capacity
 ) {
 
-    PyArrayObject **orig_ndarray_tmp, **result_mask_tmp;
-    int *raw_result_mask;
+    PyArrayObject *arrays[2];
+    lane_iter li;
+    npy_intp lane, *raw_starts = NULL;
+    int nd;
+
+    *orig_ndarray = *orig_mask = *result_mask = *starts = NULL;
 
     if (!PyArray_Check(orig_arrayobj)) {
         PyErr_SetString(PyExc_ValueError, "array must be a valid subtype of ndarray");
-        return NULL;
+        return -1;
+    }
+
+    /* PyArray_EnsureArray steals a reference */
+    Py_INCREF(orig_arrayobj);
+    *orig_ndarray = PyArray_EnsureArray(orig_arrayobj);
+    if (*orig_ndarray == NULL) { return -1; }
+
+    nd = PyArray_NDIM((PyArrayObject*)(*orig_ndarray));
+    if (nd < 1) {
+        PyErr_SetString(PyExc_ValueError, "array must be at least 1 dimensional");
+        goto fail;
+    }
+    if (*axis < 0) { *axis += nd; }
+    if ((*axis < 0) || (*axis >= nd)) {
+        PyErr_Format(PyExc_ValueError, "axis(=%d) out of bounds", *axis);
+        goto fail;
     }
 
     // check if array has a mask, and if that mask is an array
     if (PyObject_HasAttrString(orig_arrayobj, "_mask")) {
         PyObject *tempMask = PyObject_GetAttrString(orig_arrayobj, "_mask");
         if (PyArray_Check(tempMask)) {
-            *orig_mask = PyArray_EnsureArray(tempMask);
+            *orig_mask = PyArray_FROMANY(tempMask, NPY_BOOL, 0, 0,
+                                         NPY_ALIGNED);
+            Py_DECREF(tempMask);
+            if (*orig_mask == NULL) { goto fail; }
+            if (!PyArray_SAMESHAPE((PyArrayObject*)(*orig_mask),
+                                   (PyArrayObject*)(*orig_ndarray))) {
+                PyErr_SetString(PyExc_ValueError,
+                                "mask and array must have the same shape");
+                goto fail;
+            }
         } else {
             Py_DECREF(tempMask);
         }
     }
 
-    *orig_ndarray = PyArray_EnsureArray(orig_arrayobj);
-    orig_ndarray_tmp = (PyArrayObject**)orig_ndarray;
-
-    if ((*orig_ndarray_tmp)->nd != 1) {
-        PyErr_SetString(PyExc_ValueError, "array must be 1 dimensional");
-        return NULL;
-    }
-
     if (span < min_win_size) {
-        char *error_str;
-        error_str = PyArray_malloc(60 * sizeof(char));
-        MEM_CHECK(error_str)
-        sprintf(error_str,
-                "span must be greater than or equal to %i",
-                min_win_size);
-        PyErr_SetString(PyExc_ValueError, error_str);
-        free(error_str);
-        return NULL;
+        PyErr_Format(PyExc_ValueError,
+                     "span must be greater than or equal to %i",
+                     min_win_size);
+        goto fail;
     }
 
-    raw_result_mask = PyArray_malloc((*orig_ndarray_tmp)->dimensions[0] * sizeof(int));
-    MEM_CHECK(raw_result_mask)
-
-    {
-        PyArrayObject *orig_mask_tmp;
-        int i, valid_points=0, is_masked;
+    *capacity = span;
+    if ((dates != NULL) && (dates != Py_None)) {
+        if (PyArray_ISCOMPLEX((PyArrayObject*)(*orig_ndarray)) ||
+            PyArray_ISOBJECT((PyArrayObject*)(*orig_ndarray))) {
+            PyErr_SetString(PyExc_TypeError,
+                            "windows over dates require real numbers");
+            goto fail;
+        }
+        *starts = get_window_starts(
+                        dates, PyArray_DIM((PyArrayObject*)(*orig_ndarray),
+                                           *axis),
+                        span, capacity);
+        if (*starts == NULL) { goto fail; }
+        raw_starts = (npy_intp*)PyArray_DATA((PyArrayObject*)(*starts));
+    }
 
-        orig_mask_tmp = (PyArrayObject*)(*orig_mask);
+    *result_mask = PyArray_SimpleNew(
+                        nd, PyArray_DIMS((PyArrayObject*)(*orig_ndarray)),
+                        NPY_BOOL);
+    if (*result_mask == NULL) { goto fail; }
 
-        for (i=0; i<((*orig_ndarray_tmp)->dimensions[0]); i++) {
+    arrays[0] = (PyArrayObject*)(*orig_mask);
+    arrays[1] = (PyArrayObject*)(*result_mask);
+    if (lane_iter_init(&li, arrays, 2, *axis) < 0) { goto fail; }
 
-            npy_intp idx = (npy_intp)i;
-            is_masked=0;
+    /* the result is masked when its window is incomplete or holds a masked
+       value */
+    LANE_LOOP(li, lane) {
+        npy_intp i, start, last_masked = -1;
+        npy_intp *starts = raw_starts;
+        int is_masked;
 
-            if (*orig_mask != NULL) {
-                PyObject *valMask;
-                valMask = PyArray_GETITEM(orig_mask_tmp,
-                                          PyArray_GetPtr(orig_mask_tmp, &idx));
-                is_masked = (int)PyInt_AsLong(valMask);
-                Py_DECREF(valMask);
-            }
+        for (i=0; i<li.size; i++) {
 
-            if (is_masked) {
-                valid_points=0;
-            } else {
-                if (valid_points < span) { valid_points += 1; }
-                if (valid_points < span) { is_masked = 1; }
+            if ((li.ptrs[0] != NULL) &&
+                LANE_ITEM(npy_bool, li.ptrs[0], li.strides[0], i)) {
+                last_masked = i;
             }
+            start = WINDOW_START(i);
+            is_masked = ((start < 0) || (last_masked >= start));
 
-            raw_result_mask[i] = is_masked;
+            LANE_ITEM(npy_bool, li.ptrs[1], li.strides[1], i) = is_masked;
         }
     }
-
-    *result_mask = PyArray_SimpleNewFromData(
-                             1, (*orig_ndarray_tmp)->dimensions,
-                             PyArray_INT32, raw_result_mask);
-    MEM_CHECK(*result_mask)
-    result_mask_tmp = (PyArrayObject**)result_mask;
-    (*result_mask_tmp)->flags = ((*result_mask_tmp)->flags) | NPY_OWNDATA;
+    lane_iter_free(&li);
     return 0;
+
+ fail:
+    Py_XDECREF(*orig_ndarray);
+    Py_XDECREF(*orig_mask);
+    Py_XDECREF(*result_mask);
+    Py_XDECREF(*starts);
+    *orig_ndarray = *orig_mask = *result_mask = *starts = NULL;
+    return -1;
 }
 
 // check if value at specified index is masked
@@ -427,10 +1275,10 @@ _is_masked(PyArrayObject *mask, npy_intp idx) {
 
 }
 
-/* computation portion of moving sum. Appropriate mask is overlayed on top
-   afterwards */
+/* computation portion of moving sum, for any type (using Python objects).
+   Appropriate mask is overlayed on top afterwards */
 static PyObject*
-calc_mov_sum(
+calc_mov_sum_generic(
     PyArrayObject *orig_ndarray, PyArrayObject *orig_mask, int span, int rtype)
 {
     PyArrayObject *result_ndarray=NULL;
@@ -511,49 +1359,313 @@ calc_mov_sum(
 
 }
 
-PyObject *
-MaskedArray_mov_sum(PyObject *self, PyObject *args, PyObject *kwds)
-{
-    PyObject *orig_arrayobj=NULL, *orig_ndarray=NULL, *orig_mask=NULL,
-             *result_ndarray=NULL, *result_mask=NULL,
-             *result_dict=NULL;
-    PyArray_Descr *dtype=NULL;
-
-    int rtype, span, type_num_double;
-
-    static char *kwlist[] = {"array", "span", "type_num_double", "dtype", NULL};
+PyObject* calc_mov_ranked(PyArrayObject*, int, int, char);
+static PyObject* calc_mov_average_expw_generic(PyArrayObject*,
+                                               PyArrayObject*, double, int);
 
-    if (!PyArg_ParseTupleAndKeywords(args, kwds,
-                "Oii|O&:mov_sum(array, span, type_num_double , dtype)", kwlist,
-                &orig_arrayobj, &span, &type_num_double,
-                PyArray_DescrConverter2, &dtype)) return NULL;
-
-    check_mov_args(orig_arrayobj, span, 1,
-                   &orig_ndarray, &orig_mask, &result_mask);
+/* 1-D view of the lane of `arr` starting at `ptr` */
+static PyObject*
+lane_view(PyArrayObject *arr, char *ptr, npy_intp size, npy_intp stride)
+{
+    PyObject *view;
+
+    Py_INCREF(arr->descr);
+    view = PyArray_NewFromDescr(&PyArray_Type, arr->descr, 1, &size, &stride,
+                                ptr, arr->flags & NPY_WRITEABLE, NULL);
+    if (view == NULL) { return NULL; }
+    Py_INCREF(arr);
+    ((PyArrayObject*)view)->base = (PyObject*)arr;
+    return view;
+}
 
-    if (type_num_double) {
-        /* if the moving sum is being used as an intermediate step in something
-        like a standard deviation calculation, etc... then _get_type_num_double
-        should be used to determine the appropriate return type. */
-        rtype = _get_type_num_double(((PyArrayObject*)orig_ndarray)->descr, dtype);
-    } else {
-        rtype = _get_type_num(((PyArrayObject*)orig_ndarray)->descr, dtype);
+/* Applies one of the 1-D computations on Python objects on each lane of
+   `orig_ndarray` along `axis`: the moving sum ('S'), the exponentially
+   weighted moving average ('W', with the decay factor `decay`), or the
+   moving rank statistic `kind` of calc_mov_ranked */
+static PyObject*
+calc_lanes_generic(PyArrayObject *orig_ndarray, PyArrayObject *orig_mask,
+                   int axis, int span, double decay, int rtype, char kind)
+{
+    PyArrayObject *arrays[3];
+    PyObject *result_ndarray, *values=NULL, *mask=NULL, *result=NULL,
+             *lane_result=NULL;
+    lane_iter li;
+    npy_intp lane;
+
+    result_ndarray = PyArray_ZEROS(orig_ndarray->nd, orig_ndarray->dimensions,
+                                   rtype, 0);
+    ERR_CHECK(result_ndarray)
+    arrays[0] = orig_ndarray;
+    arrays[1] = orig_mask;
+    arrays[2] = (PyArrayObject*)result_ndarray;
+    if (lane_iter_init(&li, arrays, 3, axis) < 0) {
+        Py_DECREF(result_ndarray);
+        return NULL;
     }
 
-    result_ndarray = calc_mov_sum(
-        (PyArrayObject*)orig_ndarray, (PyArrayObject*)orig_mask,
-        span, rtype
-    );
-    ERR_CHECK(result_ndarray)
+    LANE_LOOP(li, lane) {
+        values = lane_view(orig_ndarray, li.ptrs[0], li.size, li.strides[0]);
+        if (values == NULL) { goto fail; }
+        if (orig_mask != NULL) {
+            mask = lane_view(orig_mask, li.ptrs[1], li.size, li.strides[1]);
+            if (mask == NULL) { goto fail; }
+        }
+        result = lane_view((PyArrayObject*)result_ndarray, li.ptrs[2],
+                           li.size, li.strides[2]);
+        if (result == NULL) { goto fail; }
+
+        switch (kind) {
+            case 'S':
+                lane_result = calc_mov_sum_generic(
+                    (PyArrayObject*)values, (PyArrayObject*)mask, span, rtype);
+                break;
+            case 'W':
+                lane_result = calc_mov_average_expw_generic(
+                    (PyArrayObject*)values, (PyArrayObject*)mask, decay,
+                    rtype);
+                break;
+            default:
+                lane_result = calc_mov_ranked((PyArrayObject*)values,
+                                              span, rtype, kind);
+        }
+        if ((lane_result == NULL) ||
+            (PyArray_CopyInto((PyArrayObject*)result,
+                              (PyArrayObject*)lane_result) < 0)) {
+            goto fail;
+        }
+        Py_CLEAR(values);
+        Py_CLEAR(mask);
+        Py_CLEAR(result);
+        Py_CLEAR(lane_result);
+    }
+    lane_iter_free(&li);
+    return result_ndarray;
+
+ fail:
+    Py_XDECREF(values);
+    Py_XDECREF(mask);
+    Py_XDECREF(result);
+    Py_XDECREF(lane_result);
+    lane_iter_free(&li);
+    Py_DECREF(result_ndarray);
+    return NULL;
+}
 
-    result_dict = PyDict_New();
-    MEM_CHECK(result_dict)
-    PyDict_SetItemString(result_dict, "array", result_ndarray);
-    PyDict_SetItemString(result_dict, "mask", result_mask);
+/* Running sum over the raw data and mask of each lane: the sum is reset
+   after each masked value, and the values leaving the window (from position
+   `lo`) are subtracted once the window is full of unmasked values. The sum
+   is accumulated as `acctype`. */
+#define MOV_SUM_LOOP(type, acctype) { \
+    acctype sum = 0; \
+    LANE_LOOP(li, lane) { \
+        non_masked = 0; \
+        for (i = 0; i < li.size; i++) { \
+            if (!LANE_MASKED(li, 1, i)) { non_masked += 1; } \
+            else { non_masked = 0; } \
+            if (non_masked <= 1) { \
+                /* the current or previous value is masked: reset the sum */ \
+                sum = LANE_VALUE(li, type, 0, i); \
+                lo = i; \
+            } else { \
+                sum += LANE_VALUE(li, type, 0, i); \
+                for (; lo < WINDOW_START(i); lo++) { \
+                    sum -= LANE_VALUE(li, type, 0, lo); \
+                } \
+            } \
+            LANE_VALUE(li, type, 2, i) = (type)sum; \
+        } \
+    } \
+}
 
-    Py_DECREF(result_ndarray);
-    Py_DECREF(result_mask);
-    return result_dict;
+/* Same as MOV_SUM_LOOP with a compensated (Kahan) summation, which keeps the
+   rounding errors from accumulating on long series of floats */
+#define KAHAN_ADD(sum, comp, value) { \
+    y = (value) - comp; \
+    t = sum + y; \
+    comp = (t - sum) - y; \
+    sum = t; \
+}
+#define MOV_SUM_KAHAN_LOOP(type, acctype) { \
+    acctype sum = 0, comp = 0, y, t; \
+    LANE_LOOP(li, lane) { \
+        non_masked = 0; \
+        for (i = 0; i < li.size; i++) { \
+            if (!LANE_MASKED(li, 1, i)) { non_masked += 1; } \
+            else { non_masked = 0; } \
+            if (non_masked <= 1) { \
+                sum = LANE_VALUE(li, type, 0, i); \
+                comp = 0; \
+                lo = i; \
+            } else { \
+                KAHAN_ADD(sum, comp, LANE_VALUE(li, type, 0, i)) \
+                for (; lo < WINDOW_START(i); lo++) { \
+                    KAHAN_ADD(sum, comp, -LANE_VALUE(li, type, 0, lo)) \
+                } \
+            } \
+            LANE_VALUE(li, type, 2, i) = (type)sum; \
+        } \
+    } \
+}
+
+/* kernel of the moving sum, on the lanes of the values (of type `type_num`),
+   of their mask and of the result. `option` asks for a compensated
+   summation */
+static int
+mov_sum_kernel(lane_iter li, mov_params *params)
+{
+    npy_intp i, lane, non_masked, lo = 0, *starts = params->starts;
+    int span = params->span, compensated = params->option;
+
+    switch (params->type_num) {
+        case NPY_BYTE: MOV_SUM_LOOP(npy_byte, npy_byte) break;
+        case NPY_UBYTE: MOV_SUM_LOOP(npy_ubyte, npy_ubyte) break;
+        case NPY_SHORT: MOV_SUM_LOOP(npy_short, npy_short) break;
+        case NPY_USHORT: MOV_SUM_LOOP(npy_ushort, npy_ushort) break;
+        case NPY_INT: MOV_SUM_LOOP(npy_int, npy_int) break;
+        case NPY_UINT: MOV_SUM_LOOP(npy_uint, npy_uint) break;
+        case NPY_LONG: MOV_SUM_LOOP(npy_long, npy_long) break;
+        case NPY_ULONG: MOV_SUM_LOOP(npy_ulong, npy_ulong) break;
+        case NPY_LONGLONG: MOV_SUM_LOOP(npy_longlong, npy_longlong) break;
+        case NPY_ULONGLONG: MOV_SUM_LOOP(npy_ulonglong, npy_ulonglong) break;
+        case NPY_FLOAT:
+            if (compensated) MOV_SUM_KAHAN_LOOP(npy_float, npy_double)
+            else MOV_SUM_LOOP(npy_float, npy_double)
+            break;
+        case NPY_DOUBLE:
+            if (compensated) MOV_SUM_KAHAN_LOOP(npy_double, npy_double)
+            else MOV_SUM_LOOP(npy_double, npy_double)
+            break;
+        case NPY_LONGDOUBLE:
+            if (compensated) MOV_SUM_KAHAN_LOOP(npy_longdouble, npy_longdouble)
+            else MOV_SUM_LOOP(npy_longdouble, npy_longdouble)
+            break;
+    }
+    return 0;
+}
+
+/* computation portion of moving sum along `axis`, over the windows given by
+   `starts` if it is not NULL (see mov_params). Appropriate mask is overlayed
+   on top afterwards */
+static PyObject*
+calc_mov_sum(
+    PyArrayObject *orig_ndarray, PyArrayObject *orig_mask, int axis, int span,
+    npy_intp *starts, int rtype, int compensated, int nthreads)
+{
+    PyArrayObject *values, *result_ndarray, *arrays[3];
+    PyObject *casted;
+    lane_iter li;
+    mov_params params = {0};
+    int status, itype = orig_ndarray->descr->type_num, wtype = rtype;
+
+    if (!(PyTypeNum_ISINTEGER(rtype) || PyTypeNum_ISFLOAT(rtype)) ||
+        !(PyTypeNum_ISINTEGER(itype) || PyTypeNum_ISFLOAT(itype) ||
+          PyTypeNum_ISBOOL(itype))) {
+        return calc_lanes_generic(orig_ndarray, orig_mask, axis, span, 0,
+                                  rtype, 'S');
+    }
+    /* floats summed into an integer type are accumulated as floats, and only
+       the final sums are converted */
+    if (PyTypeNum_ISINTEGER(rtype) && PyTypeNum_ISFLOAT(itype)) {
+        wtype = (itype == NPY_LONGDOUBLE) ? NPY_LONGDOUBLE : NPY_DOUBLE;
+    }
+
+    values = (PyArrayObject*)PyArray_FROMANY((PyObject*)orig_ndarray, wtype,
+                                             0, 0,
+                                             NPY_ALIGNED | NPY_FORCECAST);
+    ERR_CHECK(values)
+    result_ndarray = (PyArrayObject*)PyArray_SimpleNew(values->nd,
+                                                       values->dimensions,
+                                                       wtype);
+    if (result_ndarray == NULL) {
+        Py_DECREF(values);
+        return NULL;
+    }
+    arrays[0] = values;
+    arrays[1] = orig_mask;
+    arrays[2] = result_ndarray;
+    if (lane_iter_init(&li, arrays, 3, axis) < 0) {
+        Py_DECREF(values);
+        Py_DECREF(result_ndarray);
+        return NULL;
+    }
+
+    params.type_num = wtype;
+    params.span = span;
+    params.starts = starts;
+    params.option = compensated;
+    status = run_lanes(&li, mov_sum_kernel, &params, nthreads);
+    lane_iter_free(&li);
+    Py_DECREF(values);
+    if (status < 0) {
+        Py_DECREF(result_ndarray);
+        return NULL;
+    }
+
+    if (wtype != rtype) {
+        casted = PyArray_Cast(result_ndarray, rtype);
+        Py_DECREF(result_ndarray);
+        return casted;
+    }
+    return (PyObject*)result_ndarray;
+}
+
+PyObject *
+MaskedArray_mov_sum(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *orig_arrayobj=NULL, *orig_ndarray=NULL, *orig_mask=NULL,
+             *result_ndarray=NULL, *result_mask=NULL,
+             *result_dict=NULL, *dates=NULL, *starts=NULL;
+    PyArray_Descr *dtype=NULL;
+
+    int rtype, span, capacity, type_num_double, compensated=0, axis=0,
+        nthreads=1;
+
+    static char *kwlist[] = {"array", "span", "type_num_double", "dtype",
+                             "compensated", "axis", "nthreads", "dates", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds,
+                "Oii|O&iiiO:mov_sum(array, span, type_num_double, dtype, "\
+                "compensated, axis, nthreads, dates)", kwlist,
+                &orig_arrayobj, &span, &type_num_double,
+                PyArray_DescrConverter2, &dtype, &compensated,
+                &axis, &nthreads, &dates)) return NULL;
+
+    if (check_mov_args(orig_arrayobj, span, 1, &axis, dates,
+                       &orig_ndarray, &orig_mask, &result_mask,
+                       &starts, &capacity) < 0) {
+        return NULL;
+    }
+
+    if (type_num_double) {
+        /* if the moving sum is being used as an intermediate step in something
+        like a standard deviation calculation, etc... then _get_type_num_double
+        should be used to determine the appropriate return type. */
+        rtype = _get_type_num_double(((PyArrayObject*)orig_ndarray)->descr, dtype);
+    } else {
+        rtype = _get_type_num(((PyArrayObject*)orig_ndarray)->descr, dtype);
+    }
+
+    result_ndarray = calc_mov_sum(
+        (PyArrayObject*)orig_ndarray, (PyArrayObject*)orig_mask,
+        axis, capacity, WINDOW_STARTS_DATA(starts), rtype, compensated,
+        nthreads
+    );
+    Py_DECREF(orig_ndarray);
+    Py_XDECREF(starts);
+    Py_XDECREF(orig_mask);
+    if (result_ndarray == NULL) {
+        Py_DECREF(result_mask);
+        return NULL;
+    }
+
+    result_dict = PyDict_New();
+    MEM_CHECK(result_dict)
+    PyDict_SetItemString(result_dict, "array", result_ndarray);
+    PyDict_SetItemString(result_dict, "mask", result_mask);
+
+    Py_DECREF(result_ndarray);
+    Py_DECREF(result_mask);
+    return result_dict;
 }
 
 PyObject*
@@ -737,33 +1849,445 @@ calc_mov_ranked(PyArrayObject *orig_ndarray, int span, int rtype, char rank_type
 
 }
 
+/* Indexable skiplist used as the order-statistics engine of the moving
+   median, quantile and rank functions. Each node stores a value of the
+   window with its position in the array, so that duplicated values can be
+   removed unambiguously, and the number of nodes each link skips over, so
+   that the k-th smallest value is found in O(log(span)) operations.
+   All the nodes are preallocated in a single block. */
+typedef struct _skipnode {
+    double value;
+    npy_intp index;
+    int levels;
+    struct _skipnode **next;
+    npy_intp *width;
+} skipnode;
+
+typedef struct {
+    skipnode *head;
+    skipnode **freenodes;
+    skipnode **chain;
+    npy_intp *steps;
+    npy_intp size, nfree;
+    int maxlevels;
+    unsigned long seed;
+    void *block;
+} skiplist;
+
+/* (value, index) ordering of the nodes. A NULL node is past the end */
+#define SKIP_BEFORE(node, v, i) \
+    (((node) != NULL) && \
+     (((node)->value < (v)) || (((node)->value == (v)) && ((node)->index < (i)))))
+
+static void
+skiplist_free(skiplist *sl)
+{
+    if (sl->block != NULL) { free(sl->block); }
+    sl->block = NULL;
+}
+
+static int
+skiplist_init(skiplist *sl, npy_intp capacity)
+{
+    npy_intp i, nbnodes = capacity + 1;
+    int k, maxlevels = 1;
+    size_t nodesize;
+    char *ptr;
+
+    while (((npy_intp)1 << maxlevels) < capacity && maxlevels < 32) {
+        maxlevels++;
+    }
+    nodesize = sizeof(skipnode) +
+               maxlevels * (sizeof(skipnode*) + sizeof(npy_intp));
+    /* allocated with malloc, as the skiplists are used without the GIL */
+    sl->block = malloc(nbnodes * nodesize +
+                       nbnodes * sizeof(skipnode*) +
+                       maxlevels * (sizeof(skipnode*) + sizeof(npy_intp)));
+    if (sl->block == NULL) { return -1; }
+    ptr = (char*)sl->block;
+    sl->freenodes = (skipnode**)ptr;
+    ptr += nbnodes * sizeof(skipnode*);
+    sl->chain = (skipnode**)ptr;
+    ptr += maxlevels * sizeof(skipnode*);
+    sl->steps = (npy_intp*)ptr;
+    ptr += maxlevels * sizeof(npy_intp);
+    for (i = 0; i < nbnodes; i++) {
+        skipnode *node = (skipnode*)ptr;
+        node->next = (skipnode**)(ptr + sizeof(skipnode));
+        node->width = (npy_intp*)(ptr + sizeof(skipnode) +
+                                  maxlevels * sizeof(skipnode*));
+        sl->freenodes[i] = node;
+        ptr += nodesize;
+    }
+    sl->maxlevels = maxlevels;
+    /* the last node is the head */
+    sl->nfree = nbnodes - 1;
+    sl->head = (skipnode*)(ptr - nodesize);
+    sl->head->levels = maxlevels;
+    for (k = 0; k < maxlevels; k++) {
+        sl->head->next[k] = NULL;
+        sl->head->width[k] = 1;
+    }
+    sl->size = 0;
+    sl->seed = 2463534242UL;
+    return 0;
+}
+
+static void
+skiplist_insert(skiplist *sl, double value, npy_intp index)
+{
+    skipnode *node = sl->head, *newnode;
+    npy_intp step = 0;
+    int k, levels = 1;
+
+    for (k = sl->maxlevels - 1; k >= 0; k--) {
+        sl->steps[k] = 0;
+        while (SKIP_BEFORE(node->next[k], value, index)) {
+            sl->steps[k] += node->width[k];
+            node = node->next[k];
+        }
+        sl->chain[k] = node;
+    }
+    /* geometric distribution of the levels (xorshift generator) */
+    sl->seed ^= (sl->seed << 13) & 0xFFFFFFFFUL;
+    sl->seed ^= sl->seed >> 17;
+    sl->seed ^= (sl->seed << 5) & 0xFFFFFFFFUL;
+    while ((levels < sl->maxlevels) && ((sl->seed >> (levels - 1)) & 1)) {
+        levels++;
+    }
+    newnode = sl->freenodes[--(sl->nfree)];
+    newnode->value = value;
+    newnode->index = index;
+    newnode->levels = levels;
+    for (k = 0; k < levels; k++) {
+        skipnode *prev = sl->chain[k];
+        newnode->next[k] = prev->next[k];
+        prev->next[k] = newnode;
+        newnode->width[k] = prev->width[k] - step;
+        prev->width[k] = step + 1;
+        step += sl->steps[k];
+    }
+    for (k = levels; k < sl->maxlevels; k++) {
+        sl->chain[k]->width[k] += 1;
+    }
+    sl->size += 1;
+}
+
+static void
+skiplist_remove(skiplist *sl, double value, npy_intp index)
+{
+    skipnode *node = sl->head, *oldnode;
+    int k;
+
+    for (k = sl->maxlevels - 1; k >= 0; k--) {
+        while (SKIP_BEFORE(node->next[k], value, index)) {
+            node = node->next[k];
+        }
+        sl->chain[k] = node;
+    }
+    oldnode = node->next[0];
+    for (k = 0; k < oldnode->levels; k++) {
+        skipnode *prev = sl->chain[k];
+        prev->width[k] += oldnode->width[k] - 1;
+        prev->next[k] = oldnode->next[k];
+    }
+    for (k = oldnode->levels; k < sl->maxlevels; k++) {
+        sl->chain[k]->width[k] -= 1;
+    }
+    sl->freenodes[(sl->nfree)++] = oldnode;
+    sl->size -= 1;
+}
+
+/* Returns the node of the i-th smallest value (0-based) */
+static skipnode*
+skiplist_get(skiplist *sl, npy_intp i)
+{
+    skipnode *node = sl->head;
+    int k;
+
+    i += 1;
+    for (k = sl->maxlevels - 1; k >= 0; k--) {
+        while ((node->next[k] != NULL) && (node->width[k] <= i)) {
+            i -= node->width[k];
+            node = node->next[k];
+        }
+    }
+    return node;
+}
+
+/* Returns the number of values lower than (or equal to, if `orequal`)
+   `value` */
+static npy_intp
+skiplist_count(skiplist *sl, double value, int orequal)
+{
+    skipnode *node = sl->head;
+    npy_intp count = 0;
+    int k;
+
+    for (k = sl->maxlevels - 1; k >= 0; k--) {
+        while ((node->next[k] != NULL) &&
+               ((node->next[k]->value < value) ||
+                (orequal && (node->next[k]->value == value)))) {
+            count += node->width[k];
+            node = node->next[k];
+        }
+    }
+    return count;
+}
+
+/* Empties the skiplist, so that it can be reused */
+static void
+skiplist_reset(skiplist *sl)
+{
+    skipnode *node = sl->head->next[0], *next;
+    int k;
+
+    while (node != NULL) {
+        next = node->next[0];
+        sl->freenodes[(sl->nfree)++] = node;
+        node = next;
+    }
+    for (k = 0; k < sl->maxlevels; k++) {
+        sl->head->next[k] = NULL;
+        sl->head->width[k] = 1;
+    }
+    sl->size = 0;
+}
+
+/* Moving order statistics of the current lane of `li` (the data as doubles,
+   their mask, the result and the positions), skipping the masked values.
+   With `stat` 'Q', the result is the `quantile` of the valid values of each
+   window (linear interpolation between the closest ranks), and the position
+   the index of the value of lower rank. With `stat` 'R', the result is the
+   rank (from 1, the average rank for ties) of the current value in its
+   window. `interpolated` is set if the quantile of any full window was
+   interpolated. The windows are given by `span` and `starts` as with
+   mov_params. */
+static void
+mov_order_stats(skiplist *sl, lane_iter *li, int span, npy_intp *starts,
+                char stat, double quantile, int *interpolated)
+{
+    skipnode *node;
+    npy_intp i, lo, first = 0;
+    double h, frac, value;
+
+    skiplist_reset(sl);
+
+    for (i = 0; i < li->size; i++) {
+        value = LANE_VALUE(*li, double, 0, i);
+        for (; first < WINDOW_START(i); first++) {
+            if (!LANE_MASKED(*li, 1, first)) {
+                skiplist_remove(sl, LANE_VALUE(*li, double, 0, first), first);
+            }
+        }
+        if (!LANE_MASKED(*li, 1, i)) {
+            skiplist_insert(sl, value, i);
+        }
+        LANE_VALUE(*li, double, 2, i) = 0;
+        if (li->ptrs[3] != NULL) { LANE_VALUE(*li, npy_intp, 3, i) = i; }
+        if (sl->size == 0) { continue; }
+
+        if (stat == 'R') {
+            npy_intp lower = skiplist_count(sl, value, 0);
+            npy_intp upper = skiplist_count(sl, value, 1);
+            LANE_VALUE(*li, double, 2, i) = (lower + upper + 1) / 2.;
+        } else {
+            h = (sl->size - 1) * quantile;
+            lo = (npy_intp)h;
+            frac = h - lo;
+            if (lo >= sl->size - 1) {
+                lo = sl->size - 1;
+                frac = 0;
+            }
+            node = skiplist_get(sl, lo);
+            LANE_VALUE(*li, npy_intp, 3, i) = node->index;
+            if (frac > 0) {
+                LANE_VALUE(*li, double, 2, i) =
+                    node->value * (1. - frac) +
+                    skiplist_get(sl, lo + 1)->value * frac;
+                /* partial windows are masked afterwards anyway */
+                if (sl->size == i - WINDOW_START(i) + 1) { *interpolated = 1; }
+            } else {
+                LANE_VALUE(*li, double, 2, i) = node->value;
+            }
+        }
+    }
+}
+
+/* kernel of the moving order statistics, on the lanes of the data (as
+   doubles), of their mask, of the result and of the positions */
+static int
+mov_order_stats_kernel(lane_iter li, mov_params *params)
+{
+    skiplist sl;
+    npy_intp lane;
+
+    if (skiplist_init(&sl, params->span) < 0) { return -1; }
+    LANE_LOOP(li, lane) {
+        mov_order_stats(&sl, &li, params->span, params->starts, params->stat,
+                        params->quantile, &(params->flag));
+    }
+    skiplist_free(&sl);
+    return 0;
+}
+
+/* Takes the items of each lane of `orig_ndarray` along `axis` at the
+   positions given by the matching lane of `position` */
+static PyObject*
+take_along_lanes(PyArrayObject *orig_ndarray, PyArrayObject *position,
+                 int axis)
+{
+    PyArrayObject *result, *arrays[3];
+    lane_iter li;
+    npy_intp i, lane;
+    int itemsize = orig_ndarray->descr->elsize;
+
+    Py_INCREF(orig_ndarray->descr);
+    result = (PyArrayObject*)PyArray_NewFromDescr(
+                                &PyArray_Type, orig_ndarray->descr,
+                                orig_ndarray->nd, orig_ndarray->dimensions,
+                                NULL, NULL, 0, NULL);
+    ERR_CHECK(result)
+    arrays[0] = orig_ndarray;
+    arrays[1] = position;
+    arrays[2] = result;
+    if (lane_iter_init(&li, arrays, 3, axis) < 0) {
+        Py_DECREF(result);
+        return NULL;
+    }
+    LANE_LOOP(li, lane) {
+        for (i = 0; i < li.size; i++) {
+            memcpy(li.ptrs[2] + i * li.strides[2],
+                   li.ptrs[0] + LANE_VALUE(li, npy_intp, 1, i) * li.strides[0],
+                   itemsize);
+        }
+    }
+    lane_iter_free(&li);
+    return (PyObject*)result;
+}
+
+/* computation portion of the moving quantiles ('Q') and ranks ('R') along
+   `axis`, over the windows given by `starts` if it is not NULL (see
+   mov_params): masked values are excluded from the windows, and the
+   appropriate mask is overlayed on top afterwards */
+static PyObject*
+calc_mov_order_stats(PyArrayObject *orig_ndarray, PyArrayObject *orig_mask,
+                     int axis, int span, npy_intp *starts, int rtype,
+                     char stat, double quantile, int nthreads)
+{
+    PyArrayObject *values, *result_ndarray, *position=NULL, *arrays[4];
+    PyObject *result;
+    lane_iter li;
+    mov_params params = {0};
+    int status, itype = orig_ndarray->descr->type_num;
+
+    if (!(PyTypeNum_ISINTEGER(itype) || PyTypeNum_ISFLOAT(itype) ||
+          PyTypeNum_ISBOOL(itype))) {
+        PyErr_SetString(PyExc_TypeError,
+                        "moving order statistics require real numbers");
+        return NULL;
+    }
+
+    values = (PyArrayObject*)PyArray_FROMANY((PyObject*)orig_ndarray,
+                                             NPY_DOUBLE, 0, 0,
+                                             NPY_ALIGNED | NPY_FORCECAST);
+    ERR_CHECK(values)
+    result_ndarray = (PyArrayObject*)PyArray_SimpleNew(values->nd,
+                                                       values->dimensions,
+                                                       NPY_DOUBLE);
+    if (stat == 'Q') {
+        position = (PyArrayObject*)PyArray_SimpleNew(values->nd,
+                                                     values->dimensions,
+                                                     NPY_INTP);
+    }
+    if ((result_ndarray == NULL) || ((stat == 'Q') && (position == NULL))) {
+        goto fail;
+    }
+    arrays[0] = values;
+    arrays[1] = orig_mask;
+    arrays[2] = result_ndarray;
+    arrays[3] = position;
+    if (lane_iter_init(&li, arrays, 4, axis) < 0) { goto fail; }
+    params.span = span;
+    params.starts = starts;
+    params.stat = stat;
+    params.quantile = quantile;
+    status = run_lanes(&li, mov_order_stats_kernel, &params, nthreads);
+    lane_iter_free(&li);
+    if (status < 0) { goto fail; }
+    Py_DECREF(values);
+
+    if ((stat == 'Q') && !params.flag) {
+        /* non-interpolated quantiles are taken from the original values, to
+           keep the precision of large integers and long doubles */
+        Py_DECREF(result_ndarray);
+        result = take_along_lanes(orig_ndarray, position, axis);
+        Py_DECREF(position);
+        ERR_CHECK(result)
+        if (((PyArrayObject*)result)->descr->type_num != rtype) {
+            result_ndarray = (PyArrayObject*)result;
+            result = PyArray_Cast(result_ndarray, rtype);
+            Py_DECREF(result_ndarray);
+        }
+        return result;
+    }
+    Py_XDECREF(position);
+    if (rtype != NPY_DOUBLE) {
+        result = PyArray_Cast(result_ndarray, rtype);
+        Py_DECREF(result_ndarray);
+        return result;
+    }
+    return (PyObject*)result_ndarray;
+
+ fail:
+    Py_DECREF(values);
+    Py_XDECREF(result_ndarray);
+    Py_XDECREF(position);
+    return NULL;
+}
+
 PyObject *
 MaskedArray_mov_median(PyObject *self, PyObject *args, PyObject *kwds)
 {
     PyObject *orig_arrayobj=NULL, *orig_ndarray=NULL, *orig_mask=NULL,
-             *result_ndarray=NULL, *result_mask=NULL, *result_dict=NULL;
+             *result_ndarray=NULL, *result_mask=NULL, *result_dict=NULL,
+             *dates=NULL, *starts=NULL;
     PyArray_Descr *dtype=NULL;
 
-    int rtype, span;
+    int rtype, span, capacity, axis=0, nthreads=1;
 
-    static char *kwlist[] = {"array", "span", "dtype", NULL};
+    static char *kwlist[] = {"array", "span", "dtype", "axis", "nthreads",
+                             "dates", NULL};
 
     if (!PyArg_ParseTupleAndKeywords(args, kwds,
-                "Oi|O&:mov_median(array, span, dtype)", kwlist,
-                &orig_arrayobj, &span,
-                PyArray_DescrConverter2, &dtype)) return NULL;
-
-    check_mov_args(orig_arrayobj, span, 1,
-                   &orig_ndarray, &orig_mask, &result_mask);
+                "Oi|O&iiO:mov_median(array, span, dtype, axis, nthreads, dates)",
+                kwlist, &orig_arrayobj, &span,
+                PyArray_DescrConverter2, &dtype, &axis,
+                &nthreads, &dates)) return NULL;
+
+    if (check_mov_args(orig_arrayobj, span, 1, &axis, dates,
+                       &orig_ndarray, &orig_mask, &result_mask,
+                       &starts, &capacity) < 0) {
+        return NULL;
+    }
 
-    if ((span % 2) == 0) {
+    if (((span % 2) == 0) || (starts != NULL)) {
         rtype = _get_type_num_double(((PyArrayObject*)orig_ndarray)->descr, dtype);
     } else {
         rtype = _get_type_num(((PyArrayObject*)orig_ndarray)->descr, dtype);
     }
 
-    result_ndarray = calc_mov_ranked((PyArrayObject*)orig_ndarray,
-                                     span, rtype, 'E');
+    if (PyArray_ISCOMPLEX(orig_ndarray) || PyArray_ISOBJECT(orig_ndarray)) {
+        result_ndarray = calc_lanes_generic((PyArrayObject*)orig_ndarray,
+                                            (PyArrayObject*)orig_mask,
+                                            axis, span, 0, rtype, 'E');
+    } else {
+        result_ndarray = calc_mov_order_stats(
+            (PyArrayObject*)orig_ndarray, (PyArrayObject*)orig_mask,
+            axis, capacity, WINDOW_STARTS_DATA(starts), rtype, 'Q', 0.5,
+            nthreads);
+    }
+    Py_XDECREF(starts);
     ERR_CHECK(result_ndarray)
 
     result_dict = PyDict_New();
@@ -771,34 +2295,313 @@ MaskedArray_mov_median(PyObject *self, PyObject *args, PyObject *kwds)
     PyDict_SetItemString(result_dict, "array", result_ndarray);
     PyDict_SetItemString(result_dict, "mask", result_mask);
 
+    Py_DECREF(orig_ndarray);
+    Py_XDECREF(orig_mask);
     Py_DECREF(result_ndarray);
     Py_DECREF(result_mask);
     return result_dict;
 }
 
 PyObject *
-MaskedArray_mov_min(PyObject *self, PyObject *args, PyObject *kwds)
+MaskedArray_mov_quantile(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *orig_arrayobj=NULL, *orig_ndarray=NULL, *orig_mask=NULL,
+             *result_ndarray=NULL, *result_mask=NULL, *result_dict=NULL,
+             *dates=NULL, *starts=NULL;
+    PyArray_Descr *dtype=NULL;
+
+    int rtype, span, capacity, axis=0, nthreads=1;
+    double quantile;
+
+    static char *kwlist[] = {"array", "span", "quantile", "dtype", "axis",
+                             "nthreads", "dates", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds,
+                "Oid|O&iiO:mov_quantile(array, span, quantile, dtype, axis, "\
+                "nthreads, dates)", kwlist, &orig_arrayobj, &span, &quantile,
+                PyArray_DescrConverter2, &dtype, &axis,
+                &nthreads, &dates)) return NULL;
+
+    if (!((quantile >= 0) && (quantile <= 1))) {
+        PyErr_SetString(PyExc_ValueError,
+                        "quantile must be between 0 and 1");
+        return NULL;
+    }
+
+    if (check_mov_args(orig_arrayobj, span, 1, &axis, dates,
+                       &orig_ndarray, &orig_mask, &result_mask,
+                       &starts, &capacity) < 0) {
+        return NULL;
+    }
+
+    rtype = _get_type_num_double(((PyArrayObject*)orig_ndarray)->descr, dtype);
+
+    result_ndarray = calc_mov_order_stats(
+        (PyArrayObject*)orig_ndarray, (PyArrayObject*)orig_mask,
+        axis, capacity, WINDOW_STARTS_DATA(starts), rtype, 'Q', quantile,
+        nthreads);
+    Py_XDECREF(starts);
+    ERR_CHECK(result_ndarray)
+
+    result_dict = PyDict_New();
+    MEM_CHECK(result_dict)
+    PyDict_SetItemString(result_dict, "array", result_ndarray);
+    PyDict_SetItemString(result_dict, "mask", result_mask);
+
+    Py_DECREF(orig_ndarray);
+    Py_XDECREF(orig_mask);
+    Py_DECREF(result_ndarray);
+    Py_DECREF(result_mask);
+    return result_dict;
+}
+
+PyObject *
+MaskedArray_mov_rank(PyObject *self, PyObject *args, PyObject *kwds)
 {
     PyObject *orig_arrayobj=NULL, *orig_ndarray=NULL, *orig_mask=NULL,
-             *result_ndarray=NULL, *result_mask=NULL, *result_dict=NULL;
+             *result_ndarray=NULL, *result_mask=NULL, *result_dict=NULL,
+             *dates=NULL, *starts=NULL;
     PyArray_Descr *dtype=NULL;
 
-    int rtype, span;
+    int rtype, span, capacity, axis=0, nthreads=1;
 
-    static char *kwlist[] = {"array", "span", "dtype", NULL};
+    static char *kwlist[] = {"array", "span", "dtype", "axis", "nthreads",
+                             "dates", NULL};
 
     if (!PyArg_ParseTupleAndKeywords(args, kwds,
-                "Oi|O&:mov_min(array, span, dtype)", kwlist,
-                &orig_arrayobj, &span,
-                PyArray_DescrConverter2, &dtype)) return NULL;
+                "Oi|O&iiO:mov_rank(array, span, dtype, axis, nthreads, dates)",
+                kwlist, &orig_arrayobj, &span,
+                PyArray_DescrConverter2, &dtype, &axis,
+                &nthreads, &dates)) return NULL;
+
+    if (check_mov_args(orig_arrayobj, span, 1, &axis, dates,
+                       &orig_ndarray, &orig_mask, &result_mask,
+                       &starts, &capacity) < 0) {
+        return NULL;
+    }
+
+    // ranks are always floats (ties get the average rank) by default
+    rtype = (dtype == NULL) ? NPY_DOUBLE : dtype->type_num;
+
+    result_ndarray = calc_mov_order_stats(
+        (PyArrayObject*)orig_ndarray, (PyArrayObject*)orig_mask,
+        axis, capacity, WINDOW_STARTS_DATA(starts), rtype, 'R', 0,
+        nthreads);
+    Py_XDECREF(starts);
+    ERR_CHECK(result_ndarray)
+
+    result_dict = PyDict_New();
+    MEM_CHECK(result_dict)
+    PyDict_SetItemString(result_dict, "array", result_ndarray);
+    PyDict_SetItemString(result_dict, "mask", result_mask);
+
+    Py_DECREF(orig_ndarray);
+    Py_XDECREF(orig_mask);
+    Py_DECREF(result_ndarray);
+    Py_DECREF(result_mask);
+    return result_dict;
+}
 
-    check_mov_args(orig_arrayobj, span, 1,
-                   &orig_ndarray, &orig_mask, &result_mask);
+/* Moving minimum and maximum over monotonic deques: each deque is a ring
+   buffer of the positions of the valid values of the window, in ascending
+   (minimum) or descending (maximum) order of values, so that its head is
+   the extremum of the window. Each position is pushed and popped at most
+   once, hence an amortised O(1) cost per element. The data are the first
+   array of the lane_iter `li`, and the extremum is stored in its `k`-th
+   array. The ring buffers hold `span` positions, the largest size of a
+   window. */
+#define RING_INDEX(k) (((k) >= span) ? (k) - span : (k))
+#define MOV_EXTREMUM_STEP(type, k, deque, head, count, cmp) { \
+    while ((count > 0) && (deque[head] < WINDOW_START(i))) { \
+        head = RING_INDEX(head + 1); \
+        count--; \
+    } \
+    if (valid) { \
+        while ((count > 0) && \
+               (LANE_VALUE(li, type, 0, \
+                           deque[RING_INDEX(head + count - 1)]) cmp \
+                LANE_VALUE(li, type, 0, i))) { \
+            count--; \
+        } \
+        deque[RING_INDEX(head + count)] = i; \
+        count++; \
+    } \
+    LANE_VALUE(li, type, k, i) = \
+        (count > 0) ? LANE_VALUE(li, type, 0, deque[head]) : 0; \
+}
+#define MOV_MINMAX_LOOP(type) { \
+    LANE_LOOP(li, lane) { \
+        minhead = maxhead = nmin = nmax = 0; \
+        for (i = 0; i < li.size; i++) { \
+            valid = !LANE_MASKED(li, 1, i); \
+            if (li.ptrs[2] != NULL) { \
+                MOV_EXTREMUM_STEP(type, 2, minq, minhead, nmin, >=) \
+            } \
+            if (li.ptrs[3] != NULL) { \
+                MOV_EXTREMUM_STEP(type, 3, maxq, maxhead, nmax, <=) \
+            } \
+        } \
+    } \
+}
+
+/* kernel of the moving extrema, on the lanes of the data (of type
+   `type_num`), of their mask, and of the minimum and maximum (or NULL) */
+static int
+mov_minmax_kernel(lane_iter li, mov_params *params)
+{
+    npy_intp *minq, *maxq, *starts = params->starts;
+    npy_intp i, lane, minhead, maxhead, nmin, nmax;
+    int valid, span = params->span;
+
+    minq = malloc(2 * span * sizeof(npy_intp));
+    if (minq == NULL) { return -1; }
+    maxq = minq + span;
+
+    switch (params->type_num) {
+        case NPY_BOOL: MOV_MINMAX_LOOP(npy_bool) break;
+        case NPY_BYTE: MOV_MINMAX_LOOP(npy_byte) break;
+        case NPY_UBYTE: MOV_MINMAX_LOOP(npy_ubyte) break;
+        case NPY_SHORT: MOV_MINMAX_LOOP(npy_short) break;
+        case NPY_USHORT: MOV_MINMAX_LOOP(npy_ushort) break;
+        case NPY_INT: MOV_MINMAX_LOOP(npy_int) break;
+        case NPY_UINT: MOV_MINMAX_LOOP(npy_uint) break;
+        case NPY_LONG: MOV_MINMAX_LOOP(npy_long) break;
+        case NPY_ULONG: MOV_MINMAX_LOOP(npy_ulong) break;
+        case NPY_LONGLONG: MOV_MINMAX_LOOP(npy_longlong) break;
+        case NPY_ULONGLONG: MOV_MINMAX_LOOP(npy_ulonglong) break;
+        case NPY_FLOAT: MOV_MINMAX_LOOP(npy_float) break;
+        case NPY_DOUBLE: MOV_MINMAX_LOOP(npy_double) break;
+        case NPY_LONGDOUBLE: MOV_MINMAX_LOOP(npy_longdouble) break;
+    }
+    free(minq);
+    return 0;
+}
+
+/* computation portion of the moving minimum and/or maximum along `axis`,
+   stored in `min_ndarray` and `max_ndarray` if they are not NULL. The
+   windows are given by `starts` if it is not NULL (see mov_params). Masked
+   values are excluded from the windows, and the appropriate mask is
+   overlayed on top afterwards */
+static int
+calc_mov_minmax(PyArrayObject *orig_ndarray, PyArrayObject *orig_mask,
+                int axis, int span, npy_intp *starts, int rtype, int nthreads,
+                PyObject **min_ndarray, PyObject **max_ndarray)
+{
+    PyArrayObject *values, *arrays[4];
+    PyObject *temp, *nomin=NULL, *nomax=NULL;
+    lane_iter li;
+    mov_params params = {0};
+    int status, itype = orig_ndarray->descr->type_num;
+    int do_min = (min_ndarray != NULL), do_max = (max_ndarray != NULL);
+
+    if (!do_min) { min_ndarray = &nomin; }
+    if (!do_max) { max_ndarray = &nomax; }
+    *min_ndarray = *max_ndarray = NULL;
+
+    if (!(PyTypeNum_ISINTEGER(itype) || PyTypeNum_ISFLOAT(itype) ||
+          PyTypeNum_ISBOOL(itype))) {
+        PyErr_SetString(PyExc_TypeError,
+                        "moving extrema require real numbers");
+        return -1;
+    }
+
+    /* the extrema are found in the original type, then converted */
+    values = (PyArrayObject*)PyArray_FROMANY((PyObject*)orig_ndarray, itype,
+                                             0, 0, NPY_ALIGNED);
+    if (values == NULL) { return -1; }
+    if (do_min) {
+        *min_ndarray = PyArray_SimpleNew(values->nd, values->dimensions,
+                                         itype);
+        if (*min_ndarray == NULL) { goto fail; }
+    }
+    if (do_max) {
+        *max_ndarray = PyArray_SimpleNew(values->nd, values->dimensions,
+                                         itype);
+        if (*max_ndarray == NULL) { goto fail; }
+    }
+    arrays[0] = values;
+    arrays[1] = orig_mask;
+    arrays[2] = (PyArrayObject*)(*min_ndarray);
+    arrays[3] = (PyArrayObject*)(*max_ndarray);
+    if (lane_iter_init(&li, arrays, 4, axis) < 0) { goto fail; }
+
+    params.type_num = itype;
+    params.span = span;
+    params.starts = starts;
+    status = run_lanes(&li, mov_minmax_kernel, &params, nthreads);
+    lane_iter_free(&li);
+    if (status < 0) { goto fail; }
+    Py_DECREF(values);
+
+    if (rtype != itype) {
+        if (do_min) {
+            temp = *min_ndarray;
+            *min_ndarray = PyArray_Cast((PyArrayObject*)temp, rtype);
+            Py_DECREF(temp);
+        }
+        if (do_max) {
+            temp = *max_ndarray;
+            *max_ndarray = PyArray_Cast((PyArrayObject*)temp, rtype);
+            Py_DECREF(temp);
+        }
+        if ((do_min && (*min_ndarray == NULL)) ||
+            (do_max && (*max_ndarray == NULL))) {
+            Py_XDECREF(*min_ndarray);
+            Py_XDECREF(*max_ndarray);
+            return -1;
+        }
+    }
+    return 0;
+
+ fail:
+    Py_DECREF(values);
+    Py_XDECREF(*min_ndarray);
+    Py_XDECREF(*max_ndarray);
+    return -1;
+}
+
+/* the moving extrema of complex or object arrays go through the ranks */
+#define MOV_EXTREMUM_IS_RANKED(arr) \
+    (PyArray_ISCOMPLEX(arr) || PyArray_ISOBJECT(arr))
+
+PyObject *
+MaskedArray_mov_min(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *orig_arrayobj=NULL, *orig_ndarray=NULL, *orig_mask=NULL,
+             *result_ndarray=NULL, *result_mask=NULL, *result_dict=NULL,
+             *dates=NULL, *starts=NULL;
+    PyArray_Descr *dtype=NULL;
+
+    int rtype, span, capacity, axis=0, nthreads=1;
+
+    static char *kwlist[] = {"array", "span", "dtype", "axis", "nthreads",
+                             "dates", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds,
+                "Oi|O&iiO:mov_min(array, span, dtype, axis, nthreads, dates)",
+                kwlist, &orig_arrayobj, &span,
+                PyArray_DescrConverter2, &dtype, &axis,
+                &nthreads, &dates)) return NULL;
+
+    if (check_mov_args(orig_arrayobj, span, 1, &axis, dates,
+                       &orig_ndarray, &orig_mask, &result_mask,
+                       &starts, &capacity) < 0) {
+        return NULL;
+    }
 
     rtype = _get_type_num(((PyArrayObject*)orig_ndarray)->descr, dtype);
 
-    result_ndarray = calc_mov_ranked((PyArrayObject*)orig_ndarray,
-                                     span, rtype, 'I');
+    if (MOV_EXTREMUM_IS_RANKED(orig_ndarray)) {
+        result_ndarray = calc_lanes_generic((PyArrayObject*)orig_ndarray,
+                                            (PyArrayObject*)orig_mask,
+                                            axis, span, 0, rtype, 'I');
+    } else if (calc_mov_minmax((PyArrayObject*)orig_ndarray,
+                               (PyArrayObject*)orig_mask, axis, capacity,
+                               WINDOW_STARTS_DATA(starts), rtype, nthreads,
+                               &result_ndarray, NULL) < 0) {
+        result_ndarray = NULL;
+    }
+    Py_XDECREF(starts);
     ERR_CHECK(result_ndarray)
 
     result_dict = PyDict_New();
@@ -806,6 +2609,8 @@ MaskedArray_mov_min(PyObject *self, PyObject *args, PyObject *kwds)
     PyDict_SetItemString(result_dict, "array", result_ndarray);
     PyDict_SetItemString(result_dict, "mask", result_mask);
 
+    Py_DECREF(orig_ndarray);
+    Py_XDECREF(orig_mask);
     Py_DECREF(result_ndarray);
     Py_DECREF(result_mask);
     return result_dict;
@@ -815,25 +2620,40 @@ PyObject *
 MaskedArray_mov_max(PyObject *self, PyObject *args, PyObject *kwds)
 {
     PyObject *orig_arrayobj=NULL, *orig_ndarray=NULL, *orig_mask=NULL,
-             *result_ndarray=NULL, *result_mask=NULL, *result_dict=NULL;
+             *result_ndarray=NULL, *result_mask=NULL, *result_dict=NULL,
+             *dates=NULL, *starts=NULL;
     PyArray_Descr *dtype=NULL;
 
-    int rtype, span;
+    int rtype, span, capacity, axis=0, nthreads=1;
 
-    static char *kwlist[] = {"array", "span", "dtype", NULL};
+    static char *kwlist[] = {"array", "span", "dtype", "axis", "nthreads",
+                             "dates", NULL};
 
     if (!PyArg_ParseTupleAndKeywords(args, kwds,
-                "Oi|O&:mov_max(array, span, dtype)", kwlist,
-                &orig_arrayobj, &span,
-                PyArray_DescrConverter2, &dtype)) return NULL;
-
-    check_mov_args(orig_arrayobj, span, 1,
-                   &orig_ndarray, &orig_mask, &result_mask);
+                "Oi|O&iiO:mov_max(array, span, dtype, axis, nthreads, dates)",
+                kwlist, &orig_arrayobj, &span,
+                PyArray_DescrConverter2, &dtype, &axis,
+                &nthreads, &dates)) return NULL;
+
+    if (check_mov_args(orig_arrayobj, span, 1, &axis, dates,
+                       &orig_ndarray, &orig_mask, &result_mask,
+                       &starts, &capacity) < 0) {
+        return NULL;
+    }
 
     rtype = _get_type_num(((PyArrayObject*)orig_ndarray)->descr, dtype);
 
-    result_ndarray = calc_mov_ranked((PyArrayObject*)orig_ndarray,
-                                     span, rtype, 'A');
+    if (MOV_EXTREMUM_IS_RANKED(orig_ndarray)) {
+        result_ndarray = calc_lanes_generic((PyArrayObject*)orig_ndarray,
+                                            (PyArrayObject*)orig_mask,
+                                            axis, span, 0, rtype, 'A');
+    } else if (calc_mov_minmax((PyArrayObject*)orig_ndarray,
+                               (PyArrayObject*)orig_mask, axis, capacity,
+                               WINDOW_STARTS_DATA(starts), rtype, nthreads,
+                               NULL, &result_ndarray) < 0) {
+        result_ndarray = NULL;
+    }
+    Py_XDECREF(starts);
     ERR_CHECK(result_ndarray)
 
     result_dict = PyDict_New();
@@ -841,16 +2661,435 @@ MaskedArray_mov_max(PyObject *self, PyObject *args, PyObject *kwds)
     PyDict_SetItemString(result_dict, "array", result_ndarray);
     PyDict_SetItemString(result_dict, "mask", result_mask);
 
+    Py_DECREF(orig_ndarray);
+    Py_XDECREF(orig_mask);
     Py_DECREF(result_ndarray);
     Py_DECREF(result_mask);
     return result_dict;
 }
 
-/* computation portion of exponentially weighted moving average. Appropriate
-   mask is overlayed on top afterwards */
+PyObject *
+MaskedArray_mov_minmax(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *orig_arrayobj=NULL, *orig_ndarray=NULL, *orig_mask=NULL,
+             *min_ndarray=NULL, *max_ndarray=NULL,
+             *result_mask=NULL, *result_dict=NULL, *dates=NULL, *starts=NULL;
+    PyArray_Descr *dtype=NULL;
+
+    int rtype, span, capacity, axis=0, nthreads=1;
+
+    static char *kwlist[] = {"array", "span", "dtype", "axis", "nthreads",
+                             "dates", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds,
+                "Oi|O&iiO:mov_minmax(array, span, dtype, axis, nthreads, dates)",
+                kwlist, &orig_arrayobj, &span,
+                PyArray_DescrConverter2, &dtype, &axis,
+                &nthreads, &dates)) return NULL;
+
+    if (check_mov_args(orig_arrayobj, span, 1, &axis, dates,
+                       &orig_ndarray, &orig_mask, &result_mask,
+                       &starts, &capacity) < 0) {
+        return NULL;
+    }
+
+    rtype = _get_type_num(((PyArrayObject*)orig_ndarray)->descr, dtype);
+
+    if (MOV_EXTREMUM_IS_RANKED(orig_ndarray)) {
+        min_ndarray = calc_lanes_generic((PyArrayObject*)orig_ndarray,
+                                         (PyArrayObject*)orig_mask,
+                                         axis, span, 0, rtype, 'I');
+        ERR_CHECK(min_ndarray)
+        max_ndarray = calc_lanes_generic((PyArrayObject*)orig_ndarray,
+                                         (PyArrayObject*)orig_mask,
+                                         axis, span, 0, rtype, 'A');
+        if (max_ndarray == NULL) {
+            Py_DECREF(min_ndarray);
+            return NULL;
+        }
+    } else if (calc_mov_minmax((PyArrayObject*)orig_ndarray,
+                               (PyArrayObject*)orig_mask, axis, capacity,
+                               WINDOW_STARTS_DATA(starts), rtype, nthreads,
+                               &min_ndarray, &max_ndarray) < 0) {
+        Py_XDECREF(starts);
+        return NULL;
+    }
+    Py_XDECREF(starts);
+
+    result_dict = PyDict_New();
+    MEM_CHECK(result_dict)
+    PyDict_SetItemString(result_dict, "min", min_ndarray);
+    PyDict_SetItemString(result_dict, "max", max_ndarray);
+    PyDict_SetItemString(result_dict, "mask", result_mask);
+
+    Py_DECREF(orig_ndarray);
+    Py_XDECREF(orig_mask);
+    Py_DECREF(min_ndarray);
+    Py_DECREF(max_ndarray);
+    Py_DECREF(result_mask);
+    return result_dict;
+}
+
+/* Moving moments of one or two series, updated in a single pass with the
+   online (Welford) formulas: each value entering the window updates the
+   means and the sums of the squared/crossed deviations to the means, and
+   the values leaving it (from position `lo`) are removed the same way. The
+   moments are recomputed each time the window is renewed to limit the
+   accumulation of rounding errors. As for the moving sum, they are reset
+   after a masked value.
+   The statistics are given by the characters of `stats`:
+   'v': variance of x, 's': standard deviation of x, 'c': covariance,
+   'r': correlation, 'b': slope of the regression of y on x,
+   'a': intercept of the regression of y on x. */
+#define MOV_MOMENTS_NSTATS 6
+#define MOV_MOMENTS_RTOL 1e-10
+static char *mov_moments_names[] = {"var", "std", "cov", "corr",
+                                    "beta", "alpha"};
+static char mov_moments_codes[] = "vscrba";
+
+/* The lanes of the lane_iter `li` are those of x, its mask, y, its mask, of
+   the results (or NULL) and of the result mask */
+#define MOV_X(type, i) LANE_VALUE(li, type, 0, i)
+#define MOV_Y(type, i) LANE_VALUE(li, type, 2, i)
+#define MOV_MOMENTS_LOOP(type, sqrtfunc) { \
+    type mx=0, my=0, sxx=0, syy=0, sxy=0, xmax=0, ymax=0; \
+    type dx, dy, denom, var, beta; \
+    npy_intp count=0, removed=0; \
+    LANE_LOOP(li, lane) { \
+        non_masked = 0; \
+        for (i = 0; i < li.size; i++) { \
+            valid = (!LANE_MASKED(li, 1, i) && !LANE_MASKED(li, 3, i)); \
+            if (valid) { non_masked += 1; } \
+            else { non_masked = 0; } \
+            if (non_masked <= 1) { \
+                /* the current or previous value is masked: reset */ \
+                count = removed = 0; \
+                lo = i; \
+                mx = my = sxx = syy = sxy = xmax = ymax = 0; \
+            } \
+            if (valid) { \
+                count += 1; \
+                dx = MOV_X(type, i) - mx; \
+                dy = MOV_Y(type, i) - my; \
+                mx += dx / count; \
+                my += dy / count; \
+                sxx += dx * (MOV_X(type, i) - mx); \
+                syy += dy * (MOV_Y(type, i) - my); \
+                sxy += dx * (MOV_Y(type, i) - my); \
+                if (sxx > xmax) { xmax = sxx; } \
+                if (syy > ymax) { ymax = syy; } \
+            } \
+            for (; valid && (lo < WINDOW_START(i)); lo++) { \
+                denom = (type)count / (count - 1); \
+                dx = MOV_X(type, lo) - mx; \
+                dy = MOV_Y(type, lo) - my; \
+                sxx -= dx * dx * denom; \
+                syy -= dy * dy * denom; \
+                sxy -= dx * dy * denom; \
+                count -= 1; \
+                removed += 1; \
+                mx -= dx / count; \
+                my -= dy / count; \
+            } \
+            if (valid && \
+                (((starts != NULL) ? (removed >= count) : \
+                  ((non_masked >= span) && ((non_masked % span) == 0))) || \
+                 /* the window may have become constant: the updates only \
+                    leave rounding errors, so that the moments are \
+                    recomputed to be exactly zero */ \
+                 ((sxx != 0) && (sxx <= xmax * MOV_MOMENTS_RTOL)) || \
+                 ((syy != 0) && (syy <= ymax * MOV_MOMENTS_RTOL)))) { \
+                /* the window has been renewed: recompute its moments, so \
+                   that the rounding errors of the updates do not \
+                   accumulate */ \
+                removed = 0; \
+                mx = my = sxx = syy = sxy = 0; \
+                xconst = yconst = 1; \
+                for (j = lo; j <= i; j++) { \
+                    mx += MOV_X(type, j); \
+                    my += MOV_Y(type, j); \
+                    xconst = xconst && (MOV_X(type, j) == MOV_X(type, lo)); \
+                    yconst = yconst && (MOV_Y(type, j) == MOV_Y(type, lo)); \
+                } \
+                /* the mean of constant values is the value itself */ \
+                mx = (xconst) ? MOV_X(type, lo) : mx / count; \
+                my = (yconst) ? MOV_Y(type, lo) : my / count; \
+                for (j = lo; j <= i; j++) { \
+                    dx = MOV_X(type, j) - mx; \
+                    dy = MOV_Y(type, j) - my; \
+                    sxx += dx * dx; \
+                    syy += dy * dy; \
+                    sxy += dx * dy; \
+                } \
+                xmax = sxx; \
+                ymax = syy; \
+            } \
+            if (sxx < 0) { sxx = 0; } \
+            if (syy < 0) { syy = 0; } \
+            denom = count - ddof; \
+            var = sxx / denom; \
+            beta = sxy / sxx; \
+            /* mask the windows where the statistics are undefined: too few \
+               values for the degrees of freedom, or constant values */ \
+            if (((denom <= 0) && ((li.ptrs[4] != NULL) || \
+                                  (li.ptrs[5] != NULL) || \
+                                  (li.ptrs[6] != NULL))) || \
+                (((sxx == 0) || (syy == 0)) && (li.ptrs[7] != NULL)) || \
+                ((sxx == 0) && ((li.ptrs[8] != NULL) || \
+                                (li.ptrs[9] != NULL)))) { \
+                LANE_VALUE(li, npy_bool, 10, i) = 1; \
+            } \
+            if (li.ptrs[4] != NULL) { \
+                LANE_VALUE(li, type, 4, i) = var; \
+            } \
+            if (li.ptrs[5] != NULL) { \
+                LANE_VALUE(li, type, 5, i) = sqrtfunc(var); \
+            } \
+            if (li.ptrs[6] != NULL) { \
+                LANE_VALUE(li, type, 6, i) = sxy / denom; \
+            } \
+            if (li.ptrs[7] != NULL) { \
+                LANE_VALUE(li, type, 7, i) = sxy / sqrtfunc(sxx * syy); \
+            } \
+            if (li.ptrs[8] != NULL) { \
+                LANE_VALUE(li, type, 8, i) = beta; \
+            } \
+            if (li.ptrs[9] != NULL) { \
+                LANE_VALUE(li, type, 9, i) = my - beta * mx; \
+            } \
+        } \
+    } \
+}
+
+/* kernel of the moving moments, computed as `type_num` with `option` delta
+   degrees of freedom */
+static int
+mov_moments_kernel(lane_iter li, mov_params *params)
+{
+    npy_intp i, j, lane, non_masked, lo = 0, *starts = params->starts;
+    int valid, xconst, yconst, span = params->span, ddof = params->option;
+
+    if (params->type_num == NPY_LONGDOUBLE) {
+        MOV_MOMENTS_LOOP(npy_longdouble, sqrtl)
+    } else {
+        MOV_MOMENTS_LOOP(npy_double, sqrt)
+    }
+    return 0;
+}
+
+/* computation portion of the moving moments along `axis`, stored in
+   `results` (indexed as `mov_moments_codes`), over the windows given by
+   `starts` if it is not NULL (see mov_params). The windows where the
+   statistics are undefined are masked in `result_mask`, the mask of the
+   windows themselves is overlayed on top afterwards */
+static int
+calc_mov_moments(PyArrayObject *x_ndarray, PyArrayObject *x_maskarr,
+                 PyArrayObject *y_ndarray, PyArrayObject *y_maskarr,
+                 PyArrayObject *result_mask, int axis, int span, npy_intp *starts, int ddof, int rtype,
+                 char *stats, int nthreads, PyObject **results)
+{
+    PyArrayObject *x_values=NULL, *y_values=NULL;
+    PyArrayObject *arrays[5 + MOV_MOMENTS_NSTATS];
+    PyObject *temp;
+    lane_iter li;
+    mov_params params = {0};
+    int k, status, wtype = NPY_DOUBLE;
+    char *code;
+
+    for (k = 0; k < MOV_MOMENTS_NSTATS; k++) { results[k] = NULL; }
+    /* long doubles are kept, everything else goes through doubles */
+    if ((rtype == NPY_LONGDOUBLE) ||
+        (x_ndarray->descr->type_num == NPY_LONGDOUBLE) ||
+        (y_ndarray->descr->type_num == NPY_LONGDOUBLE)) {
+        wtype = NPY_LONGDOUBLE;
+    }
+
+    x_values = (PyArrayObject*)PyArray_FROMANY((PyObject*)x_ndarray, wtype,
+                                               0, 0,
+                                               NPY_ALIGNED | NPY_FORCECAST);
+    if (x_values == NULL) { goto fail; }
+    y_values = (PyArrayObject*)PyArray_FROMANY((PyObject*)y_ndarray, wtype,
+                                               0, 0,
+                                               NPY_ALIGNED | NPY_FORCECAST);
+    if (y_values == NULL) { goto fail; }
+
+    for (code = stats; *code != '\0'; code++) {
+        char *pos = strchr(mov_moments_codes, *code);
+        if (pos == NULL) {
+            PyErr_Format(PyExc_ValueError, "invalid statistic '%c'", *code);
+            goto fail;
+        }
+        k = (int)(pos - mov_moments_codes);
+        if (results[k] == NULL) {
+            results[k] = PyArray_SimpleNew(x_values->nd, x_values->dimensions,
+                                           wtype);
+            if (results[k] == NULL) { goto fail; }
+        }
+    }
+    arrays[0] = x_values;
+    arrays[1] = x_maskarr;
+    arrays[2] = y_values;
+    arrays[3] = y_maskarr;
+    for (k = 0; k < MOV_MOMENTS_NSTATS; k++) {
+        arrays[4 + k] = (PyArrayObject*)results[k];
+    }
+    arrays[4 + MOV_MOMENTS_NSTATS] = result_mask;
+    if (lane_iter_init(&li, arrays, 5 + MOV_MOMENTS_NSTATS, axis) < 0) {
+        goto fail;
+    }
+
+    params.type_num = wtype;
+    params.span = span;
+    params.starts = starts;
+    params.option = ddof;
+    status = run_lanes(&li, mov_moments_kernel, &params, nthreads);
+    lane_iter_free(&li);
+    if (status < 0) { goto fail; }
+    Py_DECREF(x_values);
+    Py_DECREF(y_values);
+
+    if (wtype != rtype) {
+        for (k = 0; k < MOV_MOMENTS_NSTATS; k++) {
+            if (results[k] == NULL) { continue; }
+            temp = results[k];
+            results[k] = PyArray_Cast((PyArrayObject*)temp, rtype);
+            Py_DECREF(temp);
+            if (results[k] == NULL) {
+                for (k = 0; k < MOV_MOMENTS_NSTATS; k++) {
+                    Py_XDECREF(results[k]);
+                }
+                return -1;
+            }
+        }
+    }
+    return 0;
+
+ fail:
+    Py_XDECREF(x_values);
+    Py_XDECREF(y_values);
+    for (k = 0; k < MOV_MOMENTS_NSTATS; k++) { Py_XDECREF(results[k]); }
+    return -1;
+}
+
+PyObject *
+MaskedArray_mov_moments(PyObject *self, PyObject *args, PyObject *kwds)
+{
+    PyObject *orig_arrayobj=NULL, *orig_ndarray=NULL, *orig_mask=NULL,
+             *other_arrayobj=NULL, *other_ndarray=NULL, *other_mask=NULL,
+             *other_result_mask=NULL, *other_starts=NULL,
+             *result_mask=NULL, *result_dict=NULL, *dates=NULL, *starts=NULL;
+    PyObject *results[MOV_MOMENTS_NSTATS];
+    PyArray_Descr *dtype=NULL;
+
+    int rtype, span, capacity, ddof=0, axis=0, nthreads=1, k;
+    char *stats;
+
+    static char *kwlist[] = {"array", "span", "stats", "other", "ddof",
+                             "dtype", "axis", "nthreads", "dates", NULL};
+
+    if (!PyArg_ParseTupleAndKeywords(args, kwds,
+                "Ois|OiO&iiO:mov_moments(array, span, stats, other, ddof, "\
+                "dtype, axis, nthreads, dates)", kwlist,
+                &orig_arrayobj, &span, &stats, &other_arrayobj, &ddof,
+                PyArray_DescrConverter2, &dtype, &axis,
+                &nthreads, &dates)) return NULL;
+
+    if (check_mov_args(orig_arrayobj, span, 1, &axis, dates,
+                       &orig_ndarray, &orig_mask, &result_mask,
+                       &starts, &capacity) < 0) {
+        return NULL;
+    }
+    rtype = _get_type_num_double(((PyArrayObject*)orig_ndarray)->descr, dtype);
+
+    if ((other_arrayobj == NULL) || (other_arrayobj == Py_None)) {
+        other_ndarray = orig_ndarray;
+        other_mask = orig_mask;
+        Py_INCREF(other_ndarray);
+        Py_XINCREF(other_mask);
+    } else {
+        npy_intp i;
+        npy_bool *raw_mask, *raw_other_mask;
+
+        if (check_mov_args(other_arrayobj, span, 1, &axis, dates,
+                           &other_ndarray, &other_mask, &other_result_mask,
+                           &other_starts, &k) < 0) {
+            goto fail;
+        }
+        Py_XDECREF(other_starts);
+        if (!PyArray_SAMESHAPE((PyArrayObject*)other_ndarray,
+                               (PyArrayObject*)orig_ndarray)) {
+            PyErr_SetString(PyExc_ValueError,
+                            "array and other must have the same shape");
+            goto fail;
+        }
+        // the result is masked where either result would be
+        raw_mask = (npy_bool*)PyArray_DATA((PyArrayObject*)result_mask);
+        raw_other_mask = (npy_bool*)PyArray_DATA(
+                                    (PyArrayObject*)other_result_mask);
+        for (i = 0; i < PyArray_SIZE((PyArrayObject*)result_mask); i++) {
+            raw_mask[i] = raw_mask[i] || raw_other_mask[i];
+        }
+        Py_DECREF(other_result_mask);
+        other_result_mask = NULL;
+        if (dtype == NULL) {
+            int other_rtype = _get_type_num_double(
+                                ((PyArrayObject*)other_ndarray)->descr, NULL);
+            if (other_rtype > rtype) { rtype = other_rtype; }
+        }
+    }
+
+    if (!(PyTypeNum_ISFLOAT(rtype) || PyTypeNum_ISINTEGER(rtype))) {
+        PyErr_SetString(PyExc_TypeError,
+                        "moving moments require real numbers");
+        goto fail;
+    }
+
+    if (calc_mov_moments((PyArrayObject*)orig_ndarray,
+                         (PyArrayObject*)orig_mask,
+                         (PyArrayObject*)other_ndarray,
+                         (PyArrayObject*)other_mask,
+                         (PyArrayObject*)result_mask,
+                         axis, capacity, WINDOW_STARTS_DATA(starts), ddof,
+                         rtype, stats, nthreads, results) < 0) {
+        goto fail;
+    }
+
+    result_dict = PyDict_New();
+    MEM_CHECK(result_dict)
+    for (k = 0; k < MOV_MOMENTS_NSTATS; k++) {
+        if (results[k] != NULL) {
+            PyDict_SetItemString(result_dict, mov_moments_names[k],
+                                 results[k]);
+            Py_DECREF(results[k]);
+        }
+    }
+    PyDict_SetItemString(result_dict, "mask", result_mask);
+
+    Py_DECREF(orig_ndarray);
+    Py_XDECREF(orig_mask);
+    Py_DECREF(other_ndarray);
+    Py_XDECREF(other_mask);
+    Py_DECREF(result_mask);
+    Py_XDECREF(starts);
+    return result_dict;
+
+ fail:
+    Py_XDECREF(orig_ndarray);
+    Py_XDECREF(orig_mask);
+    Py_XDECREF(other_ndarray);
+    Py_XDECREF(other_mask);
+    Py_XDECREF(other_result_mask);
+    Py_XDECREF(result_mask);
+    Py_XDECREF(starts);
+    return NULL;
+}
+
+/* computation portion of exponentially weighted moving average, for any type
+   (using Python objects). Appropriate mask is overlayed on top afterwards */
 static PyObject*
-calc_mov_average_expw(
-    PyArrayObject *orig_ndarray, PyArrayObject *orig_mask, int span, int rtype)
+calc_mov_average_expw_generic(
+    PyArrayObject *orig_ndarray, PyArrayObject *orig_mask, double decay,
+    int rtype)
 {
     PyArrayObject *result_ndarray=NULL;
     PyObject *decay_factor=NULL;
@@ -862,7 +3101,7 @@ calc_mov_average_expw(
                                        rtype, 0);
     ERR_CHECK(result_ndarray)
 
-    decay_factor = PyFloat_FromDouble(2.0/((double)(span + 1)));
+    decay_factor = PyFloat_FromDouble(decay);
 
     for (i=0; i<orig_ndarray->dimensions[0]; i++) {
 
@@ -915,39 +3154,192 @@ calc_mov_average_expw(
 
 }
 
+/* Exponentially weighted moving average of each lane of real numbers: the
+   average is initialized at the first unmasked value, and carried over the
+   masked values. In the same pass, the weight of the unmasked values in the
+   average is tracked as a double (the average of the unmasked indicator),
+   and the result is masked (in the fourth array of the lane_iter, if any)
+   at the masked values and where the weight of the masked values is larger
+   than `tol`. Without values (`type_num` NPY_NOTYPE), only the mask is
+   computed. */
+#define MOV_EXPW_MASK(i) { \
+    unmasked = !LANE_MASKED(li, 1, i); \
+    if ((i) == 0) { weight = unmasked; } \
+    else { weight += decay * (unmasked - weight); } \
+    LANE_ITEM(npy_bool, li.ptrs[3], li.strides[3], i) = \
+        (!unmasked || (1.0 - weight > tol)); \
+}
+#define MOV_EXPW_LOOP(type) { \
+    type tdecay = decay, average = 0; \
+    int initialized; \
+    LANE_LOOP(li, lane) { \
+        initialized = 0; \
+        for (i = 0; i < li.size; i++) { \
+            if (!initialized) { \
+                average = LANE_VALUE(li, type, 0, i); \
+                initialized = !LANE_MASKED(li, 1, i); \
+            } else if (!LANE_MASKED(li, 1, i)) { \
+                average += tdecay * (LANE_VALUE(li, type, 0, i) - average); \
+            } \
+            LANE_VALUE(li, type, 2, i) = average; \
+            if (li.ptrs[3] != NULL) { MOV_EXPW_MASK(i) } \
+        } \
+    } \
+}
+
+/* kernel of the exponentially weighted moving average, computed as the
+   float type `type_num` with the decay factor `decay` */
+static int
+mov_average_expw_kernel(lane_iter li, mov_params *params)
+{
+    npy_intp i, lane;
+    double decay = params->decay, tol = params->tol, weight = 1;
+    int unmasked;
+
+    switch (params->type_num) {
+        case NPY_FLOAT: MOV_EXPW_LOOP(npy_float) break;
+        case NPY_DOUBLE: MOV_EXPW_LOOP(npy_double) break;
+        case NPY_LONGDOUBLE: MOV_EXPW_LOOP(npy_longdouble) break;
+        case NPY_NOTYPE:
+            LANE_LOOP(li, lane) {
+                for (i = 0; i < li.size; i++) { MOV_EXPW_MASK(i) }
+            }
+            break;
+    }
+    return 0;
+}
+
+/* computation portion of exponentially weighted moving average along
+   `axis`, with the decay factor `decay`. The mask of the result is set in
+   `result_mask` (as with MOV_EXPW_LOOP) unless it is NULL */
+static PyObject*
+calc_mov_average_expw(
+    PyArrayObject *orig_ndarray, PyArrayObject *orig_mask, int axis,
+    double decay, double tol, int rtype, int nthreads,
+    PyArrayObject *result_mask)
+{
+    PyArrayObject *values=NULL, *result_ndarray=NULL, *arrays[4];
+    PyObject *casted;
+    lane_iter li;
+    mov_params params = {0};
+    int status, itype = orig_ndarray->descr->type_num, wtype = NPY_DOUBLE;
+
+    params.decay = decay;
+    params.tol = tol;
+    if (!(PyTypeNum_ISINTEGER(rtype) || PyTypeNum_ISFLOAT(rtype)) ||
+        !(PyTypeNum_ISINTEGER(itype) || PyTypeNum_ISFLOAT(itype) ||
+          PyTypeNum_ISBOOL(itype))) {
+        result_ndarray = (PyArrayObject*)calc_lanes_generic(
+                                orig_ndarray, orig_mask, axis, 0, decay,
+                                rtype, 'W');
+        if ((result_ndarray == NULL) || (result_mask == NULL)) {
+            return (PyObject*)result_ndarray;
+        }
+        /* the mask is computed separately */
+        wtype = rtype = NPY_NOTYPE;
+    } else {
+        /* floats are averaged in their own type, integers as floats */
+        if (PyTypeNum_ISFLOAT(rtype)) {
+            wtype = rtype;
+        } else if (itype == NPY_LONGDOUBLE) {
+            wtype = NPY_LONGDOUBLE;
+        }
+        values = (PyArrayObject*)PyArray_FROMANY((PyObject*)orig_ndarray,
+                                                 wtype, 0, 0,
+                                                 NPY_ALIGNED | NPY_FORCECAST);
+        ERR_CHECK(values)
+        result_ndarray = (PyArrayObject*)PyArray_SimpleNew(values->nd,
+                                                           values->dimensions,
+                                                           wtype);
+        if (result_ndarray == NULL) {
+            Py_DECREF(values);
+            return NULL;
+        }
+    }
+    arrays[0] = values;
+    arrays[1] = orig_mask;
+    arrays[2] = (wtype == NPY_NOTYPE) ? NULL : result_ndarray;
+    arrays[3] = result_mask;
+    if (lane_iter_init(&li, arrays, 4, axis) < 0) {
+        Py_XDECREF(values);
+        Py_DECREF(result_ndarray);
+        return NULL;
+    }
+    params.type_num = wtype;
+    status = run_lanes(&li, mov_average_expw_kernel, &params, nthreads);
+    lane_iter_free(&li);
+    Py_XDECREF(values);
+    if (status < 0) {
+        Py_DECREF(result_ndarray);
+        return NULL;
+    }
+
+    if (wtype != rtype) {
+        casted = PyArray_Cast(result_ndarray, rtype);
+        Py_DECREF(result_ndarray);
+        return casted;
+    }
+    return (PyObject*)result_ndarray;
+}
+
 PyObject *
 MaskedArray_mov_average_expw(PyObject *self, PyObject *args, PyObject *kwds)
 {
     PyObject *orig_arrayobj=NULL, *orig_ndarray=NULL, *orig_mask=NULL,
              *result_ndarray=NULL, *result_mask=NULL,
-             *result_dict=NULL;
+             *result_dict=NULL, *starts=NULL;
     PyArray_Descr *dtype=NULL;
 
-    int rtype, span;
+    int rtype, span=0, capacity, axis=0, nthreads=1;
+    double alpha=-1, tol=-1;
 
-    static char *kwlist[] = {"array", "span", "dtype", NULL};
+    static char *kwlist[] = {"array", "span", "dtype", "axis", "nthreads",
+                             "alpha", "tol", NULL};
 
     if (!PyArg_ParseTupleAndKeywords(args, kwds,
-                "Oi|O&:mov_average_expw(array, span, dtype)", kwlist,
-                &orig_arrayobj, &span,
-                PyArray_DescrConverter2, &dtype)) return NULL;
+                "O|iO&iidd:mov_average_expw(array, span, dtype, axis, "\
+                "nthreads, alpha, tol)", kwlist, &orig_arrayobj, &span,
+                PyArray_DescrConverter2, &dtype, &axis,
+                &nthreads, &alpha, &tol)) return NULL;
+
+    /* the smoothing factor is given either directly or by the span */
+    if (alpha == -1) {
+        if (span < 1) {
+            PyErr_SetString(PyExc_ValueError,
+                            "span must be greater than or equal to 1");
+            return NULL;
+        }
+        alpha = 2.0/((double)(span + 1));
+    } else if (!((alpha > 0) && (alpha <= 1))) {
+        PyErr_SetString(PyExc_ValueError, "alpha must be in (0, 1]");
+        return NULL;
+    }
 
-    // note: we do not actually use the "result_mask" in this case
-    check_mov_args(orig_arrayobj, span, 1,
-                   &orig_ndarray, &orig_mask, &result_mask);
+    // the result mask is only computed with a tolerance
+    if (check_mov_args(orig_arrayobj, 1, 1, &axis, NULL,
+                       &orig_ndarray, &orig_mask, &result_mask,
+                       &starts, &capacity) < 0) {
+        return NULL;
+    }
 
     rtype = _get_type_num_double(((PyArrayObject*)orig_ndarray)->descr, dtype);
 
     result_ndarray = calc_mov_average_expw(
         (PyArrayObject*)orig_ndarray, (PyArrayObject*)orig_mask,
-        span, rtype
+        axis, alpha, tol, rtype, nthreads,
+        (tol >= 0) ? (PyArrayObject*)result_mask : NULL
     );
     ERR_CHECK(result_ndarray)
 
     result_dict = PyDict_New();
     MEM_CHECK(result_dict)
     PyDict_SetItemString(result_dict, "array", result_ndarray);
+    if (tol >= 0) {
+        PyDict_SetItemString(result_dict, "mask", result_mask);
+    }
 
+    Py_DECREF(orig_ndarray);
+    Py_XDECREF(orig_mask);
     Py_DECREF(result_ndarray);
     Py_DECREF(result_mask);
     return result_dict;
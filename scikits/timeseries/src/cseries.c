@@ -8,10 +8,18 @@ static PyMethodDef cseries_methods[] = {
      METH_VARARGS | METH_KEYWORDS, ""},
     {"MA_mov_median", (PyCFunction)MaskedArray_mov_median,
      METH_VARARGS | METH_KEYWORDS, ""},
+    {"MA_mov_quantile", (PyCFunction)MaskedArray_mov_quantile,
+     METH_VARARGS | METH_KEYWORDS, ""},
+    {"MA_mov_rank", (PyCFunction)MaskedArray_mov_rank,
+     METH_VARARGS | METH_KEYWORDS, ""},
     {"MA_mov_min", (PyCFunction)MaskedArray_mov_min,
      METH_VARARGS | METH_KEYWORDS, ""},
     {"MA_mov_max", (PyCFunction)MaskedArray_mov_max,
      METH_VARARGS | METH_KEYWORDS, ""},
+    {"MA_mov_minmax", (PyCFunction)MaskedArray_mov_minmax,
+     METH_VARARGS | METH_KEYWORDS, ""},
+    {"MA_mov_moments", (PyCFunction)MaskedArray_mov_moments,
+     METH_VARARGS | METH_KEYWORDS, ""},
     {"MA_mov_average_expw", (PyCFunction)MaskedArray_mov_average_expw,
      METH_VARARGS | METH_KEYWORDS, ""},
 
@@ -22,6 +30,10 @@ static PyMethodDef cseries_methods[] = {
      METH_VARARGS, ""},
     {"DA_getDateInfo", (PyCFunction)DateArray_getDateInfo,
      METH_VARARGS, ""},
+    {"DA_getDateFields", (PyCFunction)DateArray_getDateFields,
+     METH_VARARGS, ""},
+    {"DA_fromDatetimes", (PyCFunction)DateArray_fromDatetimes,
+     METH_VARARGS, ""},
 
 
     {"now", (PyCFunction)c_dates_now,
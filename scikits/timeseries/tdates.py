@@ -24,7 +24,7 @@ from numpy import ndarray
 import numpy.core.numerictypes as ntypes
 from numpy.core.numerictypes import generic
 
-from parser import DateFromString, DateTimeFromString
+from parser import DateFromString, DateTimeFromString, DateTimeParser
 
 import const as _c
 import cseries
@@ -53,6 +53,15 @@ __all__ = ['ArithmeticDateError',
            'year',
           ]
 
+# Names of the calendar fields of a DateArray, with the corresponding codes
+# of the C functions
+_date_fields = [('year', 'Y'), ('qyear', 'F'), ('quarter', 'Q'),
+                ('month', 'M'), ('week', 'I'), ('day', 'D'),
+                ('day_of_week', 'W'), ('day_of_year', 'R'),
+                ('hour', 'H'), ('minute', 'T'), ('second', 'S')]
+_date_field_codes = dict(_date_fields)
+_date_field_names = dict([(c, f) for (f, c) in _date_fields])
+
 #####---------------------------------------------------------------------------
 #---- --- Date Exceptions ---
 #####---------------------------------------------------------------------------
@@ -197,8 +206,9 @@ class _datearithmetics(object):
             if other.dtype.kind not in ['i', 'f']:
                 raise ArithmeticDateError
         if self._asdates and not isinstance(other, (DateArray, Date)):
-            return instance.__class__(method(other_val, *args),
-                                      freq=freq)
+            # Drop the cached information of the instance
+            result = method(other_val, *args).view(np.ndarray)
+            return instance.__class__(result, freq=freq)
         else:
             return method(other_val, *args).view(np.ndarray)
 
@@ -246,11 +256,15 @@ class DateArray(ndarray):
             _cached['ischrono'] = sortflag
         return _dates
 
+    # Maximum size of an instance for caching its calendar fields
+    _datefields_maxsize = 2 ** 20
+
     def _reset_cachedinfo(self):
         "Reset the internal cache information"
         self._cachedinfo = dict(toobj=None, tostr=None, toord=None,
                                 steps=None, full=None, hasdups=None,
-                                chronidx=None, ischrono=None)
+                                chronidx=None, ischrono=None,
+                                datefields=None, dateindex=None)
 
     def __array_wrap__(self, obj, context=None):
         if context is None:
@@ -288,7 +302,8 @@ class DateArray(ndarray):
             indx = self.date_to_index(indx)
             reset_full = False
         elif isinstance(indx, slice):
-            keep_chrono = True
+            # Only slices with a positive step keep the chronological order
+            keep_chrono = (indx.step is None) or (indx.step > 0)
         elif np.asarray(indx).dtype.kind == 'O':
             try:
                 indx = self.find_dates(indx)
@@ -311,13 +326,15 @@ class DateArray(ndarray):
                 _cache = r._cachedinfo
                 # Select the appropriate cached representations
                 _cache.update(dict([(k, _cache[k][indx])
-                                    for k in ('toobj', 'tostr', 'toord')
+                                    for k in ('toobj', 'tostr', 'toord',
+                                              'datefields')
                                     if _cache[k] is not None]))
                 # Reset the ischrono flag if needed
                 if not (keep_chrono and _cache['ischrono']):
                     _cache['ischrono'] = None
                 # Reset the sorting indices
                 _cache['chronidx'] = None
+                _cache['dateindex'] = None
                 # Reset the steps
                 _cache['steps'] = None
                 if reset_full:
@@ -349,6 +366,8 @@ class DateArray(ndarray):
         datenum = np.array(date, dtype=self.dtype)
         if datenum.ndim != 0:
             raise ValueError("Cannot check containment of multiple dates")
+        if self.ndim == 1:
+            return bool(self._lookup(datenum) >= 0)
         return datenum in self.view(np.ndarray)
 
     #......................................................
@@ -454,11 +473,59 @@ class DateArray(ndarray):
         return self.__getdateinfo__('S')
     seconds = second
 
+    def get_date_fields(self, fields=None):
+        """
+    Returns several calendar fields of the dates at once.
+
+    Each date is decomposed only once, which is faster than accessing the
+    corresponding properties one after the other.
+
+    Parameters
+    ----------
+    fields : {None, sequence of strings}, optional
+        Names of the fields to compute, among 'year', 'qyear', 'quarter',
+        'month', 'week', 'day', 'day_of_week', 'day_of_year', 'hour',
+        'minute' and 'second'.
+        If None, all the fields are computed.
+
+    Returns
+    -------
+    fields : ndarray
+        A structured array with the same shape as the instance, and one
+        int32 field for each requested name.
+
+    Examples
+    --------
+    >>> d = ts.date_array(start_date=ts.Date('D', '2001-01-30'), length=3)
+    >>> d.get_date_fields(('year', 'month', 'day'))
+    array([(2001, 1, 30), (2001, 1, 31), (2001, 2, 1)],
+          dtype=[('year', '<i4'), ('month', '<i4'), ('day', '<i4')])
+
+        """
+        if fields is None:
+            fields = [f for (f, _) in _date_fields]
+        elif isinstance(fields, basestring):
+            fields = [fields]
+        try:
+            codes = ''.join([_date_field_codes[f] for f in fields])
+        except KeyError, err:
+            raise ValueError("Invalid date field: %s" % err)
+        result = np.empty(self.shape, dtype=[(f, np.int32) for f in fields])
+        cseries.DA_getDateFields(self.__array__(), self.freq, codes, result)
+        return result
+
     def __getdateinfo__(self, info):
-        return np.asarray(cseries.DA_getDateInfo(np.asarray(self),
-                                                 self.freq, info,
-                                                 int(self.is_full())),
-                          dtype=int)
+        name = _date_field_names[info]
+        _cached = self._cachedinfo
+        datefields = _cached['datefields']
+        if (datefields is None) or (datefields.shape != self.shape):
+            # Above the size limit, compute only the requested field
+            if self.size > self._datefields_maxsize:
+                return np.asarray(self.get_date_fields([name])[name],
+                                  dtype=int)
+            # All the fields are computed (and cached) at once
+            datefields = _cached['datefields'] = self.get_date_fields()
+        return np.asarray(datefields[name], dtype=int)
     __getDateInfo = __getdateinfo__
 
     #.... Conversion methods ....................
@@ -661,21 +728,89 @@ class DateArray(ndarray):
                 return flatten_sequence(args)
 
         ifreq = self.freq
-        c = np.zeros(self.shape, dtype=bool)
+        values = []
         for d in flatargs(*dates):
             if d.freq != ifreq:
                 d = d.asfreq(ifreq)
-            c += (self == d.value)
-        c = c.nonzero()
-        if np.size(c) == 0:
+            values.append(d.value)
+        if self.ndim != 1:
+            c = np.zeros(self.shape, dtype=bool)
+            for v in values:
+                c += (self == v)
+            c = c.nonzero()
+            if np.size(c) == 0:
+                raise IndexError("Date out of bounds!")
+            return c
+        # Find the range of each date in the sorted values
+        (sortedvals, positions) = self._get_dateindex()
+        values = np.array(values, dtype=int)
+        first = sortedvals.searchsorted(values, 'left')
+        counts = sortedvals.searchsorted(values, 'right') - first
+        total = counts.sum()
+        if not total:
             raise IndexError("Date out of bounds!")
-        return c
+        indx = np.repeat(first - np.r_[0, counts.cumsum()[:-1]], counts) + \
+               np.arange(total)
+        if positions is not None:
+            indx = positions[indx]
+        return (np.unique(indx),)
+
+    def _get_dateindex(self):
+        """
+    Returns the index used to find the dates of a 1D instance, as a tuple
+    (sorted values, positions of the sorted values in the instance).
+    If the instance is sorted chronologically, the positions are None.
+    The index is computed once and cached.
+        """
+        _cached = self._cachedinfo
+        dateindex = _cached['dateindex']
+        if dateindex is None:
+            vals = self.__array__().ravel()
+            if self.is_chronological():
+                dateindex = (vals, None)
+            else:
+                # Use a stable sort, to find the first of duplicated dates
+                positions = vals.argsort(kind='mergesort')
+                dateindex = (vals[positions], positions)
+            _cached['dateindex'] = dateindex
+        return dateindex
+
+    def _lookup(self, values):
+        """
+    Returns the index of the first occurrence of each value in a 1D
+    instance, or -1 if the value is not found.
+        """
+        (sortedvals, positions) = self._get_dateindex()
+        values = np.asarray(values)
+        if not sortedvals.size:
+            return -np.ones(values.shape, dtype=int)
+        indx = np.minimum(sortedvals.searchsorted(values), sortedvals.size - 1)
+        found = (sortedvals[indx] == values)
+        if positions is not None:
+            indx = positions[indx]
+        return np.where(found, indx, -1)
 
     def date_to_index(self, dates):
         """
    Returns the index corresponding to one given date, as an integer.
         """
         vals = self.view(ndarray)
+        if self.ndim == 1:
+            if isinstance(dates, Date):
+                indx = int(self._lookup(dates.value))
+                if indx < 0:
+                    raise IndexError("Date '%s' is out of bounds" % dates)
+                return indx
+            _vals = np.array(dates, copy=False, dtype=int, ndmin=1)
+            indx = self._lookup(_vals)
+            err_cond = (indx < 0)
+            if err_cond.any():
+                err_indx = Date(self.freq, value=int(_vals[err_cond].flat[0]))
+                err_msg = "Date '%s' is out of bounds '%s' <= date <= '%s'"
+                raise IndexError(err_msg % (err_indx,
+                                            self.start_date, self.end_date))
+            return indx
+        #
         if isinstance(dates, Date):
             _val = dates.value
             if _val not in vals:
@@ -823,7 +958,8 @@ class DateArray(ndarray):
         "(This docstring should be overwritten)"
         ndarray.sort(self, axis=axis, kind=kind, order=order)
         _cached = self._cachedinfo
-        kwargs = dict(toobj=None, toord=None, tostr=None)
+        kwargs = dict(toobj=None, toord=None, tostr=None, datefields=None,
+                      dateindex=None)
         if self.ndim == 1:
             kwargs.update(ischrono=True, chronidx=np.array([], dtype=int))
         _cached.update(**kwargs)
@@ -871,17 +1007,244 @@ DateArray.fill_missing_dates = fill_missing_dates
 nodates = DateArray([])
 
 
+#####---------------------------------------------------------------------------
+#---- --- Parsing of strings ---
+#####---------------------------------------------------------------------------
+# Formats tried by default on an array of strings, before the flexible parser
+_iso_formats = ['%Y-%m-%d', '%Y-%m-%d %H:%M:%S', '%Y-%m-%dT%H:%M:%S',
+                '%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M', '%Y-%m']
+# Widths of the fixed-width directives, and indices of the corresponding fields
+_format_directives = {'Y': (4, 0), 'm': (2, 1), 'd': (2, 2),
+                      'H': (2, 3), 'M': (2, 4), 'S': (2, 5)}
+# Cumulated number of days at the beginning of each month (non-leap years)
+_days_before_month = np.array([0, 0, 31, 59, 90, 120, 151, 181, 212, 243,
+                               273, 304, 334])
+_days_in_month = np.array([0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+# Absolute date of 1970-01-01, origin of the hourly/minutely/secondly dates
+_highfreq_orig = 719163
+
+
+def _compile_format(format):
+    """
+    Splits a format into a list of fixed-width directives ``(position, width,
+    field)`` and a list of literal characters ``(position, char)``.
+    Returns None if the format has a directive that is not of fixed width.
+    """
+    (directives, literals) = ([], [])
+    (i, pos) = (0, 0)
+    while i < len(format):
+        char = format[i]
+        if char == '%':
+            code = format[i + 1:i + 2]
+            if code == '%':
+                literals.append((pos, '%'))
+                pos += 1
+            elif code in _format_directives:
+                (width, field) = _format_directives[code]
+                directives.append((pos, width, field))
+                pos += width
+            else:
+                return None
+            i += 2
+        else:
+            literals.append((pos, char))
+            pos += 1
+            i += 1
+    return (pos, directives, literals)
+
+
+def _fields_from_strings(strings, format):
+    """
+    Parses an array of strings with a given format.
+
+    Returns a tuple ``(fields, valid)``, where ``fields`` is a (n, 6) array of
+    the years, months, days, hours, minutes and seconds of the strings, and
+    ``valid`` a boolean array flagging the strings that match the format.
+    Returns None if the format cannot be used on arrays.
+    """
+    compiled = _compile_format(format)
+    if compiled is None:
+        return None
+    (width, directives, literals) = compiled
+    size = strings.size
+    fields = np.zeros((size, 6), dtype=int)
+    fields[:, 1:3] = 1
+    itemsize = strings.dtype.itemsize
+    if width > itemsize:
+        return (fields, np.zeros(size, dtype=bool))
+    chars = strings.view(np.uint8).reshape(size, itemsize)
+    # Check the length of the strings and the separators
+    valid = (chars[:, width - 1] != 0)
+    if width < itemsize:
+        valid &= (chars[:, width] == 0)
+    for (pos, char) in literals:
+        valid &= (chars[:, pos] == ord(char))
+    if not valid.any():
+        return (fields, valid)
+    # Get the numbers, one digit at a time
+    for (pos, nbdigits, field) in directives:
+        number = fields[:, field]
+        number[:] = 0
+        for col in range(pos, pos + nbdigits):
+            # The subtraction wraps around for characters lower than '0'
+            digit = chars[:, col] - np.uint8(ord('0'))
+            valid &= (digit < 10)
+            number *= 10
+            number += digit
+    # Check the ranges of the fields
+    (year, month, day) = (fields[:, 0], fields[:, 1], fields[:, 2])
+    valid &= (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1)
+    month = np.where(valid, month, 1)
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    valid &= (day <= _days_in_month[month] + (leap & (month == 2)))
+    valid &= (fields[:, 3] <= 23) & (fields[:, 4] <= 59) & (fields[:, 5] <= 59)
+    return (fields, valid)
+
+
+def _values_from_fields(fields, freq):
+    """
+    Returns the values of the dates at the frequency `freq` corresponding to
+    a (n, 6) array of years, months, days, hours, minutes and seconds, as
+    :class:`Date` would compute them.
+    """
+    (year, month, day, hour, minute, second) = fields.T
+    freq_group = get_freq_group(freq)
+    if freq_group == _c.FR_ANN:
+        return year
+    elif freq_group == _c.FR_QTR:
+        quarter = (month - 1) // 3 + 1
+        if (freq - freq_group) > 12:
+            return year * 4 + quarter
+        return (year - 1) * 4 + quarter
+    elif freq == _c.FR_MTH:
+        return (year - 1) * 12 + month
+    # Get the absolute dates (proleptic gregorian ordinals)
+    pyear = year - 1
+    leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    absdate = pyear * 365 + pyear // 4 - pyear // 100 + pyear // 400 + \
+              _days_before_month[month] + (leap & (month > 2)) + day
+    if freq_group == _c.FR_WK:
+        day_adj = (7 - (freq - _c.FR_WK)) % 7
+        return (absdate + np.fmod((7 - day_adj) - absdate % 7, 7)) // 7
+    elif freq == _c.FR_BUS:
+        return absdate - (absdate // 7) * 2
+    elif freq_group in (_c.FR_HR, _c.FR_MIN, _c.FR_SEC):
+        result = (absdate - _highfreq_orig) * 24 + hour
+        if freq_group != _c.FR_HR:
+            result = result * 60 + minute
+            if freq_group != _c.FR_MIN:
+                result = result * 60 + second
+        return result + 1
+    return absdate
+
+
+def _strings_to_values(strings, freq, format=None):
+    """
+    Converts an array of strings to an array of date values at the frequency
+    `freq`.
+
+    The strings are first parsed with the fixed-width `format` (or with some
+    ISO-8601 formats if `format` is None) as arrays. The strings that do not
+    match are parsed individually, with :func:`datetime.datetime.strptime`
+    if an explicit format is given, and with a :class:`DateTimeParser`
+    otherwise.
+    """
+    strings = np.array(strings, copy=False).ravel()
+    values = np.empty(strings.size, dtype=int)
+    remaining = np.ones(strings.size, dtype=bool)
+    if strings.dtype.kind == 'U':
+        try:
+            strings = strings.astype('S')
+        except UnicodeError:
+            pass
+    if strings.dtype.kind == 'S' and strings.dtype.itemsize:
+        if format is None:
+            formats = _iso_formats
+        else:
+            formats = [format]
+        for fmt in formats:
+            parsed = _fields_from_strings(strings, fmt)
+            if parsed is None:
+                continue
+            (fields, valid) = parsed
+            valid &= remaining
+            if valid.any():
+                values[valid] = _values_from_fields(fields[valid], freq)
+                remaining &= ~valid
+            if not remaining.any():
+                return values
+    # Parse the remaining strings one at a time
+    parser = _datetime_parser(freq)
+    for i in remaining.nonzero()[0]:
+        string = strings[i]
+        if format is not None:
+            try:
+                datetime = dt.datetime.strptime(string, format)
+            except ValueError:
+                pass
+            else:
+                values[i] = Date(freq, datetime=datetime).value
+                continue
+        values[i] = Date(freq, datetime=parser(string)).value
+    return values
+
+
+def _datetime_parser(freq):
+    """
+    Returns a :class:`DateTimeParser` for strings representing dates at the
+    frequency `freq`, ignoring the time part for frequencies lower than hourly
+    (as :class:`Date` does).
+    """
+    freq_group = get_freq_group(check_freq(freq))
+    dates_only = freq_group not in (_c.FR_HR, _c.FR_MIN, _c.FR_SEC)
+    return DateTimeParser(dates_only=dates_only)
+
+
+def _datetime64_to_values(dlist, freq):
+    """
+    Converts an array of datetime64 to an array of date values at the
+    frequency `freq`, as :class:`Date` would compute them from the
+    corresponding :class:`datetime.datetime` objects.
+    """
+    seconds = dlist.astype('M8[s]').view(np.int64).ravel()
+    if (seconds == np.iinfo(np.int64).min).any():
+        raise ValueError("NaT cannot be converted to a Date")
+    freq_group = get_freq_group(freq)
+    if freq_group == _c.FR_SEC:
+        return seconds + 1
+    elif freq_group == _c.FR_MIN:
+        return seconds // 60 + 1
+    elif freq_group == _c.FR_HR:
+        return seconds // 3600 + 1
+    absdate = seconds // 86400 + _highfreq_orig
+    if freq in (_c.FR_DAY, _c.FR_UND):
+        return absdate
+    fields = np.zeros((absdate.size, 6), dtype=int)
+    ymd = DateArray(absdate, freq=_c.FR_DAY).get_date_fields(('year', 'month',
+                                                             'day'))
+    fields[:, 0] = ymd['year']
+    fields[:, 1] = ymd['month']
+    fields[:, 2] = ymd['day']
+    return _values_from_fields(fields, freq)
+
+
 #####---------------------------------------------------------------------------
 #---- --- DateArray functions ---
 #####---------------------------------------------------------------------------
-def _listparser(dlist, freq=None):
+def _listparser(dlist, freq=None, format=None):
     "Constructs a DateArray from a list."
+    # Case #0: datetime objects : skip the creation of an object array
+    if isinstance(dlist, (list, tuple)) and len(dlist) and \
+       isinstance(dlist[0], dt.date):
+        result = cseries.DA_fromDatetimes(dlist, check_freq(freq))
+        result = result.view(DateArray)
+        result.freq = freq
+        return result
     dlist = np.array(dlist, copy=False, ndmin=1)
     # Case #1: dates as strings .................
     if dlist.dtype.kind in 'SU':
-        #...construct a list of dates
-        dlist = np.fromiter((Date(freq, string=s).value for s in dlist),
-                            dtype=int)
+        #...parse the strings
+        dlist = _strings_to_values(dlist, freq, format=format)
     # Case #2: dates as numbers .................
     elif dlist.dtype.kind in 'if':
         #...hopefully, they are values
@@ -900,8 +1263,10 @@ def _listparser(dlist, freq=None):
                                 dtype=int)
         #...as datetime objects
         elif hasattr(template, 'toordinal'):
-            dlist = np.fromiter((Date(freq, datetime=d) for d in dlist),
-                                dtype=int)
+            dlist = cseries.DA_fromDatetimes(dlist, check_freq(freq))
+    # Case #4: dates as datetime64 ..............
+    elif dlist.dtype.kind == 'M':
+        dlist = _datetime64_to_values(dlist, check_freq(freq))
     #
     result = dlist.view(DateArray)
     result.freq = freq
@@ -909,7 +1274,7 @@ def _listparser(dlist, freq=None):
 
 
 def date_array(dlist=None, start_date=None, end_date=None, length=None,
-               freq=None, autosort=False):
+               freq=None, autosort=False, format=None):
     """
     Factory function for constructing a :class:`DateArray`.
 
@@ -920,7 +1285,8 @@ def date_array(dlist=None, start_date=None, end_date=None, length=None,
 
         * an existing :class:`DateArray` object;
         * a sequence of :class:`Date` objects with the same frequency;
-        * a sequence of :class:`datetime.datetime` objects;
+        * a sequence of :class:`datetime.datetime` objects, or an array of
+          :class:`numpy.datetime64`;
         * a sequence of dates in string format;
         * a sequence of integers corresponding to the representation of 
           :class:`Date` objects.
@@ -942,11 +1308,20 @@ def date_array(dlist=None, start_date=None, end_date=None, length=None,
         a continuous :class:`DateArray`.
     autosort : {True, False}, optional
         Whether the input dates must be sorted in chronological order.
+    format : {None, string}, optional
+        Format of the dates, when :keyword:`dlist` is a sequence of strings,
+        using the directives of :func:`datetime.datetime.strptime`
+        (for example, ``'%Y-%m-%d %H:%M:%S'``).
+        If None, the strings are first parsed as ISO-8601 dates.
 
     Notes
     -----
     * When the input is a list of dates, the dates are **not** sorted.
       Use ``autosort = True`` to sort the dates by chronological order.
+    * Strings are parsed as arrays when they match the format (or an ISO-8601
+      format if `format` is None) and only consist of the ``%Y``, ``%m``,
+      ``%d``, ``%H``, ``%M`` and ``%S`` directives.
+      The other strings are parsed one at a time, which is much slower.
     * If `start_date` is a :class:`Date` object and `freq` is None,
       the frequency of the output is ``start_date.freq``.
 
@@ -973,7 +1348,7 @@ def date_array(dlist=None, start_date=None, end_date=None, length=None,
             return dlist
         # Make sure it's a sequence, else that's a start_date
         if hasattr(dlist, '__len__') and not isinstance(dlist, basestring):
-            dlist = _listparser(dlist, freq=freq)
+            dlist = _listparser(dlist, freq=freq, format=format)
             if autosort:
                 dlist.sort_chronologically()
             return dlist
@@ -1081,7 +1456,14 @@ def period_break(dates, period):
         Name of the period to monitor.
     """
     current = getattr(dates, period)
-    previous = getattr(dates - 1, period)
+    if (dates.ndim == 1) and dates.size and dates.is_chronological() and \
+       dates.is_valid():
+        # The previous dates are already in the array (but the first one)
+        previous = np.empty_like(current)
+        previous[1:] = current[:-1]
+        previous[0] = getattr(dates[:1] - 1, period)[0]
+    else:
+        previous = getattr(dates - 1, period)
     return (current - previous).nonzero()[0]
 
 
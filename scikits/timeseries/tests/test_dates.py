@@ -75,6 +75,48 @@ class TestCreation(TestCase):
         assert_equal(dates, dvals)
 
 
+    def test_fromstrings_wformat(self):
+        "Tests creation from strings w/ and w/o an explicit format"
+        dlist = ['2007-01-31', '2008-02-29 12:34:56', '2009-06-15T23:59',
+                 '2008-02', '15-Mar-2007', ' 2007-12-31', '2007-11-30 ']
+        for freq in ('A', 'A-JUN', 'Q', 'Q-NOV', 'M', 'W', 'W-WED', 'B', 'D',
+                     'H', 'T', 'S'):
+            control = [Date(freq, string=s).value for s in dlist]
+            assert_equal(date_array(dlist, freq=freq), control)
+            assert_equal(date_array(np.array(dlist, dtype='U'), freq=freq),
+                         control)
+        # With an explicit format
+        dlist = ['2007/01/31 10:20', '2008/02/29 01:02', '2009/06/15 00:00']
+        dates = date_array(dlist, freq='T', format='%Y/%m/%d %H:%M')
+        assert_equal(dates, [Date('T', string=s).value for s in dlist])
+        # With a format that can't be used on arrays
+        dlist = ['31 Jan 2007', '29 Feb 2008', '2009-06-15']
+        dates = date_array(dlist, freq='D', format='%d %b %Y')
+        assert_equal(dates, [Date('D', string=s).value for s in dlist])
+        # Invalid dates are still detected
+        self.failUnlessRaises(ValueError, date_array, ['2007-02-29'], freq='D')
+
+
+    def test_datetimeparser(self):
+        "Tests the stateful parser of strings"
+        from scikits.timeseries.parser import DateTimeParser, \
+                                               DateTimeFromString, \
+                                               DateFromString
+        dlist = ['01/31/2007 10:20', '02/28/2007 23:10', '2007-01-31 10:20',
+                 '15 Mar 2007', '14 Mar 2007 12:00', ' 2007-12-31', '2007',
+                 '1.2.2007', '01/31/2007 10:20']
+        parser = DateTimeParser(cachesize=4)
+        assert_equal([parser(s) for s in dlist],
+                     [DateTimeFromString(s) for s in dlist])
+        self.failUnless(len(parser._cache) <= 4)
+        assert_equal((parser.date_style, parser.time_style),
+                     ('us', 'standard'))
+        parser = DateTimeParser(dates_only=True)
+        assert_equal([parser(s) for s in dlist],
+                     [DateFromString(s) for s in dlist])
+        self.failUnlessRaises(ValueError, parser, '2007-02-29')
+
+
     def test_from_startend_dates_strings(self):
         "Test creating from a starting & ending dates as strings"
         control = DateArray(np.arange(366) + 733042, freq='D')
@@ -141,6 +183,45 @@ class TestCreation(TestCase):
         assert_equal(_dt, _tsdt)
 
 
+    def test_from_datetime_sequences(self):
+        "Test creation from sequences of datetime objects."
+        dlist = [datetime.datetime(2007, 1, 31, 10, 20, 30),
+                 datetime.datetime(1999, 12, 31, 23, 59, 59),
+                 datetime.datetime(2008, 2, 29)]
+        for freq in ('A', 'A-JUN', 'Q', 'Q-NOV', 'Q-S-JUN', 'M', 'W',
+                     'W-WED', 'B', 'D', 'H', 'T', 'S', 'U'):
+            control = [ts.Date(freq, datetime=d).value for d in dlist]
+            for seq in (dlist, tuple(dlist), np.array(dlist, dtype=object)):
+                dates = date_array(seq, freq=freq)
+                assert_equal(dates, control)
+                assert_equal(dates.freq, ts.check_freq(freq))
+        # datetime.date objects
+        dlist = [d.date() for d in dlist]
+        control = [ts.Date('D', datetime=d).value for d in dlist]
+        assert_equal(date_array(dlist, freq='D'), control)
+        assert_equal(date_array(dlist, freq='H'),
+                     date_array(dlist, freq='D').asfreq('H', 'START'))
+        # Invalid objects
+        self.failUnlessRaises(TypeError, date_array,
+                              [datetime.date(2007, 1, 1), '2007-01-02'],
+                              freq='D')
+
+
+    def test_from_datetime64(self):
+        "Test creation from arrays of datetime64."
+        if not hasattr(np, 'datetime64'):
+            return
+        dlist = [datetime.datetime(2007, 1, 31, 10, 20, 30),
+                 datetime.datetime(1969, 12, 31, 23, 59, 59),
+                 datetime.datetime(2008, 2, 29)]
+        for unit in ('s', 'us'):
+            darray = np.array(dlist, dtype='M8[%s]' % unit)
+            for freq in ('A', 'A-JUN', 'Q', 'Q-NOV', 'M', 'W', 'W-WED', 'B',
+                         'D', 'H', 'T', 'S'):
+                control = [ts.Date(freq, datetime=d).value for d in dlist]
+                assert_equal(date_array(darray, freq=freq).tovalues(), control)
+
+
     def test_consistent_value(self):
         "Tests that values don't get mutated when constructing dates from a value"
         freqs = [x[0] for x in freq_dict.values() if x[0] != 'U']
@@ -933,6 +1014,28 @@ class TestFreqConversion(TestCase):
 
             assert_func(date_S.asfreq('S'), date_S)
 
+    def test_conv_array(self):
+        "frequency conversion tests: DateArray vs Date"
+        freqs = ['A', 'A-MAR', 'A-NOV', 'Q', 'Q-JAN', 'Q-OCT', 'M',
+                 'W', 'W-WED', 'B', 'D', 'H', 'T']
+        for ifreq in freqs:
+            dates = date_array(start_date=Date(ifreq, '1999-12-25'),
+                               length=40)
+            # Use some random steps, to span several periods
+            dates = dates + np.cumsum(np.arange(40) % 7)
+            for ofreq in freqs:
+                for relation in ('START', 'END'):
+                    test = dates.asfreq(ofreq, relation)
+                    control = [d.asfreq(ofreq, relation).value
+                               for d in dates]
+                    assert_equal(test.tovalue(), control)
+                    assert_equal(test.freq, ts.check_freq(ofreq))
+        # Check that the shape is preserved
+        dates = date_array(start_date=Date('M', '2001-01'), length=12)
+        test = dates.reshape(3, 4).asfreq('Q')
+        assert_equal(test.shape, (3, 4))
+        assert_equal(test[:, 0].tovalue(), dates[::4].asfreq('Q').tovalue())
+
     def test_convert_to_float_daily(self):
         "Test convert_to_float on daily data"
         dbase = ts.date_array(start_date=ts.Date('D', '2007-01-01'),
@@ -1058,6 +1161,73 @@ class TestMethods(TestCase):
         assert_equal(DL.tostring(), Dstr[[0, -1]])
 
 
+    def test_get_date_fields(self):
+        "Test get_date_fields"
+        names = ('year', 'qyear', 'quarter', 'month', 'week', 'day',
+                 'day_of_week', 'day_of_year', 'hour', 'minute', 'second')
+        for (freq, length) in (('A', 5), ('Q-NOV', 9), ('M', 14), ('W', 60),
+                               ('B', 300), ('D', 400), ('H', 100),
+                               ('T', 200), ('S', 200)):
+            dates = date_array(start_date=Date(freq, '2003-12-25 23:58:58'),
+                               length=length)
+            dates = dates[np.random.permutation(length)]
+            test = dates.get_date_fields()
+            assert_equal(test.shape, dates.shape)
+            assert_equal(test.dtype.names, names)
+            for name in names:
+                control = [getattr(d, name) for d in dates]
+                assert_equal(test[name], control)
+                assert_equal(getattr(dates, name), control)
+        #
+        test = dates.get_date_fields(('month', 'year'))
+        assert_equal(test.dtype.names, ('month', 'year'))
+        assert_equal(test['year'], dates.year)
+        assert_equal(dates.get_date_fields('day')['day'], dates.day)
+        self.failUnlessRaises(ValueError, dates.get_date_fields, ['days'])
+        # 2D
+        dates = date_array(start_date=Date('M', '2001-01'), length=12)
+        assert_equal(dates.reshape(3, 4).month, np.arange(1, 13).reshape(3, 4))
+
+
+    def test_cached_date_fields(self):
+        "Test the cache of the calendar fields"
+        dates = date_array(start_date=Date('D', '2001-01-30'), length=5)
+        assert_equal(dates.day, [30, 31, 1, 2, 3])
+        self.failUnless(dates._cachedinfo['datefields'] is not None)
+        # The cache should not be shared w/ the results of operations
+        assert_equal((dates + 1).day, [31, 1, 2, 3, 4])
+        assert_equal((dates - 1).day, [29, 30, 31, 1, 2])
+        assert_equal(dates[2:].day, [1, 2, 3])
+        assert_equal(dates[[1, 4]].month, [1, 2])
+        assert_equal(dates.reshape(5, 1).day, [[30], [31], [1], [2], [3]])
+        # nor survive a sort
+        dates = dates[::-1]
+        assert_equal(dates.day, [3, 2, 1, 31, 30])
+        dates.sort()
+        assert_equal(dates.day, [30, 31, 1, 2, 3])
+        # The cache should be sliced along w/ the dates
+        cached = dates._cachedinfo['datefields']
+        for indx in (slice(2, None), [1, 4], dates.day > 2):
+            test = dates[indx]
+            assert_equal(test._cachedinfo['datefields'], cached[indx])
+            assert_equal(test.day, dates.day[indx])
+        # Too large arrays are not cached
+        dates = date_array(start_date=Date('D', '2001-01-30'), length=5)
+        dates._datefields_maxsize = 4
+        assert_equal(dates.day, [30, 31, 1, 2, 3])
+        self.failUnless(dates._cachedinfo['datefields'] is None)
+
+
+    def test_period_break(self):
+        "Test period_break"
+        dates = date_array(start_date=Date('D', '2001-12-30'), length=40)
+        assert_equal(ts.period_break(dates, 'month'), [2, 33])
+        assert_equal(ts.period_break(dates, 'years'), [2])
+        assert_equal(ts.period_break(dates[::-1], 'month'), [6, 37])
+        assert_equal(ts.period_break(dates[::3], 'month'), [11])
+        assert_equal(ts.period_break(dates[2:], 'month'), [0, 31])
+
+
     def test_date_to_index_valid(self):
         "Tests date_to_index"
         dates = date_array(['2007-01-%02i' % i for i in range(1, 16)], freq='D')
@@ -1125,6 +1295,37 @@ class TestMethods(TestCase):
             raise IndexError("An invalid indexed has been accepted !")
 
 
+    def test_date_to_index_unsorted(self):
+        "Tests date_to_index and find_dates on unsorted dates w/ duplicates"
+        dates = ts.DateArray([2003, 2001, 2005, 2001, 2002], freq='A')
+        assert_equal(dates.date_to_index(Date('A', year=2001)), 1)
+        assert_equal(dates.date_to_index(Date('A', year=2002)), 4)
+        assert_equal(dates.date_to_index(dates[[2, 3, 0]]), [2, 1, 0])
+        # Integers give 1D arrays, as a DateArray of a single date
+        test = dates.date_to_index(Date('A', year=2002).value)
+        assert_equal(test.shape, (1,))
+        assert_equal(test, [4])
+        self.failUnlessRaises(IndexError, dates.date_to_index,
+                              Date('A', year=2004))
+        self.failUnlessRaises(IndexError, dates.date_to_index,
+                              dates[:2] + 1)
+        #
+        assert_equal(dates.find_dates(Date('A', year=2001)), ([1, 3],))
+        assert_equal(dates.find_dates(Date('A', year=2005),
+                                      Date('A', year=2001)),
+                     ([1, 2, 3],))
+        assert_equal(dates.find_dates(Date('M', '2003-06')), ([0],))
+        self.failUnlessRaises(IndexError, dates.find_dates,
+                              Date('A', year=2004))
+        #
+        self.failUnless(Date('A', year=2005) in dates)
+        self.failUnless(Date('A', year=2004) not in dates)
+        # The index must be reset after sorting
+        dates.sort()
+        assert_equal(dates.date_to_index(Date('A', year=2002)), 2)
+        assert_equal(dates.find_dates(Date('A', year=2001)), ([0, 1],))
+
+
     def test_argsort(self):
         "Test argsort"
         dates = date_array(['2001-03', '2001-02', '2001-01'],
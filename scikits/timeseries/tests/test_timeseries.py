@@ -580,6 +580,15 @@ class TestGetitem(TestCase):
         # Now try slicing on a series with missing dates
         series = series[::2]
         _testslice(series)
+        # Try slicing on unsorted series
+        series = self.series1D
+        (sd, ed) = (series.start_date, series.end_date)
+        for unsorted in (series[::-1], series[[3, 0, 7, 1, 5]]):
+            nbefore = (unsorted._dates < sd + 3).sum()
+            nuntil = (unsorted._dates < ed).sum()
+            assert_equal(unsorted[sd + 3:ed], unsorted[nbefore:nuntil])
+        # Try slicing w/ strings
+        assert_equal(series['2007-01-03':'2007-01-05'], series[2:4])
 
 
     def test_with_dates_as_str(self):
@@ -1096,6 +1105,107 @@ test_dates test suite.
         assert_equal(ndseries.convert('M', sum), [[930, 961], [2852, 2883]])
 
 
+    def test_convert_dtypes(self):
+        "Test convert on series of various dtypes"
+        start = Date('D', '2005-01-30')
+        mask = np.zeros(40, dtype=bool)
+        mask[[0, 3, 33]] = True
+        for dtype in (float, np.float32, int, np.int32, np.int64,
+                      bool, np.int16, '|S3'):
+            data = np.arange(40).astype(dtype)
+            series = time_series(data, mask=mask, start_date=start)
+            test = series.convert('M')
+            assert_equal(test.dtype, series.dtype)
+            assert_equal(test.shape, (3, 31))
+            # Jan-2005: the last 2 days (the first one masked)
+            assert_equal(test._data[0, 30], data[1])
+            assert_equal(test.mask[0, 29:], [True, False])
+            assert(test.mask[0, :29].all())
+            # Feb-2005: 28 days
+            assert_equal(test._data[1, :28][~mask[2:30]],
+                         data[2:30][~mask[2:30]])
+            assert_equal(test.mask[1, :28], mask[2:30])
+            assert(test.mask[1, 28:].all())
+            # Mar-2005: 10 days
+            assert_equal(test._data[2, :10][~mask[30:]],
+                         data[30:][~mask[30:]])
+            assert_equal(test.mask[2, :10], mask[30:])
+            assert(test.mask[2, 10:].all())
+            # Back to a higher frequency
+            test = series.convert('H', position='START')
+            assert_equal(test.dtype, series.dtype)
+            assert_equal(test._data[::24][~mask], data[~mask])
+            assert_equal(test.mask[::24], mask)
+            assert(test.mask.reshape(-1, 24)[:, 1:].all())
+        # Object arrays
+        data = np.empty(40, dtype=object)
+        data[:] = range(40)
+        series = time_series(data, start_date=start)
+        test = series.convert('M')
+        assert_equal(test.dtype, np.dtype(object))
+        assert_equal(test._series[1, :28].tolist(), range(2, 30))
+        assert(test.mask[1, 28:].all())
+
+    def test_convert_noncontiguous(self):
+        "Test convert on a non-contiguous series"
+        data = np.arange(120.).reshape(60, 2)
+        series = time_series(data[:, 1], start_date=Date('D', '2005-01-01'))
+        test = series.convert('M', func=ma.sum)
+        assert_equal(test, [data[:31, 1].sum(), data[31:59, 1].sum(),
+                            data[59:, 1].sum()])
+
+    def test_convert_with_named_func(self):
+        "Test convert w/ the name of an aggregation function"
+        mask = np.zeros(90, dtype=bool)
+        mask[[0, 33]] = True
+        mask[2:30] = True
+        start = Date('D', '2005-01-30')
+        controls = dict(sum=ma.sum, mean=ma.mean, min=ma.min, max=ma.max,
+                        first=ts.first_unmasked_val,
+                        last=ts.last_unmasked_val,
+                        count=ma.count, std=ma.std, median=ma.median)
+        for dtype in (float, np.float32, int, np.int32, np.int16):
+            series = time_series(np.random.permutation(90).astype(dtype),
+                                 mask=mask, start_date=start)
+            for (name, func) in controls.items():
+                test = series.convert('M', func=name)
+                control = series.convert('M', func=func)
+                assert_equal(test.dates, control.dates)
+                assert_equal(test.mask, ma.getmaskarray(control))
+                assert_almost_equal(test.filled(0), control.filled(0), 5)
+        # February is completely masked
+        test = series.convert('M', func='mean')
+        assert_equal(test.mask, [False, True, False, False])
+        assert_equal(series.convert('M', func='count'), [1, 0, 30, 29])
+        # NaNs are handled as with the numpy.ma functions
+        nanseries = time_series(np.random.rand(90), mask=mask,
+                                start_date=start)
+        nanseries[[40, 75]] = np.nan
+        for (name, func) in controls.items():
+            test = nanseries.convert('M', func=name)
+            control = nanseries.convert('M', func=func)
+            assert_equal(test.mask, ma.getmaskarray(control))
+            assert_equal(test.filled(0), control.filled(0))
+        # Extra arguments go to the Python function
+        assert_almost_equal(series.convert('M', 'std', ddof=1),
+                            series.convert('M', ma.std, ddof=1))
+        # First/last values of object and string series
+        data = np.empty(90, dtype=object)
+        data[:] = range(90)
+        series = time_series(data, mask=mask, start_date=start)
+        assert_equal(series.convert('M', func='first')._series.tolist(),
+                     [1, None, 30, 61])
+        series = time_series(np.arange(90).astype('|S2'), mask=mask,
+                             start_date=start)
+        assert_equal(series.convert('M', func='last')._series.tolist(),
+                     ['1', None, '60', '89'])
+        # Upsampling ignores the function
+        test = series.convert('H', func='mean')
+        assert_equal(test.shape, (90 * 24,))
+        # Invalid names
+        self.failUnlessRaises(ValueError, series.convert, 'M', 'avg')
+
+
 
 
 
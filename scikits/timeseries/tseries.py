@@ -88,6 +88,12 @@ def _unmasked_val(a, kind, axis=None):
         else:
             indx = tuple([indx[i].max(axis=axis).filled(0)
                           for i in range(a.ndim)])
+        # The indices of the fully masked slices are meaningless: mask them
+        allmasked = m.all(axis=axis)
+        if allmasked.any():
+            result = ma.asanyarray(a[indx]).copy()
+            result[allmasked] = ma.masked
+            return result
     return a[indx]
 
 def first_unmasked_val(a, axis=None):
@@ -641,7 +647,13 @@ class TimeSeries(MaskedArray, object):
                                                _dates.freq, bound.freq)
         # this allows for slicing with dates outside the end points of the
         # series and slicing on series with missing dates
-        return np.sum(self._dates < bound)
+        # Use a binary search if the dates are (or can be) sorted
+        if (_dates.ndim == 1) and \
+           (_dates._cachedinfo['dateindex'] is not None or
+            _dates.is_chronological()):
+            sortedvals = _dates._get_dateindex()[0]
+            return int(sortedvals.searchsorted(bound.value))
+        return np.sum(_dates < bound)
 
 
     def __getitem__(self, indx):
@@ -1307,7 +1319,8 @@ class TimeSeries(MaskedArray, object):
         _dates.__setstate__((ver, dsh, dtype(int_), isf, dtm, frq))
         _dates.freq = frq
         _dates._cachedinfo.update(dict(full=None, hasdups=None, steps=None,
-                                       toobj=None, toord=None, tostr=None))
+                                       toobj=None, toord=None, tostr=None,
+                                       datefields=None, dateindex=None))
         # Update the _optinfo dictionary
         self._optinfo.update(infodict)
 #
@@ -1870,6 +1883,12 @@ def align_with(*series):
 
 
 #....................................................................
+# Aggregation functions that can be given by name to `convert`, with their
+# (slower) Python equivalent
+_convert_funcs = dict(sum=ma.sum, mean=ma.mean, min=ma.min, max=ma.max,
+                      first=first_unmasked_val, last=last_unmasked_val,
+                      count=ma.count, std=ma.std, median=ma.median)
+
 def _convert1d(series, freq, func, position, *args, **kwargs):
     "helper function for `convert` function"
     # Check the frequencies ..........................
@@ -1908,8 +1927,24 @@ def _convert1d(series, freq, func, position, *args, **kwargs):
     if (data_.size // series._dates.size) > 1:
         raise TimeSeriesError("convert works with 1D data only !")
 
-    cdictresult = cseries.TS_convert(data_, from_freq, to_freq, position,
-                                     int(start_date), mask_)
+    cdictresult = None
+    if isinstance(func, basestring):
+        try:
+            funcname = func
+            func = _convert_funcs[func.lower()]
+        except KeyError:
+            raise ValueError("Invalid aggregation function: '%s'" % funcname)
+        # Extra arguments are only understood by the Python functions
+        if not (args or kwargs):
+            try:
+                cdictresult = cseries.TS_convert(data_, from_freq, to_freq,
+                                                 position, int(start_date),
+                                                 mask_, funcname.lower())
+            except NotImplementedError:
+                pass
+    if cdictresult is None:
+        cdictresult = cseries.TS_convert(data_, from_freq, to_freq, position,
+                                         int(start_date), mask_)
     start_date = Date(freq=to_freq, value=cdictresult['startindex'])
     data_ = masked_array(cdictresult['values'], mask=cdictresult['mask'])
 
@@ -1953,7 +1988,7 @@ def convert(series, freq, func=None, position='END', *args, **kwargs):
     freq : freq_spec
         Frequency to convert the TimeSeries to. Accepts any valid frequency
         specification (string or integer)
-    func : function, optional
+    func : {function, string}, optional
         When converting a series to a lower frequency, the :keyword:`func`
         parameter to perform a calculation on each period of values
         to aggregate results.
@@ -1962,6 +1997,12 @@ def convert(series, freq, func=None, position='END', *args, **kwargs):
         If the first or last value from a period, the functions
         :func:`~scikits.timeseries.first_unmasked_val` and
         :func:`~scikits.timeseries.last_unmasked_val` should be used instead.
+        The most common aggregations can also be given by name, as one of
+        'sum', 'mean', 'min', 'max', 'first', 'last', 'count', 'std' or
+        'median': they are then computed in a single pass over the data,
+        without creating the intermediate 2D array, and give the same
+        results as their :mod:`numpy.ma` (or :func:`first_unmasked_val`,
+        :func:`last_unmasked_val`) counterparts.
         If :keyword:`func` is not given, the output series group the points
         of the initial series that share the same new date. Thus, if the
         initial series has a daily frequency and is 1D, the output series is